@@ -1,9 +1,28 @@
+import hashlib
 import json
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterable, Iterator, List, Any, Optional
 from pprint import pprint
 
+import numpy as np
+
+# Monthly table of a PVGIS PVcalc CSV export
+PV_CSV_MONTHLY_DTYPE = np.dtype([
+    ('month', np.int8),
+    ('E_d', np.float64),
+    ('E_m', np.float64),
+    ('H(i)_d', np.float64),
+    ('H(i)_m', np.float64),
+    ('SD_m', np.float64),
+])
+PV_CSV_LOSS_KEYS = ('l_aoi', 'l_spec', 'l_tg', 'l_total')
+
+# Incremental index of parsed summaries, kept inside the indexed directory
+INDEX_FILENAME = '.pv_index.json'
+
 
 def parse_pv_json(file_path: str) -> Dict[str, Any]:
     """Parse a single PV data JSON file."""
@@ -12,6 +31,108 @@ def parse_pv_json(file_path: str) -> Dict[str, Any]:
     return data
 
 
+def _csv_number(value: str) -> Any:
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() and '.' not in value else number
+
+
+def parse_pv_csv(file_path: str) -> Dict[str, Any]:
+    """
+    Parse a PVGIS PVcalc tab-separated CSV export in a single pass.
+
+    Returns the header block as `metadata` (label -> value), the monthly
+    table as a structured NumPy array with `PV_CSV_MONTHLY_DTYPE`, the
+    `Year` row plus loss/cost rows as `totals`, and the mounting label.
+    """
+    metadata = {}
+    rows = []
+    totals = {}
+    mounting = None
+    columns = None
+    section = 'header'
+
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            fields = [field.strip() for field in line.rstrip('\r\n').split('\t') if field.strip()]
+            if not fields:
+                if section == 'losses':
+                    break
+                continue
+
+            if section == 'header':
+                if len(fields) == 2 and fields[0].endswith(':'):
+                    metadata[fields[0][:-1]] = _csv_number(fields[1])
+                elif fields[0] == 'Month':
+                    columns = fields[1:]
+                    section = 'monthly'
+                elif len(fields) == 1:
+                    mounting = fields[0]
+            elif section == 'monthly':
+                if fields[0] == 'Year':
+                    totals.update(zip(columns, (float(v) for v in fields[1:])))
+                    section = 'losses'
+                else:
+                    rows.append((int(fields[0]), *(float(v) for v in fields[1:])))
+            elif section == 'losses' and fields[0].endswith(':'):
+                # Labelled rows following a header row: losses, then PV electricity cost
+                values = [float(v) for v in fields[1:]]
+                if len(values) == len(PV_CSV_LOSS_KEYS):
+                    totals.update(zip(PV_CSV_LOSS_KEYS, values))
+                elif len(values) == 1:
+                    totals['LCOE_pv'] = values[0]
+
+    monthly = np.empty(len(rows), dtype=PV_CSV_MONTHLY_DTYPE)
+    if rows:
+        data = np.array(rows, dtype=np.float64)
+        monthly['month'] = data[:, 0]
+        for i, name in enumerate(columns):
+            if name in PV_CSV_MONTHLY_DTYPE.names:
+                monthly[name] = data[:, i + 1]
+
+    return {'metadata': metadata, 'mounting': mounting, 'monthly': monthly, 'totals': totals}
+
+
+def pv_csv_to_json_layout(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rearrange a `parse_pv_csv` result into the PVcalc JSON layout.
+
+    The CSV export carries no elevation, so `location.elevation` is None;
+    yearly totals are derived from the monthly table.
+    """
+    inputs = {'location': {'elevation': None}, 'meteo_data': {}, 'pv_module': {}, 'mounting_system': {'fixed': {}}}
+    for label, value in parsed['metadata'].items():
+        if label.startswith('Latitude'):
+            inputs['location']['latitude'] = value
+        elif label.startswith('Longitude'):
+            inputs['location']['longitude'] = value
+        elif label == 'Radiation database':
+            inputs['meteo_data']['radiation_db'] = value
+        elif label.startswith('Nominal power of the PV system'):
+            technology = re.search(r'system \(([^)]+)\)', label)
+            inputs['pv_module']['technology'] = technology.group(1) if technology else None
+            inputs['pv_module']['peak_power'] = value
+        elif label.startswith('System losses'):
+            inputs['pv_module']['system_loss'] = value
+        elif label.startswith('Fixed slope'):
+            inputs['mounting_system']['fixed']['slope'] = {'value': value, 'optimal': '(optimum' in label}
+        elif label.startswith('Orientation (azimuth)'):
+            inputs['mounting_system']['fixed']['azimuth'] = {'value': value, 'optimal': '(optimum' in label}
+
+    monthly = parsed['monthly']
+    totals = dict(parsed['totals'])
+    if len(monthly) == 12:
+        totals['E_y'] = round(float(monthly['E_m'].sum()), 2)
+        totals['H(i)_y'] = round(float(monthly['H(i)_m'].sum()), 2)
+    if 'SD_m' in totals:
+        totals['SD_y'] = totals['SD_m'] * 12
+
+    monthly_records = [{name: row[name].item() for name in monthly.dtype.names} for row in monthly]
+    return {'inputs': inputs, 'outputs': {'monthly': {'fixed': monthly_records}, 'totals': {'fixed': totals}}}
+
+
 def parse_all_json_files(directory: str = 'data') -> List[Dict[str, Any]]:
     """Parse all JSON files in the specified directory."""
     json_files = Path(directory).glob('*.json')
@@ -68,19 +189,117 @@ def extract_summary(data: Dict[str, Any]) -> Dict[str, Any]:
 
     return summary
 
-if __name__ == '__main__':
-    # Parse all JSON files
-    results = parse_all_json_files('data')
 
-    print(f"\n{'='*60}")
-    print(f"Found {len(results)} JSON file(s)")
-    print(f"{'='*60}\n")
+def parse_pv_file(file_path: str) -> Dict[str, Any]:
+    """Parse a PVGIS JSON result or CSV export into the PVcalc JSON layout."""
+    if str(file_path).lower().endswith('.csv'):
+        return pv_csv_to_json_layout(parse_pv_csv(file_path))
+    return parse_pv_json(file_path)
+
+
+def summarize_file(file_path: str) -> Dict[str, Any]:
+    """Parse one file and return its summary record; errors are captured, not raised."""
+    try:
+        return {'file': str(file_path), 'summary': extract_summary(parse_pv_file(file_path)), 'error': None}
+    except Exception as e:
+        return {'file': str(file_path), 'summary': None, 'error': str(e)}
+
+
+def list_pv_files(directory: str, patterns: Iterable[str] = ('*.json',)) -> List[str]:
+    """Files in `directory` matching `patterns`, skipping hidden files such as the index."""
+    return sorted({str(p) for pattern in patterns for p in Path(directory).glob(pattern)
+                   if not p.name.startswith('.')})
+
+
+def _summarize_files(files: Iterable[str], workers: Optional[int], chunksize: int) -> Iterator[Dict[str, Any]]:
+    if not workers or workers <= 1:
+        for file_path in files:
+            yield summarize_file(file_path)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(summarize_file, files, chunksize=chunksize)
+
+
+def iter_summaries(directory: str = 'data', workers: Optional[int] = None, chunksize: int = 64,
+                   patterns: Iterable[str] = ('*.json',)) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield `{'file', 'summary', 'error'}` records for every file in `directory`
+    matching `patterns` (add `'*.csv'` to include PVGIS CSV exports).
+
+    Only the summary of each document is kept. With `workers` > 1 files are
+    parsed in a process pool and records are yielded in file order.
+    """
+    yield from _summarize_files(list_pv_files(directory, patterns), workers, chunksize)
+
+
+def file_sha256(file_path: str) -> str:
+    """SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def index_directory(directory: str = 'data', workers: Optional[int] = None, chunksize: int = 64,
+                    patterns: Iterable[str] = ('*.json',)) -> Dict[str, Dict[str, Any]]:
+    """
+    Return `{file name: {'size', 'mtime_ns', 'sha256', 'summary'}}` for `directory`.
+
+    The index is persisted as `INDEX_FILENAME` in the directory. Files whose
+    size and mtime are unchanged are served from it; otherwise the content
+    hash decides whether the file needs to be parsed again. Files that fail
+    to parse are reported and left out so the next run retries them.
+    """
+    index_path = os.path.join(directory, INDEX_FILENAME)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            old_index = json.load(f)
+    except (FileNotFoundError, ValueError):
+        old_index = {}
+
+    index = {}
+    to_parse = {}
+    for file_path in list_pv_files(directory, patterns):
+        name = os.path.basename(file_path)
+        stat = os.stat(file_path)
+        entry = old_index.get(name)
+        if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            index[name] = entry
+            continue
+
+        sha256 = file_sha256(file_path)
+        if entry is not None and entry['sha256'] == sha256:
+            index[name] = {**entry, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        else:
+            index[name] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256, 'summary': None}
+            to_parse[file_path] = name
+
+    for result in _summarize_files(list(to_parse), workers, chunksize):
+        name = to_parse[result['file']]
+        if result['error'] is not None:
+            print(f"Error parsing {result['file']}: {result['error']}")
+            del index[name]
+        else:
+            index[name]['summary'] = result['summary']
+
+    if index != old_index:
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+    return index
+
+
+if __name__ == '__main__':
+    # Only new or changed files are parsed; the rest come from the directory index
+    index = index_directory('data', workers=os.cpu_count())
 
     # Display summaries
-    for result in results:
-        print(f"File: {result['file']}")
-        summary = extract_summary(result['data'])
-        pprint(summary)
+    for name, entry in index.items():
+        print(f"File: {os.path.join('data', name)}")
+        summary = entry['summary']
         print(f"  Location: {summary.get('latitude', 'N/A')}°N, {summary.get('longitude', 'N/A')}°E")
         print(f"  Elevation: {summary.get('elevation', 'N/A')} m")
         print(f"  Technology: {summary.get('technology', 'N/A')}")
@@ -90,3 +309,7 @@ if __name__ == '__main__':
         print(f"  Avg Daily Production: {summary.get('avg_daily_energy_kWh', 'N/A'):,.2f} kWh/d")
         print(f"  Total System Loss: {summary.get('total_loss_pct', 'N/A')}%")
         print()
+
+    print(f"{'='*60}")
+    print(f"Indexed {len(index)} JSON file(s)")
+    print(f"{'='*60}")
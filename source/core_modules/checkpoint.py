@@ -0,0 +1,92 @@
+"""
+Append-only checkpoint journal for resumable batch runs.
+
+Every finished job appends one JSON line (key, outcome, optional error)
+and the file is fsync'd before returning, so an interrupted run can be
+resumed from exactly the last recorded job. The latest entry for a key
+wins, which lets failed jobs be retried and later marked as done. On
+replay only an unterminated final line is dropped; damaged lines in the
+middle are skipped and reported in `corrupt_lines`.
+"""
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+
+STATUS_OK = 'ok'
+STATUS_FAILED = 'failed'
+
+
+class CheckpointJournal:
+    """Durable record of completed and failed job keys."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._status = {}
+        self._errors = {}
+        # 1-based numbers of complete lines that could not be decoded on replay
+        self.corrupt_lines: List[int] = []
+        if os.path.exists(path):
+            self._replay()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _replay(self) -> None:
+        valid_bytes = 0
+        with open(self.path, 'rb') as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.endswith(b'\n'):
+                    # A crash mid-write can only leave a truncated final line
+                    break
+                valid_bytes += len(line)
+                try:
+                    entry = json.loads(line)
+                    key, status = entry['key'], entry['status']
+                except (ValueError, KeyError, TypeError):
+                    # Keep the entries after a damaged line; the line itself is skipped
+                    self.corrupt_lines.append(line_number)
+                    continue
+                self._status[key] = status
+                self._errors[key] = entry.get('error')
+
+        # Drop the partial tail so new entries start on a clean line
+        if valid_bytes < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_bytes)
+
+    def record(self, key: str, status: str, error: Optional[str] = None, **info: Any) -> None:
+        """Append an outcome for `key` and fsync it to disk."""
+        entry = {'key': key, 'status': status, 'error': error, 'time': time.time(), **info}
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._status[key] = status
+        self._errors[key] = error
+
+    def record_ok(self, key: str, **info: Any) -> None:
+        self.record(key, STATUS_OK, **info)
+
+    def record_failed(self, key: str, error: str, **info: Any) -> None:
+        self.record(key, STATUS_FAILED, error=error, **info)
+
+    def is_completed(self, key: str) -> bool:
+        return self._status.get(key) == STATUS_OK
+
+    @property
+    def completed(self) -> Set[str]:
+        """Keys whose latest outcome is success."""
+        return {key for key, status in self._status.items() if status == STATUS_OK}
+
+    @property
+    def failed(self) -> Dict[str, Optional[str]]:
+        """Keys whose latest outcome is failure, mapped to their last error."""
+        return {key: self._errors[key] for key, status in self._status.items() if status == STATUS_FAILED}
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
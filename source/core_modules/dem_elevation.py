@@ -0,0 +1,234 @@
+"""
+Offline elevation lookup from local DEM tiles.
+
+SRTM-style `.hgt` tiles (big-endian int16, 1201x1201 or 3601x3601
+samples per 1-degree cell, named like `N40W002.hgt`) are memory-mapped,
+so only the pages around queried points are read. North-up GeoTIFF tiles
+in a geographic CRS are supported when `rasterio` is installed; only the
+window around the queried points is read from them. Open tiles are kept
+in a small LRU cache; queries are grouped by 1-degree cell and bilinearly
+interpolated in one vectorised pass per tile, skipping void samples.
+"""
+import math
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+HGT_VOID = -32768
+_HGT_NAME = re.compile(r'^([NS])(\d{1,2})([EW])(\d{1,3})$', re.IGNORECASE)
+_TIFF_SUFFIXES = ('.tif', '.tiff')
+
+DEM_TILES_FOLDER = None  # e.g. "C:/dev/pyPVGIS/input/dem" with SRTM .hgt / GeoTIFF tiles for offline elevation
+
+
+class DEMTile:
+    """One raster of elevations on a regular lat/lon grid."""
+
+    def __init__(self, data: np.ndarray, first_lat: float, first_lon: float, lat_step: float,
+                 lon_step: float, nodata: Optional[float] = None):
+        # (first_lat, first_lon) is the centre of sample [0, 0]; rows run south, columns east
+        self.data = data
+        self.first_lat = first_lat
+        self.first_lon = first_lon
+        self.lat_step = lat_step
+        self.lon_step = lon_step
+        self.nodata = nodata
+
+    @classmethod
+    def from_hgt(cls, path: str) -> 'DEMTile':
+        match = _HGT_NAME.match(os.path.splitext(os.path.basename(path))[0])
+        if match is None:
+            raise ValueError(f"Not an SRTM tile name: {path}")
+        samples = int(round(math.sqrt(os.path.getsize(path) // 2)))
+        south = int(match.group(2)) * (1 if match.group(1).upper() == 'N' else -1)
+        west = int(match.group(4)) * (1 if match.group(3).upper() == 'E' else -1)
+        data = np.memmap(path, dtype='>i2', mode='r', shape=(samples, samples))
+        step = 1.0 / (samples - 1)
+        return cls(data, south + 1, west, step, step, nodata=HGT_VOID)
+
+    @classmethod
+    def from_geotiff(cls, path: str) -> 'DEMTile':
+        import rasterio  # optional, only needed for GeoTIFF tiles
+
+        with rasterio.open(path) as src:
+            _check_geographic(src, path)
+            transform = src.transform
+            data = _GeoTIFFBand(path, src.shape)
+            nodata = src.nodata
+        return cls(data, transform.f + transform.e / 2, transform.c + transform.a / 2,
+                   -transform.e, transform.a, nodata=nodata)
+
+    def interpolate(self, latitudes: np.ndarray, longitudes: np.ndarray, clamp: bool = False) -> np.ndarray:
+        """
+        Bilinear elevation at each point; NaN where all four neighbours are void.
+
+        Points more than half a pixel outside the raster are NaN unless `clamp`
+        is set, in which case they take the value at the nearest raster edge.
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        n_rows, n_cols = self.data.shape
+        rows = (self.first_lat - latitudes) / self.lat_step
+        cols = (longitudes - self.first_lon) / self.lon_step
+        result = np.full(rows.shape, np.nan)
+        if clamp:
+            inside = np.isfinite(rows) & np.isfinite(cols)
+        else:
+            inside = (rows >= -0.5) & (rows <= n_rows - 0.5) & (cols >= -0.5) & (cols <= n_cols - 0.5)
+        if not inside.any():
+            return result
+        rows, cols = rows[inside], cols[inside]
+        r0 = np.clip(np.floor(rows).astype(np.intp), 0, n_rows - 2)
+        c0 = np.clip(np.floor(cols).astype(np.intp), 0, n_cols - 2)
+        dr = np.clip(rows - r0, 0, 1)
+        dc = np.clip(cols - c0, 0, 1)
+
+        # Only the block spanning the points is read (a view for memory-mapped tiles)
+        row_lo, col_lo = r0.min(), c0.min()
+        block = np.asarray(self.data[row_lo:r0.max() + 2, col_lo:c0.max() + 2])
+        r0, c0 = r0 - row_lo, c0 - col_lo
+        corners = np.stack([block[r0, c0], block[r0, c0 + 1],
+                            block[r0 + 1, c0], block[r0 + 1, c0 + 1]]).astype(np.float64)
+        weights = np.stack([(1 - dr) * (1 - dc), (1 - dr) * dc, dr * (1 - dc), dr * dc])
+        valid = np.isfinite(corners)
+        if self.nodata is not None:
+            valid &= corners != self.nodata
+        weights = np.where(valid, weights, 0)
+        total = weights.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[inside] = np.where(total > 0, (weights * np.where(valid, corners, 0)).sum(axis=0) / total,
+                                      np.nan)
+        return result
+
+
+class _GeoTIFFBand:
+    """Band 1 of a GeoTIFF as a 2-D sliceable; each slice reads just that window from disk."""
+
+    def __init__(self, path: str, shape: Tuple[int, int]):
+        self.path = path
+        self.shape = shape
+
+    def __getitem__(self, key: Tuple[slice, slice]) -> np.ndarray:
+        import rasterio
+        from rasterio.windows import Window
+
+        rows, cols = key
+        with rasterio.open(self.path) as src:
+            return src.read(1, window=Window.from_slices(rows, cols, height=self.shape[0], width=self.shape[1]))
+
+
+def _check_geographic(src, path: str) -> None:
+    """Reject rasters whose grid is not an axis-aligned lat/lon grid."""
+    if src.crs is None or not src.crs.is_geographic:
+        raise ValueError(f"{path}: DEM tiles must be in a geographic (lat/lon) CRS, not {src.crs}")
+    if src.transform.b != 0 or src.transform.d != 0:
+        raise ValueError(f"{path}: rotated or sheared DEM rasters are not supported")
+
+
+class DEMElevation:
+    """Elevation lookups over a directory of DEM tiles, with an LRU cache of open tiles."""
+
+    def __init__(self, directory: str, max_open_tiles: int = 64):
+        self.directory = directory
+        self.max_open_tiles = max_open_tiles
+        self._tiles = OrderedDict()
+        self._paths = self._scan(directory)
+
+    @staticmethod
+    def _scan(directory: str) -> Dict[Tuple[int, int], List[str]]:
+        """Map each 1-degree cell `(floor(lat), floor(lon))` to every tile file covering it."""
+        paths = {}
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                stem, suffix = os.path.splitext(name)
+                path = os.path.join(root, name)
+                if suffix.lower() == '.hgt':
+                    match = _HGT_NAME.match(stem)
+                    if match:
+                        lat = int(match.group(2)) * (1 if match.group(1).upper() == 'N' else -1)
+                        lon = int(match.group(4)) * (1 if match.group(3).upper() == 'E' else -1)
+                        paths.setdefault((lat, lon), []).append(path)
+                elif suffix.lower() in _TIFF_SUFFIXES:
+                    import rasterio  # optional, only needed for GeoTIFF tiles
+
+                    with rasterio.open(path) as src:
+                        _check_geographic(src, path)
+                        t, (height, width) = src.transform, src.shape
+                    south, north = sorted((t.f, t.f + t.e * height))
+                    west, east = sorted((t.c, t.c + t.a * width))
+                    for lat in range(math.floor(south), math.ceil(north)):
+                        for lon in range(math.floor(west), math.ceil(east)):
+                            paths.setdefault((lat, lon), []).append(path)
+        return paths
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def _tile(self, path: str) -> DEMTile:
+        tile = self._tiles.get(path)
+        if tile is not None:
+            self._tiles.move_to_end(path)
+            return tile
+        if path.lower().endswith('.hgt'):
+            tile = DEMTile.from_hgt(path)
+        else:
+            tile = DEMTile.from_geotiff(path)
+        self._tiles[path] = tile
+        while len(self._tiles) > self.max_open_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def elevation(self, latitudes, longitudes) -> np.ndarray:
+        """Elevation in metres at each point (NaN where no tile covers it or the DEM is void)."""
+        latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        result = np.full(latitudes.shape, np.nan)
+
+        flat_lat, flat_lon, flat_result = latitudes.reshape(-1), longitudes.reshape(-1), result.reshape(-1)
+        positions = np.flatnonzero(np.isfinite(flat_lat) & np.isfinite(flat_lon))
+        if not len(positions):
+            return result
+        # One integer key per 1-degree cell; sorting by it gives each tile one contiguous block of points
+        cell_lat = np.floor(flat_lat[positions]).astype(np.int64)
+        cell_lon = np.floor(flat_lon[positions]).astype(np.int64)
+        keys = (cell_lat + 90) * 360 + (cell_lon + 180)
+        order = np.argsort(keys, kind='stable')
+        positions, keys = positions[order], keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        stops = np.r_[starts[1:], len(keys)]
+        for start, stop in zip(starts, stops):
+            lat, lon = divmod(int(keys[start]), 360)
+            lat, lon = lat - 90, lon - 180
+            points = positions[start:stop]
+            # Rasters that only partly cover the cell leave NaN for the next one to fill
+            for path in self._paths.get((lat, lon), ()):
+                missing = points[np.isnan(flat_result[points])]
+                if not len(missing):
+                    break
+                flat_result[missing] = self._tile(path).interpolate(flat_lat[missing], flat_lon[missing])
+            # A point on the cell's south or west edge is also on the north or east edge of the
+            # neighbouring tile, which holds that row or column
+            on_south = flat_lat[points] == lat
+            on_west = flat_lon[points] == lon
+            for neighbour, on_edge in (((lat - 1, lon), on_south), ((lat, lon - 1), on_west),
+                                       ((lat - 1, lon - 1), on_south & on_west)):
+                for path in self._paths.get(neighbour, ()):
+                    edge_points = points[on_edge & np.isnan(flat_result[points])]
+                    if len(edge_points):
+                        flat_result[edge_points] = self._tile(path).interpolate(
+                            flat_lat[edge_points], flat_lon[edge_points], clamp=True)
+        return result
+
+
+_dem = None
+
+
+def get_dem() -> Optional[DEMElevation]:
+    """Lazily opened DEM tile set shared by the geocoding scripts, or None when DEM_TILES_FOLDER is not set."""
+    global _dem
+    if _dem is None and DEM_TILES_FOLDER:
+        _dem = DEMElevation(DEM_TILES_FOLDER)
+    return _dem
@@ -0,0 +1,79 @@
+"""
+Loader for monthly building demand CSVs.
+
+The demand files come out of a spreadsheet export: a UTF-8 BOM, quoted
+values with thousands separators and padding (`" 100,491 "`), `" - "`
+for zero, and padded header names (`" demandaREF (Wh)"`). Each file is
+parsed in one pass into a `(3, 12)` float array of DHW, heating and
+cooling demand, and directories of files are bulk-loaded into one
+`(n_files, 3, 12)` array.
+"""
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+DEMAND_COLUMNS = ('demandaACS (Wh)', 'demandaCAL (Wh)', 'demandaREF (Wh)')
+MONTHS = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+ZERO_TOKENS = ('', '-')
+
+
+def parse_demand_text(text: str, columns=DEMAND_COLUMNS, thousands: str = ',', scale: float = 1e-3) -> np.ndarray:
+    """
+    Parse the contents of one demand CSV into a `(len(columns), 12)` array.
+
+    Values are multiplied by `scale` (Wh to kWh by default). Rows are put in
+    calendar order when the first column holds month names or numbers.
+    """
+    rows = list(csv.reader(io.StringIO(text.lstrip('\ufeff'))))
+    header = [name.strip() for name in rows[0]]
+    body = [row for row in rows[1:] if any(cell.strip() for cell in row)]
+    if len(body) != 12:
+        raise ValueError(f"Expected 12 monthly rows, found {len(body)}")
+    missing = [name for name in columns if name not in header]
+    if missing:
+        raise ValueError(f"Missing demand columns: {', '.join(missing)}")
+    positions = [header.index(name) for name in columns]
+
+    labels = [row[0].strip().lower()[:3] for row in body]
+    if sorted(labels) == sorted(MONTHS):
+        body = [body[labels.index(month)] for month in MONTHS]
+    elif all(label.isdigit() for label in labels) and sorted(map(int, labels)) == list(range(1, 13)):
+        body = sorted(body, key=lambda row: int(row[0].strip()))
+
+    strip = str.maketrans('', '', f"{thousands} \u00a0")
+    cells = [row[i].translate(strip) for i in positions for row in body]
+    cells = ['0' if cell in ZERO_TOKENS else cell for cell in cells]
+    return np.array(cells, dtype=np.float64).reshape(len(columns), 12) * scale
+
+
+def load_demand_file(path: str, **kwargs) -> np.ndarray:
+    """`(3, 12)` DHW, heating and cooling demand (kWh) from one demand CSV."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        return parse_demand_text(f.read(), **kwargs)
+
+
+def load_demand_directory(directory: str, pattern: str = '*.csv', workers: Optional[int] = None,
+                          chunksize: int = 64) -> Tuple[List[str], np.ndarray]:
+    """
+    Load every demand file in `directory` whose name matches `pattern` (case-insensitive).
+
+    Returns the building ids (file names without extension, sorted) and a
+    `(n_files, 3, 12)` array. With `workers` > 1 files are parsed in a
+    process pool.
+    """
+    names = sorted(name for name in os.listdir(directory)
+                   if fnmatch(name.lower(), pattern.lower()) and not name.startswith('.'))
+    paths = [os.path.join(directory, name) for name in names]
+    if not workers or workers <= 1:
+        profiles = [load_demand_file(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            profiles = list(executor.map(load_demand_file, paths, chunksize=chunksize))
+
+    demand = np.stack(profiles) if profiles else np.empty((0, len(DEMAND_COLUMNS), 12))
+    return [os.path.splitext(name)[0] for name in names], demand
@@ -0,0 +1,115 @@
+"""
+Building blocks for streaming, resumable row enrichment.
+
+`ordered_map` runs a lookup over a stream of rows in a thread pool,
+keeping a bounded number in flight and yielding results in input order,
+so a writer can stream them straight back out, and `resume_partial_csv`
+lets a run pick up a partially written output file after a crash, as long
+as the input it was built from is unchanged. API quotas are enforced by the shared HTTP transport's per-host rate limits.
+"""
+import csv
+import hashlib
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def ordered_map(func: Callable[[T], R], items: Iterable[T], workers: int = 8,
+                max_pending: Optional[int] = None) -> Iterator[R]:
+    """
+    Lazily apply `func` to `items` in a thread pool, yielding results in input order.
+
+    At most `max_pending` (default `4 * workers`) items are in flight, so
+    arbitrarily long inputs are streamed without being read ahead.
+    """
+    max_pending = max_pending or 4 * workers
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(func, item) for item in itertools.islice(items, max_pending))
+        while pending:
+            result = pending.popleft().result()
+            for item in itertools.islice(items, 1):
+                pending.append(executor.submit(func, item))
+            yield result
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Consecutive lists of up to `size` items."""
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def input_fingerprint(path: str, chunk_bytes: int = 1 << 20) -> Dict[str, Any]:
+    """Size and SHA-256 of a file, identifying its content independently of its mtime."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_bytes), b''):
+            digest.update(block)
+    return {'size': os.path.getsize(path), 'sha256': digest.hexdigest()}
+
+
+def _fingerprint_path(path: str) -> str:
+    return path + '.source'
+
+
+def resume_partial_csv(path: str, source: Optional[str] = None) -> int:
+    """
+    Prepare a partially written CSV (with header) for appending; return its number of data rows.
+
+    A crash can leave a truncated last line, which is cut off first.
+    Returns 0 when the file does not exist or holds no complete header.
+
+    With `source`, the rows are only trusted if they were enriched from
+    the same content of that input file: a fingerprint of `source` is kept
+    next to `path` (`<path>.source`), and a mismatch (or a missing
+    fingerprint) raises ValueError instead of silently skipping rows of a
+    different input. When there is nothing to resume, the fingerprint of
+    `source` is recorded for the run that is about to start.
+    """
+    rows = 0
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            content = f.read()
+        complete = content[:content.rfind(b'\n') + 1]
+        if len(complete) < len(content):
+            with open(path, 'r+b') as f:
+                f.truncate(len(complete))
+        if complete:
+            with open(path, 'r', newline='', encoding='utf-8') as f:
+                rows = sum(1 for _ in csv.DictReader(f))
+    if source is None:
+        return rows
+
+    fingerprint = input_fingerprint(source)
+    if rows:
+        try:
+            with open(_fingerprint_path(path), 'r', encoding='utf-8') as f:
+                recorded = json.load(f)
+        except (OSError, ValueError):
+            recorded = None
+        if recorded != fingerprint:
+            raise ValueError(f"{path} was not written from the current {source}; "
+                             f"delete it to start over")
+        return rows
+    tmp_path = _fingerprint_path(path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprint, f)
+    os.replace(tmp_path, _fingerprint_path(path))
+    return 0
+
+
+def finish_partial_csv(path: str, destination: str) -> None:
+    """Move a completed CSV over `destination` and drop the fingerprint kept by `resume_partial_csv`."""
+    os.replace(path, destination)
+    if os.path.exists(_fingerprint_path(path)):
+        os.remove(_fingerprint_path(path))
@@ -0,0 +1,227 @@
+"""
+Persistent geocoding cache with an optional offline gazetteer.
+
+Geocoded places are stored in SQLite keyed by normalized city and country
+names (case, accents and spacing folded), so repeated enrichment runs
+only go to the network for names they have never seen. A GeoNames dump
+(`cities1000.txt`, `allCountries.txt`, ...) and its `countryInfo.txt`
+can be bulk-loaded as a gazetteer that answers lookups offline; the most
+populous matching place wins. Countries are matched by ISO code, or by
+name once `countryInfo.txt` is loaded; a country that cannot be resolved
+is ignored rather than failing the lookup.
+"""
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Optional
+
+# Column positions in the GeoNames main dump (tab-separated, no header)
+_GEONAMES_NAME, _GEONAMES_ASCIINAME, _GEONAMES_ALTERNATES = 1, 2, 3
+_GEONAMES_LATITUDE, _GEONAMES_LONGITUDE, _GEONAMES_FEATURE_CLASS = 4, 5, 6
+_GEONAMES_COUNTRY, _GEONAMES_POPULATION, _GEONAMES_ELEVATION, _GEONAMES_DEM = 8, 14, 15, 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS places (
+    city_key TEXT NOT NULL,
+    country_key TEXT NOT NULL,
+    city TEXT,
+    country TEXT,
+    display_name TEXT,
+    latitude REAL,
+    longitude REAL,
+    elevation REAL,
+    source TEXT,
+    fetched_at REAL,
+    PRIMARY KEY (city_key, country_key)
+);
+CREATE TABLE IF NOT EXISTS gazetteer (
+    name_key TEXT NOT NULL,
+    country_code TEXT,
+    name TEXT,
+    latitude REAL,
+    longitude REAL,
+    elevation REAL,
+    population INTEGER
+);
+CREATE INDEX IF NOT EXISTS gazetteer_name ON gazetteer (name_key, country_code);
+CREATE TABLE IF NOT EXISTS countries (
+    country_key TEXT PRIMARY KEY,
+    country_code TEXT,
+    country TEXT
+);
+CREATE TABLE IF NOT EXISTS loaded_files (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL
+);
+"""
+
+
+def normalize_place(name: Optional[str]) -> str:
+    """Lower-case, accent-free, single-spaced form of a place name used as cache key."""
+    if not name:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(name))
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return re.sub(r'\s+', ' ', stripped.casefold()).strip()
+
+
+def _float_or_none(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class GeocodeCache:
+    """SQLite cache of geocoded places, safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> 'GeocodeCache':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get(self, city: str, country: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Cached place for `city` (and `country`, if given), falling back to the gazetteer."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT city, country, display_name, latitude, longitude, elevation, source FROM places "
+                "WHERE city_key = ? AND country_key = ?",
+                (normalize_place(city), normalize_place(country)),
+            ).fetchone()
+            record = dict(row) if row else self._gazetteer_lookup(city, country)
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+    def put(self, city: str, country: Optional[str], record: Dict[str, Any], source: str) -> None:
+        """Store a geocoded place (`city`, `country`, `latitude`, `longitude`, `elevation`, `display_name`)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO places VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_place(city), normalize_place(country), record.get('city'), record.get('country'),
+                 record.get('display_name'), record.get('latitude'), record.get('longitude'),
+                 record.get('elevation'), source, time.time()),
+            )
+
+    def _gazetteer_lookup(self, city: str, country: Optional[str]) -> Optional[Dict[str, Any]]:
+        query = ("SELECT g.name AS city, COALESCE(c.country, g.country_code) AS country, g.latitude, g.longitude, "
+                 "g.elevation FROM gazetteer g LEFT JOIN countries c ON c.country_code = g.country_code "
+                 "WHERE g.name_key = ?")
+        params = [normalize_place(city)]
+        country_code = self._country_code(country) if country else None
+        if country_code is not None:
+            query += " AND g.country_code = ?"
+            params.append(country_code)
+        row = self._conn.execute(query + " ORDER BY g.population DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        return {**dict(row), 'display_name': None, 'source': 'gazetteer'}
+
+    def _country_code(self, country: str) -> Optional[str]:
+        """
+        ISO code for a country name known from countryInfo.txt, or for a two-letter code.
+
+        None when the country cannot be resolved (e.g. a name without
+        countryInfo.txt loaded); the lookup then matches on the place name
+        alone and the most populous place of that name wins.
+        """
+        row = self._conn.execute("SELECT country_code FROM countries WHERE country_key = ?",
+                                 (normalize_place(country),)).fetchone()
+        if row is not None:
+            return row['country_code']
+        code = country.strip().upper()
+        return code if len(code) == 2 and code.isalpha() else None
+
+    def _already_loaded(self, path: str) -> bool:
+        stat = os.stat(path)
+        row = self._conn.execute("SELECT size, mtime FROM loaded_files WHERE path = ?",
+                                 (os.path.abspath(path),)).fetchone()
+        return row is not None and row['size'] == stat.st_size and row['mtime'] == stat.st_mtime
+
+    def _mark_loaded(self, path: str) -> None:
+        stat = os.stat(path)
+        self._conn.execute("INSERT OR REPLACE INTO loaded_files VALUES (?, ?, ?)",
+                           (os.path.abspath(path), stat.st_size, stat.st_mtime))
+
+    def load_geonames(self, path: str, min_population: int = 0, include_alternate_names: bool = False,
+                      batch_rows: int = 50_000) -> int:
+        """
+        Bulk-load populated places (feature class P) from a GeoNames dump.
+
+        Each place is indexed under its name and ASCII name, plus its
+        alternate names when `include_alternate_names` is set. A file that
+        was already loaded (same size and mtime) is skipped. Returns the
+        number of gazetteer rows inserted.
+        """
+        with self._lock:
+            if self._already_loaded(path):
+                return 0
+            inserted = 0
+            batch = []
+            with self._conn, open(path, 'r', encoding='utf-8', newline='') as f:
+                for fields in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+                    if len(fields) <= _GEONAMES_DEM or fields[_GEONAMES_FEATURE_CLASS] != 'P':
+                        continue
+                    population = int(fields[_GEONAMES_POPULATION] or 0)
+                    if population < min_population:
+                        continue
+                    elevation = _float_or_none(fields[_GEONAMES_ELEVATION])
+                    if elevation is None:
+                        dem = _float_or_none(fields[_GEONAMES_DEM])
+                        elevation = dem if dem is not None and dem > -9999 else None
+
+                    names = {fields[_GEONAMES_NAME], fields[_GEONAMES_ASCIINAME]}
+                    if include_alternate_names and fields[_GEONAMES_ALTERNATES]:
+                        names.update(fields[_GEONAMES_ALTERNATES].split(','))
+                    for key in {normalize_place(name) for name in names} - {''}:
+                        batch.append((key, fields[_GEONAMES_COUNTRY], fields[_GEONAMES_NAME],
+                                      float(fields[_GEONAMES_LATITUDE]), float(fields[_GEONAMES_LONGITUDE]),
+                                      elevation, population))
+                    if len(batch) >= batch_rows:
+                        self._conn.executemany("INSERT INTO gazetteer VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                        inserted += len(batch)
+                        batch.clear()
+                self._conn.executemany("INSERT INTO gazetteer VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                inserted += len(batch)
+                self._mark_loaded(path)
+        return inserted
+
+    def load_geonames_countries(self, path: str) -> int:
+        """Load GeoNames `countryInfo.txt` so lookups can match country names as well as ISO codes."""
+        with self._lock:
+            if self._already_loaded(path):
+                return 0
+            rows = []
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                for line in f:
+                    if line.startswith('#') or not line.strip():
+                        continue
+                    fields = line.rstrip('\n').split('\t')
+                    # Columns: ISO, ISO3, ISO-Numeric, fips, Country, ...
+                    rows.append((normalize_place(fields[4]), fields[0], fields[4]))
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO countries VALUES (?, ?, ?)", rows)
+                self._mark_loaded(path)
+        return len(rows)
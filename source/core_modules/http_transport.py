@@ -0,0 +1,185 @@
+"""
+Shared HTTP transport for external lookups (PVGIS, Open-Meteo, Open-Elevation).
+
+One pooled `requests.Session` is kept per host so connections are reused
+across calls (keep-alive instead of a new TCP+TLS handshake per request).
+Retryable failures — 429, 5xx, PVGIS's 529 overload code and connection
+errors — are retried with exponential backoff and full jitter, and
+per-host latency/error metrics are collected for every call. A host can
+be given a rate limit, which every attempt (retries included) waits on.
+"""
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504, 529})
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter allowing `rate_per_second` calls to `acquire` per second.
+
+    Up to `burst` calls may go through back to back after an idle period.
+    """
+
+    def __init__(self, rate_per_second: float, burst: float = 1.0):
+        self.interval = 1.0 / rate_per_second if rate_per_second else 0.0
+        self.burst = max(float(burst), 1.0)
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            earliest = now - (self.burst - 1) * self.interval
+            wait = self._next_time - now
+            self._next_time = max(earliest, self._next_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class HostMetrics:
+    """Request, retry, error and latency counters for a single host."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.status_counts = {}
+
+    def record(self, latency: float, status: Optional[int]) -> None:
+        self.requests += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        if status is None or status >= 400:
+            self.errors += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'errors': self.errors,
+            'mean_latency_s': self.total_latency / self.requests if self.requests else 0.0,
+            'max_latency_s': self.max_latency,
+            'status_counts': dict(self.status_counts),
+        }
+
+
+class HTTPTransport:
+    """Per-host pooled sessions with retry/backoff and latency/error metrics."""
+
+    def __init__(self, max_retries: int = 5, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 pool_maxsize: int = 16, timeout: float = 60.0, user_agent: Optional[str] = None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self._sessions = {}
+        self._metrics = {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def set_rate_limit(self, url: str, rate_per_second: Optional[float], burst: float = 1.0) -> None:
+        """Limit every request (retries included) to the host of `url`; None removes the limit."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            if rate_per_second:
+                self._limiters[host] = RateLimiter(rate_per_second, burst)
+            else:
+                self._limiters.pop(host, None)
+
+    def session_for(self, url: str) -> requests.Session:
+        """Return the pooled session for the host of `url`, creating it on first use."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                if self.user_agent:
+                    session.headers['User-Agent'] = self.user_agent
+                self._sessions[host] = session
+                # Metrics outlive sessions, so they keep counting across close()
+                self._metrics.setdefault(host, HostMetrics())
+            return session
+
+    def _backoff_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        # Honour an explicit Retry-After (seconds) before falling back to jittered backoff
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after is not None:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        GET `url`, retrying retryable statuses and connection errors.
+
+        Returns the final response (which may still carry a retryable status
+        once retries are exhausted); re-raises the last connection error if
+        every attempt failed without a response.
+        """
+        session = self.session_for(url)
+        host = urlsplit(url).netloc
+        metrics = self._metrics[host]
+        timeout = self.timeout if timeout is None else timeout
+
+        for attempt in range(self.max_retries + 1):
+            response = None
+            limiter = self._limiters.get(host)
+            if limiter is not None:
+                limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = session.get(url, params=params, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                with self._lock:
+                    metrics.record(time.perf_counter() - start, None)
+                if attempt == self.max_retries:
+                    raise
+            else:
+                with self._lock:
+                    metrics.record(time.perf_counter() - start, response.status_code)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                    return response
+
+            with self._lock:
+                metrics.retries += 1
+            time.sleep(self._backoff_delay(attempt, response))
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot of per-host metrics."""
+        with self._lock:
+            return {host: m.as_dict() for host, m in self._metrics.items()}
+
+    def close(self) -> None:
+        """Close the pooled sessions; metrics and rate limits are kept."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# Process-wide transport shared by the lookup scripts
+default_transport = HTTPTransport()
+
+
+def http_get(url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> requests.Response:
+    """GET through the shared default transport."""
+    return default_transport.get(url, params=params, **kwargs)
@@ -0,0 +1,96 @@
+"""
+Memory-mapped `(n_sites, 12, n_vars)` array of monthly PVGIS yields.
+
+The array is saved as a float32 `.npy` file opened with `mmap_mode`, next
+to a JSON side index of site keys and metadata, so a whole portfolio is
+opened without parsing and sliced without copying.
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .results_store import MONTHLY_VARIABLES, ResultsStore
+
+INDEX_COLUMNS = ('site_key', 'city', 'country', 'latitude', 'longitude', 'elevation', 'peak_power_kW')
+
+
+def _index_path(path: str) -> str:
+    return f"{os.path.splitext(path)[0]}.index.json"
+
+
+def build_portfolio_array(source, path: str, variables: Sequence[str] = MONTHLY_VARIABLES) -> 'PortfolioArray':
+    """
+    Write the portfolio array for a `ResultsStore` or results DataFrame to `path` (.npy).
+
+    Sites missing any of the requested monthly variables are skipped.
+    """
+    if isinstance(source, ResultsStore):
+        df = source.read([*INDEX_COLUMNS, *variables])
+    else:
+        df = source
+    df = df.dropna(subset=list(variables)).reset_index(drop=True)
+
+    tmp_path = f"{path}.tmp.npy"
+    array = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32,
+                                      shape=(len(df), 12, len(variables)))
+    for j, name in enumerate(variables):
+        if len(df):
+            array[:, :, j] = np.stack(df[name].to_numpy())
+    array.flush()
+    del array
+
+    index = {
+        'variables': list(variables),
+        'sites': {col: df[col].tolist() for col in INDEX_COLUMNS if col in df.columns},
+    }
+    tmp_index = f"{_index_path(path)}.tmp"
+    with open(tmp_index, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+
+    os.replace(tmp_path, path)
+    os.replace(tmp_index, _index_path(path))
+    return PortfolioArray(path)
+
+
+class PortfolioArray:
+    """Read-only, memory-mapped view of a portfolio array and its site index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = np.load(path, mmap_mode='r')
+        with open(_index_path(path), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        self.variables = index['variables']
+        self.sites = index['sites']
+        self.site_keys = self.sites['site_key']
+        self._row_of = {key: i for i, key in enumerate(self.site_keys)}
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def row(self, site_key: str) -> int:
+        return self._row_of[site_key]
+
+    def variable(self, name: str) -> np.ndarray:
+        """`(n_sites, 12)` view of one monthly variable."""
+        return self.data[:, :, self.variables.index(name)]
+
+    def site(self, site_key: str, name: Optional[str] = None) -> np.ndarray:
+        """`(12, n_vars)` view for one site, or `(12,)` for a single variable."""
+        values = self.data[self._row_of[site_key]]
+        return values if name is None else values[:, self.variables.index(name)]
+
+    def index_frame(self) -> pd.DataFrame:
+        """Site metadata as a DataFrame, rows aligned with the array."""
+        return pd.DataFrame(self.sites)
+
+    def select(self, site_keys: List[str]) -> np.ndarray:
+        """Array rows for the given site keys (fancy indexing, so this copies)."""
+        return self.data[[self._row_of[key] for key in site_keys]]
+
+    def metadata(self, site_key: str) -> Dict[str, Any]:
+        i = self._row_of[site_key]
+        return {col: values[i] for col, values in self.sites.items()}
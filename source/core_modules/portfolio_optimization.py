@@ -0,0 +1,138 @@
+"""
+Portfolio-scale PV size optimization over (building, site) pairs.
+
+Every building's monthly demand profile is paired with a site's monthly
+yield per kWp, and each pair is solved with the exact breakpoint solver
+(`find_optimal_pv_size`). Pairs are processed in batches, one broadcast
+solve per batch, with a bounded window of batches in flight on a process
+pool and results streamed to a Parquet file in order.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .portfolio_array import PortfolioArray
+from .pv_boiler_model import find_optimal_pv_size
+from .results_store import ResultsStore
+
+RESULT_SCHEMA = pa.schema([
+    ('building_id', pa.string()),
+    ('site_key', pa.string()),
+    ('optimal_kwp', pa.float64()),
+    ('total_annual_cost', pa.float64()),
+    ('annual_savings', pa.float64()),
+    ('cost_no_pv', pa.float64()),
+])
+
+# Arrays shared with pool workers once, instead of pickled with every batch
+_shared: Dict[str, Any] = {}
+
+
+def site_yields_per_kwp(source) -> Tuple[List[str], np.ndarray]:
+    """Site keys and `(n_sites, 12)` monthly `E_m` per kWp from a `ResultsStore` or `PortfolioArray`."""
+    if isinstance(source, PortfolioArray):
+        peak_power = np.asarray(source.sites['peak_power_kW'], dtype=np.float64)
+        return list(source.site_keys), source.variable('E_m') / peak_power[:, None]
+    if isinstance(source, ResultsStore):
+        df = source.read(['site_key', 'peak_power_kW', 'E_m']).dropna(subset=['peak_power_kW', 'E_m'])
+        yields = np.stack(df['E_m'].to_numpy()) if len(df) else np.empty((0, 12))
+        return df['site_key'].tolist(), yields / df['peak_power_kW'].to_numpy()[:, None]
+    raise TypeError(f"Unsupported yield source: {type(source).__name__}")
+
+
+def cross_pairs(n_buildings: int, n_sites: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Building and site row indices for every building paired with every site."""
+    buildings, sites = np.divmod(np.arange(n_buildings * n_sites), n_sites)
+    return buildings, sites
+
+
+def _init_worker(demand: np.ndarray, yields: np.ndarray, model_params: Dict[str, Any]) -> None:
+    _shared.update(demand=demand, yields=yields, model_params=model_params)
+
+
+def _solve_batch(rows: Tuple[np.ndarray, np.ndarray]) -> Dict[str, np.ndarray]:
+    buildings, sites = rows
+    demand = _shared['demand'][buildings]
+    return find_optimal_pv_size(_shared['yields'][sites], demand[:, 0], demand[:, 1], demand[:, 2],
+                                **_shared['model_params'])
+
+
+def iter_portfolio_results(demand: np.ndarray, yields: np.ndarray, building_rows, site_rows,
+                           batch_size: int = 20_000, workers: Optional[int] = None,
+                           max_pending: Optional[int] = None,
+                           **model_params) -> Iterator[Tuple[slice, Dict[str, np.ndarray]]]:
+    """
+    Solve every `(building_rows[i], site_rows[i])` pair, yielding `(pair_slice, result)` per batch in order.
+
+    `demand` is `(n_buildings, 3, 12)` (DHW, heating, cooling kWh) and
+    `yields` `(n_sites, 12)` kWh per kWp. `model_params` are passed on to
+    `find_optimal_pv_size`. With a pool, at most `max_pending` (default
+    `2 * workers`) batches are in flight at once, so memory stays flat
+    however many pairs there are.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    yields = np.asarray(yields, dtype=np.float64)
+    building_rows = np.asarray(building_rows)
+    site_rows = np.asarray(site_rows)
+    slices = (slice(start, start + batch_size) for start in range(0, len(building_rows), batch_size))
+
+    if not workers or workers <= 1:
+        _init_worker(demand, yields, model_params)
+        for rows in slices:
+            yield rows, _solve_batch((building_rows[rows], site_rows[rows]))
+        return
+
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(demand, yields, model_params)) as executor:
+        pending = deque()
+        for rows in slices:
+            pending.append((rows, executor.submit(_solve_batch, (building_rows[rows], site_rows[rows]))))
+            if len(pending) >= max_pending:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+
+
+def run_portfolio_optimization(building_ids: Sequence[str], demand: np.ndarray,
+                               site_keys: Sequence[str], yields: np.ndarray, output_path: str,
+                               pairs: Optional[pd.DataFrame] = None, batch_size: int = 20_000,
+                               workers: Optional[int] = None, **model_params) -> int:
+    """
+    Optimize the PV size of every building/site pair and stream the results to a Parquet file.
+
+    `pairs` is a DataFrame with `building_id` and `site_key` columns; without
+    it every building is paired with every site. Pairs naming an unknown
+    building or site raise `KeyError`. Returns the number of pairs written.
+    """
+    if pairs is None:
+        building_rows, site_rows = cross_pairs(len(building_ids), len(site_keys))
+    else:
+        building_row = {key: i for i, key in enumerate(building_ids)}
+        site_row = {key: i for i, key in enumerate(site_keys)}
+        building_rows = np.array([building_row[key] for key in pairs['building_id']], dtype=np.intp)
+        site_rows = np.array([site_row[key] for key in pairs['site_key']], dtype=np.intp)
+    building_ids = np.asarray(building_ids, dtype=object)
+    site_keys = np.asarray(site_keys, dtype=object)
+
+    head, tail = os.path.split(output_path)
+    tmp_path = os.path.join(head, f".{tail}.tmp")
+    with pq.ParquetWriter(tmp_path, RESULT_SCHEMA) as writer:
+        for rows, result in iter_portfolio_results(demand, yields, building_rows, site_rows,
+                                                   batch_size=batch_size, workers=workers, **model_params):
+            columns = {
+                'building_id': building_ids[building_rows[rows]],
+                'site_key': site_keys[site_rows[rows]],
+                **{name: result[name] for name in RESULT_SCHEMA.names[2:]},
+            }
+            writer.write_table(pa.table(columns, schema=RESULT_SCHEMA))
+    os.replace(tmp_path, output_path)
+    return len(building_rows)
@@ -0,0 +1,177 @@
+"""
+Hourly (8760) PV / heat-pump / biomass energy balance.
+
+The dispatch rules are the monthly model's (`pv_boiler_model`) applied
+hour by hour: PV covers cooling first, then heating through the heat
+pump, and only the surplus left in each hour is exported. Because the
+balance is element-wise over the time axis, the monthly functions work
+unchanged on `(8760,)` profiles; this module adds the hourly inputs
+(PVGIS `seriescalc` and TMY responses, monthly demand spread over hours),
+monthly roll-ups, and an exact optimum finder that scales to 8760
+breakpoints per hour profile.
+"""
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .pv_boiler_model import scenario_axes
+
+HOURS_PER_YEAR = 8760
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+# First hour of each month in a non-leap year
+MONTH_START_HOUR = np.concatenate([[0], np.cumsum(DAYS_IN_MONTH * 24)[:-1]])
+
+
+def _hour_of_year_mean(times: pd.Series, values) -> np.ndarray:
+    """Average values sharing a calendar hour (PVGIS `YYYYMMDD:HHMM` stamps) into one 8760 year."""
+    times = times.astype(str)
+    frame = pd.DataFrame({
+        'month': times.str[4:6].astype(int),
+        'day': times.str[6:8].astype(int),
+        'hour': times.str[9:11].astype(int),
+        'value': np.asarray(values, dtype=np.float64),
+    })
+    frame = frame[~((frame['month'] == 2) & (frame['day'] == 29))]
+    hourly = frame.groupby(['month', 'day', 'hour'], sort=True)['value'].mean()
+    if len(hourly) != HOURS_PER_YEAR:
+        raise ValueError(f"Expected {HOURS_PER_YEAR} calendar hours, found {len(hourly)}")
+    return hourly.to_numpy()
+
+
+def hourly_yield_from_seriescalc(data: Dict[str, Any]) -> np.ndarray:
+    """
+    Typical-year hourly PV output in kWh per kWp from a `seriescalc` response.
+
+    The request must have `pvcalculation=1` so each hour carries `P` (W for
+    the requested `peakpower`). Multi-year series are averaged per calendar
+    hour; 29 February is dropped.
+    """
+    hourly = pd.DataFrame(data['outputs']['hourly'])
+    if 'P' not in hourly.columns:
+        raise ValueError("seriescalc response has no 'P' column; request it with pvcalculation=1")
+    peak_power = float(data['inputs']['pv_module']['peak_power'])
+    return _hour_of_year_mean(hourly['time'], hourly['P'] / 1000 / peak_power)
+
+
+def hourly_yield_from_tmy(data: Dict[str, Any], performance_ratio: float = 0.8) -> np.ndarray:
+    """
+    Rough hourly PV output in kWh per kWp from a TMY response.
+
+    TMY only carries horizontal irradiance, so this is `G(h)` times a
+    flat performance ratio; prefer `seriescalc` output for tilted arrays.
+    """
+    tmy = pd.DataFrame(data['outputs']['tmy_hourly'])
+    return _hour_of_year_mean(tmy['time(UTC)'], tmy['G(h)'] / 1000 * performance_ratio)
+
+
+def distribute_monthly(monthly, daily_profile: Optional[Sequence[float]] = None) -> np.ndarray:
+    """
+    Spread `(..., 12)` monthly totals over `(..., 8760)` hours, keeping each month's total.
+
+    `daily_profile` gives 24 relative hourly weights (flat by default),
+    repeated on every day of the month.
+    """
+    monthly = np.asarray(monthly, dtype=np.float64)
+    profile = np.ones(24) if daily_profile is None else np.asarray(daily_profile, dtype=np.float64)
+    profile = profile / profile.sum()
+    per_day = monthly / DAYS_IN_MONTH
+    daily = np.repeat(per_day, DAYS_IN_MONTH, axis=-1)
+    return (daily[..., :, None] * profile).reshape(monthly.shape[:-1] + (HOURS_PER_YEAR,))
+
+
+def monthly_totals(hourly) -> np.ndarray:
+    """Sum `(..., 8760)` hourly values into `(..., 12)` monthly totals."""
+    return np.add.reduceat(np.asarray(hourly, dtype=np.float64), MONTH_START_HOUR, axis=-1)
+
+
+def find_optimal_pv_size_hourly(pv_per_kwp, demand_acs, demand_cal, demand_cool, *,
+                                cost_per_kwp_installed, capital_recovery_factor, biomass_cost_per_kwh,
+                                grid_import_price_kwh, grid_export_price_kwh, heat_pump_cop, cooling_eer,
+                                min_kwp: float = 0.0, max_kwp: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """
+    Exact cost-minimising PV size for hourly (or any long) profiles.
+
+    Same result as `pv_boiler_model.find_optimal_pv_size`, but instead of
+    evaluating the cost at every breakpoint (quadratic in the number of
+    periods) the breakpoints are sorted once and the piecewise-linear cost
+    is accumulated from the slope changes, which is `O(n log n)`.
+    """
+    pv_per_kwp = np.asarray(pv_per_kwp, dtype=np.float64)
+    heating_demand = np.asarray(demand_acs, dtype=np.float64) + np.asarray(demand_cal, dtype=np.float64)
+    heating_elec = heating_demand / scenario_axes(heat_pump_cop, 1)
+    cooling_elec = np.asarray(demand_cool, dtype=np.float64) / scenario_axes(cooling_eer, 1)
+
+    annuity_per_kwp = np.multiply(cost_per_kwp_installed, capital_recovery_factor)
+    import_price = scenario_axes(grid_import_price_kwh, 1)
+    heat_price = scenario_axes(biomass_cost_per_kwh, 1) * scenario_axes(heat_pump_cop, 1)
+    export_price = scenario_axes(grid_export_price_kwh, 1)
+    # Every per-period array gets the full (..., n_periods) shape so breakpoints can be sorted per household
+    shape = np.broadcast_shapes(pv_per_kwp.shape, heating_elec.shape, cooling_elec.shape,
+                                np.shape(import_price), np.shape(heat_price), np.shape(export_price),
+                                np.shape(scenario_axes(annuity_per_kwp, 1)))
+    pv_per_kwp, heating_elec, cooling_elec = (np.broadcast_to(a, shape)
+                                              for a in (pv_per_kwp, heating_elec, cooling_elec))
+    upper = np.inf if max_kwp is None else float(max_kwp)
+
+    def period_costs(size):
+        generation = size * pv_per_kwp
+        surplus_after_cooling = np.maximum(0, generation - cooling_elec)
+        return (import_price * np.maximum(0, cooling_elec - generation)
+                + heat_price * np.maximum(0, heating_elec - surplus_after_cooling)
+                - export_price * np.maximum(0, surplus_after_cooling - heating_elec))
+
+    # Breakpoints where a period moves from importing to heating, and from heating to exporting
+    producing = pv_per_kwp > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        first_break = np.where(producing, cooling_elec / pv_per_kwp, min_kwp)
+        second_break = np.where(producing, (cooling_elec + heating_elec) / pv_per_kwp, min_kwp)
+    first_delta = (import_price - heat_price) * pv_per_kwp
+    second_delta = (heat_price - export_price) * pv_per_kwp
+
+    # Slope just above min_kwp, from the regime each period is in there
+    slope = annuity_per_kwp - np.where(
+        min_kwp < first_break, import_price * pv_per_kwp,
+        np.where(min_kwp < second_break, heat_price * pv_per_kwp, export_price * pv_per_kwp),
+    ).sum(axis=-1)
+
+    breaks = np.concatenate([first_break, second_break], axis=-1)
+    deltas = np.concatenate([first_delta, second_delta], axis=-1)
+    deltas = np.where(breaks > min_kwp, deltas, 0)
+    order = np.argsort(breaks, axis=-1)
+    breaks = np.clip(np.take_along_axis(breaks, order, axis=-1), min_kwp, upper)
+    deltas = np.take_along_axis(deltas, order, axis=-1)
+
+    # Cost at each breakpoint = cost at min_kwp + integral of the slope up to it
+    segment_slopes = slope[..., None] + np.concatenate(
+        [np.zeros(deltas.shape[:-1] + (1,)), np.cumsum(deltas, axis=-1)[..., :-1]], axis=-1)
+    segment_lengths = np.diff(breaks, axis=-1, prepend=min_kwp)
+    cost_at_min = annuity_per_kwp * min_kwp + period_costs(min_kwp).sum(axis=-1)
+    candidates = np.concatenate([np.full(breaks.shape[:-1] + (1,), float(min_kwp)), breaks], axis=-1)
+    costs = np.concatenate([cost_at_min[..., None],
+                            cost_at_min[..., None] + np.cumsum(segment_slopes * segment_lengths, axis=-1)],
+                           axis=-1)
+    if max_kwp is not None:
+        final_slope = slope + deltas.sum(axis=-1)
+        candidates = np.concatenate([candidates, np.full(breaks.shape[:-1] + (1,), upper)], axis=-1)
+        costs = np.concatenate([costs, (costs[..., -1] + final_slope * (upper - breaks[..., -1]))[..., None]],
+                               axis=-1)
+
+    best = np.argmin(costs, axis=-1)[..., None]
+    optimal_kwp = np.take_along_axis(candidates, best, axis=-1)[..., 0]
+    total_annual_cost = np.take_along_axis(costs, best, axis=-1)[..., 0]
+
+    if max_kwp is None:
+        final_slope = (np.multiply(cost_per_kwp_installed, capital_recovery_factor)
+                       - np.multiply(grid_export_price_kwh, pv_per_kwp.sum(axis=-1)))
+        unbounded = final_slope < 0
+        optimal_kwp = np.where(unbounded, np.inf, optimal_kwp)
+        total_annual_cost = np.where(unbounded, -np.inf, total_annual_cost)
+
+    cost_no_pv = period_costs(0.0).sum(axis=-1)
+    return {
+        'optimal_kwp': optimal_kwp,
+        'total_annual_cost': total_annual_cost,
+        'annual_savings': cost_no_pv - total_annual_cost,
+        'cost_no_pv': cost_no_pv,
+    }
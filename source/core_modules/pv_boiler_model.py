@@ -0,0 +1,180 @@
+"""
+Monthly PV / heat-pump / biomass energy balance and cost model.
+
+PV electricity covers cooling first (through the chiller, EER), then
+space heating and DHW through the heat pump (COP); unmet heat is supplied
+by biomass, unmet cooling electricity is imported, and any remaining PV
+surplus is exported. PV sizes of shape `(S,)` and monthly profiles of
+shape `(12,)` give `(S, 12)` energy flows and `(S,)` annual costs. Any
+scalar parameter may instead be an array of shape `(D,)` (D scenarios),
+which adds a leading axis to every result.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def scenario_axes(value, trailing_axes: int):
+    """Append axes to a per-scenario parameter so it broadcasts against `trailing_axes` result axes."""
+    value = np.asarray(value, dtype=np.float64)
+    return value if value.ndim == 0 else value[(...,) + (None,) * trailing_axes]
+
+
+def calculate_capital_recovery_factor(rate, years):
+    """Annuity factor turning an up-front investment into equal yearly payments."""
+    rate = np.asarray(rate, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = (1 + rate) ** years
+        crf = rate * growth / (growth - 1)
+    crf = np.where(rate == 0, 1 / years, crf)
+    return crf.item() if crf.ndim == 0 else crf
+
+
+def simulate_energy_balance(pv_sizes_kwp, pv_per_kwp, demand_acs, demand_cal, demand_cool,
+                            heat_pump_cop, cooling_eer) -> Dict[str, np.ndarray]:
+    """Monthly energy flows (kWh) for every PV size, as `(..., n_sizes, 12)` arrays."""
+    pv_sizes_kwp = np.asarray(pv_sizes_kwp, dtype=np.float64)
+    pv_per_kwp = np.asarray(pv_per_kwp, dtype=np.float64)
+    heating_demand = np.asarray(demand_acs, dtype=np.float64) + np.asarray(demand_cal, dtype=np.float64)
+    demand_cool = np.asarray(demand_cool, dtype=np.float64)
+    heat_pump_cop = scenario_axes(heat_pump_cop, 2)
+    cooling_eer = scenario_axes(cooling_eer, 2)
+
+    pv_generation_elec = pv_sizes_kwp[..., None] * pv_per_kwp
+
+    elec_needed_for_cooling = demand_cool / cooling_eer
+    elec_from_pv_for_cooling = np.minimum(pv_generation_elec, elec_needed_for_cooling)
+    unmet_cooling_elec_demand = elec_needed_for_cooling - elec_from_pv_for_cooling
+
+    elec_remaining_after_cooling = pv_generation_elec - elec_from_pv_for_cooling
+    heat_from_pv_thermal = elec_remaining_after_cooling * heat_pump_cop
+    unmet_heating_demand_thermal = np.maximum(0, heating_demand - heat_from_pv_thermal)
+
+    elec_used_for_heating = np.minimum(elec_remaining_after_cooling, heating_demand / heat_pump_cop)
+    surplus_elec = elec_remaining_after_cooling - elec_used_for_heating
+
+    return {
+        'pv_generation_elec': pv_generation_elec,
+        'elec_from_pv_for_cooling': elec_from_pv_for_cooling,
+        'unmet_cooling_elec_demand': unmet_cooling_elec_demand,
+        'elec_remaining_after_cooling': elec_remaining_after_cooling,
+        'heat_from_pv_thermal': heat_from_pv_thermal,
+        'unmet_heating_demand_thermal': unmet_heating_demand_thermal,
+        'elec_used_for_heating': elec_used_for_heating,
+        'surplus_elec': surplus_elec,
+    }
+
+
+def evaluate_size_sweep(pv_sizes_kwp, pv_per_kwp, demand_acs, demand_cal, demand_cool, *,
+                        cost_per_kwp_installed, capital_recovery_factor, biomass_cost_per_kwh,
+                        grid_import_price_kwh, grid_export_price_kwh, heat_pump_cop,
+                        cooling_eer) -> Dict[str, np.ndarray]:
+    """
+    Annual cost and savings for every PV size in one broadcast computation.
+
+    Returns `pv_size_kwp`, `total_annual_cost`, `annual_savings` (versus no
+    PV) and `cost_no_pv`, with the sizes on the last axis.
+    """
+    pv_sizes_kwp = np.asarray(pv_sizes_kwp, dtype=np.float64)
+    balance = simulate_energy_balance(pv_sizes_kwp, pv_per_kwp, demand_acs, demand_cal, demand_cool,
+                                      heat_pump_cop, cooling_eer)
+
+    annualized_pv_cost = (pv_sizes_kwp * scenario_axes(cost_per_kwp_installed, 1)
+                          * scenario_axes(capital_recovery_factor, 1))
+    cost_of_grid_imports = balance['unmet_cooling_elec_demand'].sum(axis=-1) * scenario_axes(grid_import_price_kwh, 1)
+    cost_of_biomass = balance['unmet_heating_demand_thermal'].sum(axis=-1) * scenario_axes(biomass_cost_per_kwh, 1)
+    revenue_from_exports = balance['surplus_elec'].sum(axis=-1) * scenario_axes(grid_export_price_kwh, 1)
+    total_annual_cost = annualized_pv_cost + cost_of_biomass + cost_of_grid_imports - revenue_from_exports
+
+    heating_demand = np.sum(demand_acs) + np.sum(demand_cal)
+    cost_no_pv = (heating_demand * scenario_axes(biomass_cost_per_kwh, 1)
+                  + (np.sum(demand_cool) / scenario_axes(cooling_eer, 1)) * scenario_axes(grid_import_price_kwh, 1))
+
+    return {
+        'pv_size_kwp': np.broadcast_to(pv_sizes_kwp, total_annual_cost.shape),
+        'total_annual_cost': total_annual_cost,
+        'annual_savings': cost_no_pv - total_annual_cost,
+        'cost_no_pv': cost_no_pv[..., 0] if np.ndim(cost_no_pv) else cost_no_pv,
+    }
+
+
+def find_optimal_pv_size(pv_per_kwp, demand_acs, demand_cal, demand_cool, *,
+                         cost_per_kwp_installed, capital_recovery_factor, biomass_cost_per_kwh,
+                         grid_import_price_kwh, grid_export_price_kwh, heat_pump_cop, cooling_eer,
+                         min_kwp: float = 0.0, max_kwp: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """
+    Exact cost-minimising PV size, without a size grid.
+
+    With monthly yield `y`, cooling electricity `e = cool / EER` and heat-pump
+    electricity `h = heat / COP`, each month costs
+    `import * max(0, e - y x) + biomass * COP * max(0, h - max(0, y x - e))
+    - export * max(0, y x - e - h)`, so the annual cost is piecewise linear in
+    the size `x` with breakpoints at `e / y` and `(e + h) / y`. The global
+    minimum over `[min_kwp, max_kwp]` therefore lies at one of those 24
+    breakpoints or at a bound, and evaluating them is exact even when the
+    cost is not convex.
+
+    Monthly inputs are `(..., 12)` arrays and parameters scalars or `(...,)`
+    arrays (one household per leading index). Returns `optimal_kwp`,
+    `total_annual_cost`, `annual_savings` and `cost_no_pv` of shape `(...)`.
+    Without `max_kwp`, households whose cost keeps falling with size (export
+    revenue exceeding the PV annuity) get an infinite optimum and -inf cost.
+    """
+    pv_per_kwp = np.asarray(pv_per_kwp, dtype=np.float64)
+    heating_demand = np.asarray(demand_acs, dtype=np.float64) + np.asarray(demand_cal, dtype=np.float64)
+    heating_elec = heating_demand / scenario_axes(heat_pump_cop, 1)
+    cooling_elec = np.asarray(demand_cool, dtype=np.float64) / scenario_axes(cooling_eer, 1)
+    # Every monthly array gets the full (..., 12) shape, including households that differ only in a parameter
+    households = np.broadcast_shapes(*(np.shape(value) for value in (
+        cost_per_kwp_installed, capital_recovery_factor, biomass_cost_per_kwh, grid_import_price_kwh,
+        grid_export_price_kwh, heat_pump_cop, cooling_eer)))
+    shape = np.broadcast_shapes(pv_per_kwp.shape, heating_elec.shape, cooling_elec.shape, households + (1,))
+    pv_per_kwp, heating_elec, cooling_elec = (np.broadcast_to(a, shape)
+                                              for a in (pv_per_kwp, heating_elec, cooling_elec))
+
+    # Per-household parameters broadcast against (..., n_candidates, 12)
+    annuity_per_kwp = scenario_axes(np.multiply(cost_per_kwp_installed, capital_recovery_factor), 1)
+    import_price = scenario_axes(grid_import_price_kwh, 2)
+    heat_price = scenario_axes(biomass_cost_per_kwh, 2) * scenario_axes(heat_pump_cop, 2)
+    export_price = scenario_axes(grid_export_price_kwh, 2)
+
+    upper = np.inf if max_kwp is None else float(max_kwp)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        first_break = np.where(pv_per_kwp > 0, cooling_elec / pv_per_kwp, min_kwp)
+        second_break = np.where(pv_per_kwp > 0, (cooling_elec + heating_elec) / pv_per_kwp, min_kwp)
+    # Without an upper bound the cost is linear past the last breakpoint (slope checked below)
+    bounds = np.broadcast_to(np.array([min_kwp, min_kwp if max_kwp is None else upper]),
+                             first_break.shape[:-1] + (2,))
+    candidates = np.clip(np.concatenate([bounds, first_break, second_break], axis=-1), min_kwp, upper)
+    candidates.sort(axis=-1)
+
+    def annual_cost(sizes):
+        generation = sizes[..., :, None] * pv_per_kwp[..., None, :]
+        cooling = cooling_elec[..., None, :]
+        heating = heating_elec[..., None, :]
+        surplus_after_cooling = np.maximum(0, generation - cooling)
+        monthly = (import_price * np.maximum(0, cooling - generation)
+                   + heat_price * np.maximum(0, heating - surplus_after_cooling)
+                   - export_price * np.maximum(0, surplus_after_cooling - heating))
+        return annuity_per_kwp * sizes + monthly.sum(axis=-1)
+
+    costs = annual_cost(candidates)
+    best = np.argmin(costs, axis=-1)[..., None]
+    optimal_kwp = np.take_along_axis(candidates, best, axis=-1)[..., 0]
+    total_annual_cost = np.take_along_axis(costs, best, axis=-1)[..., 0]
+
+    if max_kwp is None:
+        # Beyond the last breakpoint the slope is annuity - export price * annual yield
+        final_slope = (np.multiply(cost_per_kwp_installed, capital_recovery_factor)
+                       - np.multiply(grid_export_price_kwh, pv_per_kwp.sum(axis=-1)))
+        unbounded = final_slope < 0
+        optimal_kwp = np.where(unbounded, np.inf, optimal_kwp)
+        total_annual_cost = np.where(unbounded, -np.inf, total_annual_cost)
+
+    cost_no_pv = annual_cost(np.zeros(pv_per_kwp.shape[:-1] + (1,)))[..., 0]
+    return {
+        'optimal_kwp': optimal_kwp,
+        'total_annual_cost': total_annual_cost,
+        'annual_savings': cost_no_pv - total_annual_cost,
+        'cost_no_pv': cost_no_pv,
+    }
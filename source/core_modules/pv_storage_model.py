@@ -0,0 +1,138 @@
+"""
+Battery and hot-water tank storage for the PV / heat-pump / biomass model.
+
+Each period follows the base model's dispatch (PV to cooling, then to the
+heat pump) and then uses storage before trading with the grid:
+
+1. the tank (thermal kWh) covers unmet heat demand,
+2. the battery covers unmet cooling electricity, then unmet heat-pump
+   electricity,
+3. PV surplus charges the battery, then the tank through the heat pump,
+   and only the rest is exported.
+
+Storage state carries from one period to the next, so dispatch is a
+sequential loop over time, but each step is vectorised over any number of
+scenarios (PV size x battery size x tank size): an 8760-hour year costs
+about the same wall time for one scenario as for thousands.
+"""
+import itertools
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def dispatch_storage(generation, cooling_elec, heating_thermal, battery_kwh, tank_kwh, *,
+                     heat_pump_cop, battery_efficiency: float = 0.9, battery_c_rate: float = 0.5,
+                     battery_self_discharge: float = 0.0002, tank_efficiency: float = 0.95,
+                     tank_self_discharge: float = 0.01) -> Dict[str, np.ndarray]:
+    """
+    Simulate storage dispatch and return annual totals per scenario.
+
+    `generation` is `(n_scenarios, n_periods)` PV output in kWh,
+    `cooling_elec` and `heating_thermal` are `(n_periods,)` chiller
+    electricity and heat demand, and `battery_kwh` / `tank_kwh` are
+    `(n_scenarios,)` capacities. `battery_efficiency` is round-trip (split
+    evenly between charge and discharge), `battery_c_rate` caps charge and
+    discharge power per period as a fraction of capacity, and the
+    self-discharge rates are fractions of the stored energy lost per period.
+
+    Returns `(n_scenarios,)` arrays of `imported_elec`, `biomass_heat`,
+    `exported_elec` and `battery_throughput` (kWh discharged).
+    """
+    generation = np.asarray(generation, dtype=np.float64)
+    cooling_elec = np.asarray(cooling_elec, dtype=np.float64)
+    heating_thermal = np.asarray(heating_thermal, dtype=np.float64)
+    battery_kwh = np.broadcast_to(np.asarray(battery_kwh, dtype=np.float64), generation.shape[:1])
+    tank_kwh = np.broadcast_to(np.asarray(tank_kwh, dtype=np.float64), generation.shape[:1])
+    cop = np.broadcast_to(np.asarray(heat_pump_cop, dtype=np.float64), generation.shape[:1])
+
+    one_way_efficiency = np.sqrt(battery_efficiency)
+    battery_power = battery_kwh * battery_c_rate
+    battery = np.zeros_like(battery_kwh)
+    tank = np.zeros_like(tank_kwh)
+    totals = {name: np.zeros_like(battery_kwh)
+              for name in ('imported_elec', 'biomass_heat', 'exported_elec', 'battery_throughput')}
+
+    for t in range(generation.shape[1]):
+        battery *= 1 - battery_self_discharge
+        tank *= 1 - tank_self_discharge
+
+        # Direct PV use, as in the storage-free model
+        pv = generation[:, t]
+        pv_for_cooling = np.minimum(pv, cooling_elec[t])
+        unmet_cooling = cooling_elec[t] - pv_for_cooling
+        surplus = pv - pv_for_cooling
+        pv_for_heating = np.minimum(surplus, heating_thermal[t] / cop)
+        unmet_heat = heating_thermal[t] - pv_for_heating * cop
+        surplus -= pv_for_heating
+
+        # Discharge: tank heat first, then battery for cooling and the heat pump
+        from_tank = np.minimum(tank, unmet_heat)
+        tank -= from_tank
+        unmet_heat -= from_tank
+
+        deliverable = np.minimum(battery, battery_power) * one_way_efficiency
+        to_cooling = np.minimum(deliverable, unmet_cooling)
+        to_heat_pump = np.minimum(deliverable - to_cooling, unmet_heat / cop)
+        delivered = to_cooling + to_heat_pump
+        battery -= delivered / one_way_efficiency
+        unmet_cooling -= to_cooling
+        unmet_heat -= to_heat_pump * cop
+
+        # Charge: battery first, then the tank through the heat pump
+        to_battery = np.minimum(surplus, np.minimum(battery_power, (battery_kwh - battery) / one_way_efficiency))
+        battery += to_battery * one_way_efficiency
+        surplus -= to_battery
+        to_tank = np.minimum(surplus, (tank_kwh - tank) / (cop * tank_efficiency))
+        tank += to_tank * cop * tank_efficiency
+        surplus -= to_tank
+
+        totals['imported_elec'] += unmet_cooling
+        totals['biomass_heat'] += unmet_heat
+        totals['exported_elec'] += surplus
+        totals['battery_throughput'] += delivered
+    return totals
+
+
+def optimize_pv_and_storage(pv_per_kwp, demand_acs, demand_cal, demand_cool,
+                            pv_sizes_kwp: Sequence[float], battery_sizes_kwh: Sequence[float],
+                            tank_sizes_kwh: Sequence[float], *, cost_per_kwp_installed,
+                            cost_per_kwh_battery, cost_per_kwh_tank, capital_recovery_factor,
+                            biomass_cost_per_kwh, grid_import_price_kwh, grid_export_price_kwh,
+                            heat_pump_cop, cooling_eer, batch_size: int = 5000,
+                            **storage_params) -> pd.DataFrame:
+    """
+    Annual cost of every PV size x battery size x tank size combination.
+
+    Profiles are `(n_periods,)` kWh (hourly for meaningful storage results).
+    Returns one row per combination with `pv_size_kwp`, `battery_kwh`,
+    `tank_kwh`, `total_annual_cost` and `annual_savings` (versus no PV and
+    no storage); the optimum is the row with the lowest cost. Extra keyword
+    arguments go to `dispatch_storage`.
+    """
+    pv_per_kwp = np.asarray(pv_per_kwp, dtype=np.float64)
+    heating_thermal = np.asarray(demand_acs, dtype=np.float64) + np.asarray(demand_cal, dtype=np.float64)
+    cooling_elec = np.asarray(demand_cool, dtype=np.float64) / cooling_eer
+
+    grid = pd.DataFrame(list(itertools.product(pv_sizes_kwp, battery_sizes_kwh, tank_sizes_kwh)),
+                        columns=['pv_size_kwp', 'battery_kwh', 'tank_kwh'], dtype=np.float64)
+    flows = {name: np.empty(len(grid)) for name in ('imported_elec', 'biomass_heat', 'exported_elec')}
+    for start in range(0, len(grid), batch_size):
+        batch = grid.iloc[start:start + batch_size]
+        totals = dispatch_storage(batch['pv_size_kwp'].to_numpy()[:, None] * pv_per_kwp,
+                                  cooling_elec, heating_thermal, batch['battery_kwh'].to_numpy(),
+                                  batch['tank_kwh'].to_numpy(), heat_pump_cop=heat_pump_cop, **storage_params)
+        for name in flows:
+            flows[name][start:start + batch_size] = totals[name]
+
+    capital_cost = (grid['pv_size_kwp'] * cost_per_kwp_installed + grid['battery_kwh'] * cost_per_kwh_battery
+                    + grid['tank_kwh'] * cost_per_kwh_tank)
+    grid['total_annual_cost'] = (capital_cost * capital_recovery_factor
+                                 + flows['imported_elec'] * grid_import_price_kwh
+                                 + flows['biomass_heat'] * biomass_cost_per_kwh
+                                 - flows['exported_elec'] * grid_export_price_kwh)
+    cost_no_pv = (heating_thermal.sum() * biomass_cost_per_kwh
+                  + cooling_elec.sum() * grid_import_price_kwh)
+    grid['annual_savings'] = cost_no_pv - grid['total_annual_cost']
+    return grid
@@ -0,0 +1,140 @@
+"""
+Persistent, content-addressed cache for PVGIS API responses.
+
+Each response is stored as a JSON file named after the SHA-256 of the
+canonicalised request parameters, so identical requests map to the same
+entry regardless of parameter order or int/float spelling. Entries expire
+after a TTL and the least recently used ones are evicted once the cache
+exceeds its entry or byte budget.
+"""
+import hashlib
+import json
+import numbers
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def canonical_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalise request parameters so equivalent requests compare equal."""
+    canonical = {}
+    for key, value in params.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, numbers.Real):
+            value = float(value)
+        elif value is not None and not isinstance(value, str):
+            value = str(value)
+        canonical[str(key)] = value
+    return dict(sorted(canonical.items()))
+
+
+def make_cache_key(params: Dict[str, Any]) -> str:
+    """Return the SHA-256 hex digest of the canonical request parameters."""
+    payload = json.dumps(canonical_params(params), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """On-disk response cache with TTL expiry and size-bounded LRU eviction."""
+
+    def __init__(self, cache_dir: str, ttl_seconds: Optional[float] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = 0
+        # key -> file size, ordered from least to most recently used
+        self._index = OrderedDict()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_index(self) -> None:
+        # The file mtime records the last use, so sorting by it restores LRU order
+        entries = []
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    def _remove(self, key: str) -> None:
+        self._total_bytes -= self._index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        while self._index and (
+                (self.max_entries is not None and len(self._index) > self.max_entries)
+                or (self.max_bytes is not None and self._total_bytes > self.max_bytes)):
+            self._remove(next(iter(self._index)))
+
+    def get(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cached response for `params`, or None on a miss or expired entry."""
+        key = make_cache_key(params)
+        if key not in self._index:
+            self.misses += 1
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        if self.ttl_seconds is not None and time.time() - entry['stored_at'] > self.ttl_seconds:
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        os.utime(path)
+        self._index.move_to_end(key)
+        self.hits += 1
+        return entry['data']
+
+    def put(self, params: Dict[str, Any], data: Dict[str, Any]) -> None:
+        """Store `data` as the response for `params`, evicting old entries if needed."""
+        key = make_cache_key(params)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        entry = {'params': canonical_params(params), 'stored_at': time.time(), 'data': data}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+        self._total_bytes -= self._index.pop(key, 0)
+        size = os.path.getsize(path)
+        self._index[key] = size
+        self._total_bytes += size
+        self._evict()
+
+    def __contains__(self, params: Dict[str, Any]) -> bool:
+        return make_cache_key(params) in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current cache size."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': len(self._index), 'bytes': self._total_bytes}
@@ -0,0 +1,182 @@
+"""
+Asynchronous batch client for the PVGIS PVcalc endpoint.
+
+Requests are fanned out with a bounded number of in-flight calls, and a
+per-host rate limit on the HTTP transport (which also paces retries of
+429/529 responses) keeps a large site list under the PVGIS quota (30
+calls/second per IP). Results are yielded as they complete.
+
+PVcalc energy outputs scale linearly with `peakpower` and with the
+`(1 - loss/100)` system-loss factor, so by default every request is
+served from a single 1 MWp / 0 % loss reference response per site and
+rescaled locally. Size and loss sweeps therefore cost one API call.
+"""
+import asyncio
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import requests
+
+from .http_transport import HTTPTransport, default_transport
+from .pvgis_cache import ResponseCache, make_cache_key
+
+URL_CALC = "https://re.jrc.ec.europa.eu/api/v5_2/PVcalc"
+
+# Published PVGIS limit: 30 calls/second per IP address
+PVGIS_MAX_CALLS_PER_SECOND = 30
+
+# Reference system every scalable request is fetched at. PVGIS rounds energies to 0.01 kWh,
+# so a large reference keeps the rounding error negligible once scaled (at 1 kWp, E_d ~ 3.5
+# would carry ~0.14 % error into a scaled-up system)
+REFERENCE_PEAKPOWER = 1000.0
+REFERENCE_LOSS = 0.0
+
+# Outputs proportional to peakpower * (1 - loss/100); irradiation (H(i)_*) is not
+LINEAR_OUTPUT_KEYS = ('E_d', 'E_m', 'E_y', 'SD_m', 'SD_y')
+
+
+def reference_params(params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Return the `REFERENCE_PEAKPOWER` / 0 % loss reference request for `params`.
+
+    Returns None when the request cannot be served by rescaling (missing
+    `peakpower`/`loss`, or `pvprice` set, since cost outputs are not linear).
+    """
+    if 'peakpower' not in params or 'loss' not in params or params.get('pvprice'):
+        return None
+    reference = dict(params)
+    reference['peakpower'] = REFERENCE_PEAKPOWER
+    reference['loss'] = REFERENCE_LOSS
+    return reference
+
+
+def scale_pvcalc_response(data: Dict[str, Any], peakpower: float, loss: float) -> Dict[str, Any]:
+    """Rescale a PVcalc JSON response to another peak power and system loss."""
+    pv_module = data.get('inputs', {}).get('pv_module', {})
+    ref_peakpower = float(pv_module.get('peak_power', REFERENCE_PEAKPOWER))
+    ref_loss = float(pv_module.get('system_loss', REFERENCE_LOSS))
+    ref_loss_factor = 1 - ref_loss / 100
+    loss_factor = 1 - float(loss) / 100
+    factor = (float(peakpower) / ref_peakpower) * (loss_factor / ref_loss_factor)
+
+    scaled = copy.deepcopy(data)
+    if 'pv_module' in scaled.get('inputs', {}):
+        scaled['inputs']['pv_module']['peak_power'] = float(peakpower)
+        scaled['inputs']['pv_module']['system_loss'] = float(loss)
+
+    outputs = scaled.get('outputs', {})
+    for mounting in outputs.get('monthly', {}).values():
+        for month in mounting:
+            for key in LINEAR_OUTPUT_KEYS:
+                if key in month:
+                    month[key] = month[key] * factor
+    for totals in outputs.get('totals', {}).values():
+        for key in LINEAR_OUTPUT_KEYS:
+            if key in totals:
+                totals[key] = totals[key] * factor
+        # Combined loss compounds the system loss with the modelled AOI/spectral/thermal losses
+        if 'l_total' in totals:
+            other_losses = (1 + totals['l_total'] / 100) / ref_loss_factor
+            totals['l_total'] = (other_losses * loss_factor - 1) * 100
+    return scaled
+
+
+class PVGISBatchClient:
+    """
+    Concurrent PVcalc client with bounded parallelism and rate limiting.
+
+    The rate limit is installed on `transport` for the PVcalc host, so it
+    covers retries and every other caller sharing that transport.
+    """
+
+    def __init__(self, url: str = URL_CALC, max_concurrency: int = 8,
+                 rate_per_second: float = PVGIS_MAX_CALLS_PER_SECOND,
+                 burst: float = 1.0, timeout: float = 60.0,
+                 cache: Optional[ResponseCache] = None,
+                 transport: Optional[HTTPTransport] = None,
+                 linear_scaling: bool = True):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.timeout = timeout
+        self.cache = cache
+        self.transport = default_transport if transport is None else transport
+        self.linear_scaling = linear_scaling
+        self.transport.set_rate_limit(url, rate_per_second, burst)
+
+    def fetch(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Issue a single blocking PVcalc request and return a result record."""
+        try:
+            response = self.transport.get(self.url, params=params, timeout=self.timeout)
+        except requests.RequestException as e:
+            return {'status': None, 'data': None, 'error': str(e)}
+
+        if response.status_code != 200:
+            return {'status': response.status_code, 'data': None, 'error': response.text}
+        try:
+            return {'status': 200, 'data': response.json(), 'error': None}
+        except ValueError as e:
+            return {'status': 200, 'data': None, 'error': f"Invalid JSON: {e}"}
+
+    async def iter_batch(self, jobs: Iterable[Tuple[Hashable, Dict[str, Any]]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Fetch every `(key, params)` job and yield result records as they complete.
+
+        Each record holds `key`, `params`, `status`, `data` (parsed JSON or None),
+        `error` (None on success) and `cached` (True when served from the cache).
+        Jobs sharing a reference request wait on the same in-flight call.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            async def request(params):
+                if self.cache is not None:
+                    data = self.cache.get(params)
+                    if data is not None:
+                        return {'status': 200, 'data': data, 'error': None, 'cached': True}
+
+                async with semaphore:
+                    result = await loop.run_in_executor(executor, self.fetch, params)
+                if self.cache is not None and result['error'] is None:
+                    self.cache.put(params, result['data'])
+                return {**result, 'cached': False}
+
+            async def run_one(key, params):
+                reference = reference_params(params) if self.linear_scaling else None
+                request_params = params if reference is None else reference
+
+                request_key = make_cache_key(request_params)
+                if request_key not in in_flight:
+                    in_flight[request_key] = asyncio.ensure_future(request(request_params))
+                result = dict(await asyncio.shield(in_flight[request_key]))
+
+                if reference is not None and result['error'] is None:
+                    result['data'] = scale_pvcalc_response(result['data'], params['peakpower'], params['loss'])
+                return {'key': key, 'params': params, **result}
+
+            tasks = [asyncio.ensure_future(run_one(key, params)) for key, params in jobs]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    yield await next_done
+            finally:
+                for task in [*tasks, *in_flight.values()]:
+                    task.cancel()
+
+    def run_batch(self, jobs: Iterable[Tuple[Hashable, Dict[str, Any]]],
+                  on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """Blocking wrapper around `iter_batch`; calls `on_result` as each request completes."""
+        async def collect():
+            results = []
+            async for result in self.iter_batch(jobs):
+                if on_result is not None:
+                    on_result(result)
+                results.append(result)
+            return results
+
+        return asyncio.run(collect())
@@ -0,0 +1,100 @@
+"""
+Headless rendering of the optimizer's report figures.
+
+Figures are drawn with the object-oriented matplotlib API on Agg canvases,
+never through pyplot, so rendering needs no display and no global figure
+state. Each process keeps one template figure per figure kind and redraws
+its axes for every job instead of building a new figure, and batches of
+jobs can be spread over a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def draw_savings_vs_kwp(ax, pv_size_kwp, annual_savings, optimal_kwp: Optional[float] = None,
+                        xlim: Optional[Tuple[float, float]] = (0, 3)) -> None:
+    """Annual savings against PV size, with the optimal size (default: best size on the grid) marked."""
+    if optimal_kwp is None:
+        optimal_kwp = np.asarray(pv_size_kwp)[np.argmax(annual_savings)]
+    ax.plot(pv_size_kwp, annual_savings, marker='.', linestyle='-')
+    ax.axvline(x=optimal_kwp, color='r', linestyle='--', label=f"Optimal Size: {optimal_kwp:.2f} kWp")
+    ax.set_title('Estimated Annual Savings vs. PV System Size (Advanced Model)')
+    ax.set_xlabel('PV System Size (kWp)')
+    ax.set_ylabel('Annual Savings (EUR)')
+    if xlim is not None:
+        ax.set_xlim(*xlim)
+    ax.set_ylim(bottom=0)
+    ax.grid(True)
+    ax.legend()
+
+
+def draw_monthly_energy_balance(ax, optimal_kwp, demand_acs, demand_cal, demand_cool, total_pv_supply) -> None:
+    """Stacked monthly demand bars with the PV-supplied energy line."""
+    demand_acs, demand_cal = np.asarray(demand_acs), np.asarray(demand_cal)
+    ax.bar(MONTHS, demand_acs, label='DHW Demand', color='#1f77b4')
+    ax.bar(MONTHS, demand_cal, bottom=demand_acs, label='Heating Demand', color='#ff7f0e')
+    ax.bar(MONTHS, demand_cool, bottom=demand_acs + demand_cal, label='Cooling Demand', color='#d62728')
+    ax.plot(MONTHS, total_pv_supply, marker='o', linestyle='--', color='black', label='Total Supply from PV')
+    ax.set_title(f'Monthly Energy Demand & PV Supply for Optimal {optimal_kwp:.2f} kWp System')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Energy (kWh)')
+    ax.legend()
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+
+
+# kind -> (drawing function, figure size in inches, apply tight layout)
+FIGURE_KINDS = {
+    'savings_vs_kwp': (draw_savings_vs_kwp, (10, 6), False),
+    'monthly_energy_balance': (draw_monthly_energy_balance, (12, 7), True),
+}
+
+# Per-process template figures, created on first use
+_templates: Dict[str, Figure] = {}
+
+
+def _template(kind: str) -> Figure:
+    fig = _templates.get(kind)
+    if fig is None:
+        fig = Figure(figsize=FIGURE_KINDS[kind][1])
+        FigureCanvasAgg(fig)
+        fig.add_subplot()
+        _templates[kind] = fig
+    return fig
+
+
+def render_figure(kind: str, path: str, **kwargs) -> str:
+    """Draw one figure of `kind` with `kwargs` and save it to `path`."""
+    draw, _, tight = FIGURE_KINDS[kind]
+    fig = _template(kind)
+    ax = fig.axes[0]
+    ax.clear()
+    draw(ax, **kwargs)
+    if tight:
+        fig.tight_layout()
+    fig.savefig(path)
+    return path
+
+
+def _render_job(job: Tuple[str, str, Dict[str, Any]]) -> str:
+    kind, path, kwargs = job
+    return render_figure(kind, path, **kwargs)
+
+
+def render_batch(jobs: Iterable[Tuple[str, str, Dict[str, Any]]], workers: Optional[int] = None,
+                 chunksize: int = 16) -> List[str]:
+    """
+    Render `(kind, path, kwargs)` jobs, in a process pool when `workers` > 1.
+
+    Returns the written paths in job order.
+    """
+    jobs = list(jobs)
+    if not workers or workers <= 1:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_render_job, jobs, chunksize=chunksize))
@@ -0,0 +1,195 @@
+"""
+Columnar store for PVGIS PVcalc results.
+
+One row per site holds the input metadata (location, module, mounting)
+and the twelve-month `E_d`, `E_m`, `H(i)_d`, `H(i)_m` and `SD_m` arrays.
+Rows are buffered and appended as Parquet part files in a Hive-style
+`country=<name>/` layout, so portfolio-wide queries read only the
+columns and countries they need.
+"""
+import os
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+MONTHLY_VARIABLES = ('E_d', 'E_m', 'H(i)_d', 'H(i)_m', 'SD_m')
+
+SCHEMA = pa.schema([
+    ('site_key', pa.string()),
+    ('city', pa.string()),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    ('elevation', pa.float64()),
+    ('radiation_db', pa.string()),
+    ('technology', pa.string()),
+    ('peak_power_kW', pa.float64()),
+    ('system_loss_pct', pa.float64()),
+    ('slope', pa.float64()),
+    ('azimuth', pa.float64()),
+    ('E_y', pa.float64()),
+    ('H(i)_y', pa.float64()),
+    ('l_total', pa.float64()),
+    *[(name, pa.list_(pa.float64(), 12)) for name in MONTHLY_VARIABLES],
+    ('fetched_at', pa.float64()),
+])
+
+PARTITIONING = ds.partitioning(pa.schema([('country', pa.string())]), flavor='hive')
+
+
+def _float_or_none(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def record_from_response(site_key: str, city: str, country: str, data: Dict[str, Any],
+                         mounting: str = 'fixed') -> Dict[str, Any]:
+    """Flatten a PVcalc JSON response into a results-store row."""
+    inputs = data.get('inputs', {})
+    location = inputs.get('location', {})
+    meteo = inputs.get('meteo_data', {})
+    pv_module = inputs.get('pv_module', {})
+    mounting_inputs = inputs.get('mounting_system', {}).get(mounting, {})
+    outputs = data.get('outputs', {})
+    totals = outputs.get('totals', {}).get(mounting, {})
+    monthly = sorted(outputs.get('monthly', {}).get(mounting, []), key=lambda m: m.get('month', 0))
+
+    record = {
+        'site_key': site_key,
+        'city': city,
+        'country': country,
+        'latitude': _float_or_none(location.get('latitude')),
+        'longitude': _float_or_none(location.get('longitude')),
+        'elevation': _float_or_none(location.get('elevation')),
+        'radiation_db': meteo.get('radiation_db'),
+        'technology': pv_module.get('technology'),
+        'peak_power_kW': _float_or_none(pv_module.get('peak_power')),
+        'system_loss_pct': _float_or_none(pv_module.get('system_loss')),
+        'slope': _float_or_none(mounting_inputs.get('slope', {}).get('value')),
+        'azimuth': _float_or_none(mounting_inputs.get('azimuth', {}).get('value')),
+        'E_y': _float_or_none(totals.get('E_y')),
+        'H(i)_y': _float_or_none(totals.get('H(i)_y')),
+        'l_total': _float_or_none(totals.get('l_total')),
+        'fetched_at': time.time(),
+    }
+    for name in MONTHLY_VARIABLES:
+        values = [_float_or_none(m.get(name)) for m in monthly]
+        record[name] = values if len(values) == 12 else None
+    return record
+
+
+class ResultsStore:
+    """Append-only Parquet dataset of per-site PVcalc results, partitioned by country."""
+
+    def __init__(self, root: str, flush_rows: int = 1000):
+        self.root = root
+        self.flush_rows = flush_rows
+        self._buffer = []
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def _new_part_path(partition_dir: str) -> str:
+        return os.path.join(partition_dir, f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet")
+
+    @staticmethod
+    def _tmp_path(path: str) -> str:
+        # Dataset discovery skips '.'-prefixed files, so a crash mid-write leaves no readable debris
+        head, tail = os.path.split(path)
+        return os.path.join(head, f".{tail}.tmp")
+
+    @property
+    def buffered_rows(self) -> int:
+        return len(self._buffer)
+
+    def add(self, record: Dict[str, Any]) -> bool:
+        """Buffer one row; returns True if the buffer was flushed to disk."""
+        self._buffer.append(record)
+        if len(self._buffer) >= self.flush_rows:
+            self.flush()
+            return True
+        return False
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.add(record)
+
+    def flush(self) -> None:
+        """Write buffered rows as one new part file per country."""
+        by_country = {}
+        for record in self._buffer:
+            by_country.setdefault(record['country'], []).append(record)
+
+        for country, records in by_country.items():
+            partition_dir = os.path.join(self.root, f"country={quote(str(country), safe='')}")
+            os.makedirs(partition_dir, exist_ok=True)
+            table = pa.Table.from_pylist(records, schema=SCHEMA)
+            path = self._new_part_path(partition_dir)
+            tmp_path = self._tmp_path(path)
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, path)
+        self._buffer.clear()
+
+    def part_files(self) -> List[str]:
+        """Committed part files (`country=*/*.parquet`); anything else under the root is ignored."""
+        paths = []
+        for entry in sorted(os.scandir(self.root), key=lambda e: e.name):
+            if entry.is_dir() and entry.name.startswith('country='):
+                paths += sorted(p.path for p in os.scandir(entry.path)
+                                if p.is_file() and p.name.endswith('.parquet') and not p.name.startswith('.'))
+        return paths
+
+    def dataset(self) -> ds.Dataset:
+        """The on-disk store as a `pyarrow.dataset.Dataset`."""
+        return ds.dataset(self.part_files(), format='parquet', partitioning=PARTITIONING,
+                          partition_base_dir=self.root, schema=SCHEMA.append(pa.field('country', pa.string())))
+
+    def read(self, columns: Optional[List[str]] = None, countries: Optional[Iterable[str]] = None,
+             latest_only: bool = True) -> pd.DataFrame:
+        """
+        Read the requested columns, optionally restricted to some countries.
+
+        With `latest_only`, sites stored more than once keep only their most
+        recent row.
+        """
+        read_columns = None
+        if columns is not None:
+            read_columns = list(columns)
+            if latest_only:
+                read_columns += [c for c in ('site_key', 'fetched_at') if c not in read_columns]
+
+        filter_expr = None
+        if countries is not None:
+            filter_expr = ds.field('country').isin(list(countries))
+
+        df = self.dataset().to_table(columns=read_columns, filter=filter_expr).to_pandas()
+        if latest_only and not df.empty:
+            df = df.sort_values('fetched_at').drop_duplicates('site_key', keep='last')
+            df = df.reset_index(drop=True)
+        if columns is not None:
+            df = df[list(columns)]
+        return df
+
+    def compact(self) -> None:
+        """Rewrite each country partition as a single de-duplicated part file."""
+        self.flush()
+        for entry in os.scandir(self.root):
+            if not (entry.is_dir() and entry.name.startswith('country=')):
+                continue
+            parts = [p.path for p in os.scandir(entry.path) if p.name.endswith('.parquet')]
+            if len(parts) < 2:
+                continue
+            df = pq.read_table(parts, schema=SCHEMA).to_pandas()
+            df = df.sort_values('fetched_at').drop_duplicates('site_key', keep='last')
+            path = self._new_part_path(entry.path)
+            tmp_path = self._tmp_path(path)
+            pq.write_table(pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False), tmp_path)
+            os.replace(tmp_path, path)
+            for part in parts:
+                os.remove(part)
@@ -0,0 +1,113 @@
+"""
+Local, pre-indexed cache of the SAM module and inverter catalogs.
+
+`pvlib.pvsystem.retrieve_sam` parses multi-megabyte CSVs into wide
+DataFrames (one column per component) on every call. The first use of a
+`SAMCatalog` stores the catalog transposed as a typed Parquet file, one
+row per component in small row groups; later runs read only the name
+column to build the index and load single components lazily by row group.
+"""
+import difflib
+import os
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CATALOGS = ('CECMod', 'CECInverter', 'SandiaMod', 'ADRInverter')
+NAME_COLUMN = 'name'
+ROW_GROUP_SIZE = 256
+
+
+def _normalize_name(name: str) -> str:
+    # retrieve_sam turns every non-alphanumeric character of a component name into '_'
+    return re.sub(r'[^0-9a-z]+', '_', name.lower()).strip('_')
+
+
+def build_catalog_cache(catalog: str, path: str, source_path: Optional[str] = None) -> None:
+    """Parse a SAM catalog with pvlib and save it as one typed row per component."""
+    import pvlib  # only needed to (re)build the cache
+
+    # retrieve_sam takes either a bundled catalog name or a CSV path, not both
+    if source_path:
+        frame = pvlib.pvsystem.retrieve_sam(path=source_path).T
+    else:
+        frame = pvlib.pvsystem.retrieve_sam(catalog).T
+    for column in frame.columns:
+        try:
+            frame[column] = pd.to_numeric(frame[column])
+        except (TypeError, ValueError):
+            pass  # text column; stored as strings with nulls
+    frame.index.name = NAME_COLUMN
+    frame = frame.reset_index()
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), tmp_path, row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, path)
+
+
+class SAMCatalog:
+    """Name-indexed, lazily loaded view of one cached SAM catalog."""
+
+    def __init__(self, catalog: str, cache_dir: str, refresh: bool = False, source_path: Optional[str] = None):
+        if catalog not in CATALOGS:
+            raise ValueError(f"Unknown SAM catalog '{catalog}'; expected one of {', '.join(CATALOGS)}")
+        self.catalog = catalog
+        self.path = os.path.join(cache_dir, f"{catalog.lower()}.parquet")
+        if refresh or not os.path.exists(self.path):
+            build_catalog_cache(catalog, self.path, source_path)
+
+        self._file = pq.ParquetFile(self.path)
+        self.names: List[str] = self._file.read(columns=[NAME_COLUMN]).column(NAME_COLUMN).to_pylist()
+        self._row_of = {name: i for i, name in enumerate(self.names)}
+        self._normalized = {}
+        for name in self.names:
+            self._normalized.setdefault(_normalize_name(name), name)
+        self._loaded: Dict[str, pd.Series] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._row_of
+
+    def __getitem__(self, name: str) -> pd.Series:
+        return self.get(name)
+
+    def get(self, name: str) -> pd.Series:
+        """
+        Parameters of one component, like `retrieve_sam(catalog)[name]`.
+
+        Names are matched exactly, then ignoring case and punctuation;
+        unknown names raise `KeyError` listing the closest matches.
+        """
+        key = name if name in self._row_of else self._normalized.get(_normalize_name(name))
+        if key is None:
+            suggestions = ', '.join(self.search(name, limit=5)) or 'none'
+            raise KeyError(f"'{name}' not in {self.catalog}; closest matches: {suggestions}")
+        if key not in self._loaded:
+            row = self._row_of[key]
+            group = self._file.read_row_group(row // ROW_GROUP_SIZE).to_pandas()
+            record = group.iloc[row % ROW_GROUP_SIZE].drop(NAME_COLUMN)
+            # Missing text values come back as None; retrieve_sam reports them as NaN
+            self._loaded[key] = record.where(record.notna(), np.nan).rename(key)
+        return self._loaded[key]
+
+    def search(self, query: str, limit: int = 10) -> List[str]:
+        """Component names containing all words of `query`, or the closest fuzzy matches if none do."""
+        words = [w for w in _normalize_name(query).split('_') if w]
+        matches = [name for normalized, name in self._normalized.items()
+                   if all(word in normalized for word in words)]
+        if matches:
+            return matches[:limit]
+        close = difflib.get_close_matches(_normalize_name(query), list(self._normalized), n=limit, cutoff=0.5)
+        return [self._normalized[normalized] for normalized in close]
+
+    def frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """The whole catalog (or some columns), one row per component, indexed by name."""
+        read_columns = None if columns is None else [NAME_COLUMN, *columns]
+        return self._file.read(columns=read_columns).to_pandas().set_index(NAME_COLUMN)
@@ -0,0 +1,117 @@
+"""
+Grid and Latin-hypercube sensitivity analysis for the PV tradeoff model.
+
+Economic and technical parameters are sampled into scenario arrays; each
+batch of scenarios is solved with one broadcast `find_optimal_pv_size`
+call, which gives every draw its exact (continuous) cost-minimising size
+within `[min_kwp, max_kwp]`, and batches are spread over a process pool.
+The result is one row per draw with its parameters, optimal kWp and
+annual savings at that optimum.
+"""
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .pv_boiler_model import calculate_capital_recovery_factor, find_optimal_pv_size
+
+# Parameters that may be sampled; any not sampled must be given as fixed values
+PARAMETER_NAMES = (
+    'cost_per_kwp_installed',
+    'grid_export_price_kwh',
+    'grid_import_price_kwh',
+    'biomass_cost_per_kwh',
+    'loan_interest_rate',
+    'heat_pump_cop',
+    'cooling_eer',
+)
+
+
+def latin_hypercube(n_draws: int, bounds: Dict[str, Tuple[float, float]],
+                    seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Latin-hypercube sample of `n_draws` points, uniform within each `(low, high)` bound."""
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for name, (low, high) in bounds.items():
+        strata = (rng.permutation(n_draws) + rng.random(n_draws)) / n_draws
+        samples[name] = low + strata * (high - low)
+    return samples
+
+
+def full_grid(levels: Dict[str, Sequence[float]]) -> Dict[str, np.ndarray]:
+    """Cartesian product of the given parameter levels."""
+    names = list(levels)
+    combos = np.array(list(itertools.product(*(levels[name] for name in names))), dtype=np.float64)
+    return {name: combos[:, i] for i, name in enumerate(names)}
+
+
+def evaluate_scenarios(samples: Dict[str, np.ndarray], fixed: Dict[str, float], pv_per_kwp,
+                       demand_acs, demand_cal, demand_cool, loan_years: int,
+                       min_kwp: float = 0.0, max_kwp: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """Optimal PV size, its annual cost and savings for every scenario in `samples`."""
+    params = {**fixed, **samples}
+    missing = [name for name in PARAMETER_NAMES if name not in params]
+    if missing:
+        raise ValueError(f"Missing parameters: {', '.join(missing)}")
+
+    crf = calculate_capital_recovery_factor(params['loan_interest_rate'], loan_years)
+    optimum = find_optimal_pv_size(
+        pv_per_kwp, demand_acs, demand_cal, demand_cool,
+        cost_per_kwp_installed=params['cost_per_kwp_installed'], capital_recovery_factor=crf,
+        biomass_cost_per_kwh=params['biomass_cost_per_kwh'],
+        grid_import_price_kwh=params['grid_import_price_kwh'],
+        grid_export_price_kwh=params['grid_export_price_kwh'],
+        heat_pump_cop=params['heat_pump_cop'], cooling_eer=params['cooling_eer'],
+        min_kwp=min_kwp, max_kwp=max_kwp,
+    )
+    n_draws = len(next(iter(samples.values())))
+    return {key: np.broadcast_to(optimum[key], (n_draws,))
+            for key in ('optimal_kwp', 'total_annual_cost', 'annual_savings')}
+
+
+def run_sensitivity(samples: Dict[str, np.ndarray], fixed: Dict[str, float], pv_per_kwp,
+                    demand_acs, demand_cal, demand_cool, loan_years: int,
+                    min_kwp: float = 0.0, max_kwp: Optional[float] = None,
+                    batch_size: int = 2000, workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Evaluate every sampled scenario and return one row per draw.
+
+    Draws are evaluated in batches of `batch_size` (bounding the
+    `(batch, n_breakpoints, 12)` temporaries); with `workers` > 1 the
+    batches run in a process pool. Without `max_kwp`, draws whose cost
+    keeps falling with size get an infinite optimum.
+    """
+    n_draws = len(next(iter(samples.values())))
+    batches = [{name: values[start:start + batch_size] for name, values in samples.items()}
+               for start in range(0, n_draws, batch_size)]
+    evaluate = partial(
+        evaluate_scenarios, fixed=fixed,
+        pv_per_kwp=np.asarray(pv_per_kwp, dtype=np.float64),
+        demand_acs=np.asarray(demand_acs, dtype=np.float64),
+        demand_cal=np.asarray(demand_cal, dtype=np.float64),
+        demand_cool=np.asarray(demand_cool, dtype=np.float64),
+        loan_years=loan_years, min_kwp=min_kwp, max_kwp=max_kwp,
+    )
+
+    if not workers or workers <= 1:
+        outcomes = [evaluate(batch) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(evaluate, batches))
+
+    results = pd.DataFrame({name: np.asarray(values) for name, values in samples.items()})
+    for key in ('optimal_kwp', 'total_annual_cost', 'annual_savings'):
+        results[key] = np.concatenate([outcome[key] for outcome in outcomes]) if outcomes else []
+    return results
+
+
+def summarize_sensitivity(results: pd.DataFrame,
+                          quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95)) -> pd.DataFrame:
+    """Mean, standard deviation and quantiles of the optimal kWp and annual savings."""
+    columns = ['optimal_kwp', 'annual_savings']
+    summary = results[columns].quantile(list(quantiles))
+    summary.index = [f"p{int(round(q * 100))}" for q in quantiles]
+    return pd.concat([results[columns].agg(['mean', 'std']), summary])
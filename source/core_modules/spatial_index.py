@@ -0,0 +1,100 @@
+"""
+Spatial index over computed PVGIS sites for nearest-site lookups.
+
+Sites are placed on the unit sphere and indexed with a KD-tree; the
+straight-line (chord) distances it returns map monotonically onto
+great-circle distances, so k-nearest and radius queries are exact
+haversine queries at KD-tree speed.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from .results_store import ResultsStore
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vectors(latitudes, longitudes) -> np.ndarray:
+    """Convert latitude/longitude in degrees to `(n, 3)` unit vectors."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+def km_to_chord(distance_km):
+    return 2 * np.sin(np.minimum(np.asarray(distance_km) / (2 * EARTH_RADIUS_KM), np.pi / 2))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km (broadcasts over arrays)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class SiteIndex:
+    """KD-tree over site coordinates with great-circle k-nearest and radius queries."""
+
+    def __init__(self, latitudes: Sequence[float], longitudes: Sequence[float],
+                 sites: Optional[pd.DataFrame] = None):
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        if sites is None:
+            sites = pd.DataFrame({'latitude': self.latitudes, 'longitude': self.longitudes})
+        self.sites = sites.reset_index(drop=True)
+        self._tree = cKDTree(to_unit_vectors(self.latitudes, self.longitudes))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'SiteIndex':
+        """Index a DataFrame with `latitude`/`longitude` columns; rows without coordinates are dropped."""
+        df = df.dropna(subset=['latitude', 'longitude']).reset_index(drop=True)
+        return cls(df['latitude'].to_numpy(), df['longitude'].to_numpy(), df)
+
+    @classmethod
+    def from_results_store(cls, store: ResultsStore, columns: Optional[List[str]] = None) -> 'SiteIndex':
+        """Index every site in the results store, keeping `columns` (default: all) as site metadata."""
+        if columns is not None:
+            columns = list(dict.fromkeys(['latitude', 'longitude', *columns]))
+        return cls.from_frame(store.read(columns))
+
+    @classmethod
+    def from_summaries(cls, summaries: Iterable[Dict[str, Any]]) -> 'SiteIndex':
+        """Index `parse_pv_data.extract_summary` records."""
+        return cls.from_frame(pd.DataFrame(list(summaries)))
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    def nearest(self, lat, lon, k: int = 1, workers: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return `(distances_km, indices)` of the `k` nearest sites.
+
+        `lat`/`lon` may be scalars or arrays; results have shape `(..., k)`
+        (the trailing axis is dropped when `k == 1`). Missing neighbours
+        (k > number of sites) have distance inf and index `len(self)`.
+        `workers=-1` parallelises large batches over all cores.
+        """
+        chord, indices = self._tree.query(to_unit_vectors(lat, lon), k=k, workers=workers)
+        distances = np.where(np.isinf(chord), np.inf, chord_to_km(np.where(np.isinf(chord), 0, chord)))
+        return distances, indices
+
+    def within_radius(self, lat, lon, radius_km: float):
+        """Indices of sites within `radius_km` (a list per query point for array input)."""
+        return self._tree.query_ball_point(to_unit_vectors(lat, lon), r=float(km_to_chord(radius_km)))
+
+    def nearest_sites(self, lat: float, lon: float, k: int = 1) -> pd.DataFrame:
+        """Metadata of the `k` nearest sites with a `distance_km` column, closest first."""
+        distances, indices = self.nearest(lat, lon, k=k)
+        distances, indices = np.atleast_1d(distances), np.atleast_1d(indices)
+        found = indices < len(self)
+        result = self.sites.iloc[indices[found]].copy()
+        result['distance_km'] = distances[found]
+        return result.reset_index(drop=True)
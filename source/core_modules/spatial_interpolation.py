@@ -0,0 +1,122 @@
+"""
+Spatial interpolation of monthly PV yield from cached PVGIS sites.
+
+Monthly `E_m` is modelled as a per-month linear elevation trend plus a
+spatially smooth residual. The trend is fitted by least squares over all
+stored sites; residuals are interpolated by inverse-distance weighting of
+the k nearest sites (great-circle distance). The spread of the neighbour
+residuals around the interpolated value is returned as the error estimate.
+Queries are processed in chunks, so millions of points stay vectorised
+without large temporaries.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .results_store import ResultsStore
+from .spatial_index import SiteIndex
+
+# Distances below this are treated as an exact hit on a stored site
+_EXACT_HIT_KM = 1e-6
+
+
+class YieldInterpolator:
+    """Elevation-detrended inverse-distance interpolation of monthly yield."""
+
+    def __init__(self, latitudes, longitudes, elevations, monthly_yield,
+                 k: int = 8, power: float = 2.0, use_elevation: bool = True):
+        self.monthly_yield = np.asarray(monthly_yield, dtype=np.float64)
+        self.elevations = np.asarray(elevations, dtype=np.float64)
+        if self.monthly_yield.ndim != 2 or self.monthly_yield.shape[0] != len(self.elevations):
+            raise ValueError("monthly_yield must have shape (n_sites, n_months)")
+        self.k = min(k, len(self.elevations))
+        self.power = power
+        self.use_elevation = use_elevation
+        self.index = SiteIndex(latitudes, longitudes)
+
+        if use_elevation:
+            design = np.column_stack([np.ones_like(self.elevations), self.elevations])
+            self.trend_coefficients = np.linalg.lstsq(design, self.monthly_yield, rcond=None)[0]
+        else:
+            self.trend_coefficients = np.zeros((2, self.monthly_yield.shape[1]))
+            self.trend_coefficients[0] = self.monthly_yield.mean(axis=0)
+        self.residuals = self.monthly_yield - self._trend(self.elevations)
+
+    @classmethod
+    def from_results_store(cls, store: ResultsStore, per_kwp: bool = True, **kwargs) -> 'YieldInterpolator':
+        """Fit on every stored site with coordinates, elevation and 12 monthly `E_m` values."""
+        df = store.read(['latitude', 'longitude', 'elevation', 'peak_power_kW', 'E_m'])
+        df = df.dropna(subset=['latitude', 'longitude', 'elevation', 'E_m'])
+        monthly_yield = np.stack(df['E_m'].to_numpy()) if len(df) else np.empty((0, 12))
+        if per_kwp:
+            monthly_yield = monthly_yield / df['peak_power_kW'].to_numpy()[:, None]
+        return cls(df['latitude'].to_numpy(), df['longitude'].to_numpy(),
+                   df['elevation'].to_numpy(), monthly_yield, **kwargs)
+
+    def _trend(self, elevations) -> np.ndarray:
+        return self.trend_coefficients[0] + np.asarray(elevations, dtype=np.float64)[:, None] * self.trend_coefficients[1]
+
+    def _weights(self, distances: np.ndarray) -> np.ndarray:
+        exact = distances < _EXACT_HIT_KM
+        with np.errstate(divide='ignore'):
+            weights = 1.0 / distances ** self.power
+        # A query on top of a stored site takes that site's value
+        weights = np.where(exact.any(axis=1, keepdims=True), exact.astype(np.float64), weights)
+        return weights / weights.sum(axis=1, keepdims=True)
+
+    def predict(self, latitudes, longitudes, elevations=None,
+                chunk_size: int = 100_000) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Estimate monthly yield at query points.
+
+        Returns `(estimate, error)`, both `(n_points, n_months)`. Without
+        query `elevations`, the neighbours' IDW-weighted elevation is used,
+        which reduces to plain IDW of the yields.
+        """
+        if self.k == 0:
+            raise ValueError("No stored sites to interpolate from")
+        latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        if elevations is not None:
+            elevations = np.broadcast_to(np.asarray(elevations, dtype=np.float64), latitudes.shape)
+
+        n_months = self.monthly_yield.shape[1]
+        estimate = np.empty((len(latitudes), n_months))
+        error = np.empty((len(latitudes), n_months))
+        for start in range(0, len(latitudes), chunk_size):
+            stop = start + chunk_size
+            distances, indices = self.index.nearest(latitudes[start:stop], longitudes[start:stop],
+                                                    k=self.k, workers=-1)
+            distances = distances.reshape(len(distances), -1)
+            indices = indices.reshape(len(indices), -1)
+            weights = self._weights(distances)[:, :, None]
+
+            neighbour_residuals = self.residuals[indices]
+            residual = (weights * neighbour_residuals).sum(axis=1)
+            spread = (weights * (neighbour_residuals - residual[:, None, :]) ** 2).sum(axis=1)
+
+            if elevations is None:
+                query_elevation = (weights[:, :, 0] * self.elevations[indices]).sum(axis=1)
+            else:
+                query_elevation = elevations[start:stop]
+            estimate[start:stop] = self._trend(query_elevation) + residual
+            error[start:stop] = np.sqrt(spread)
+        return estimate, error
+
+    def cross_validate(self, sample: Optional[int] = None, seed: int = 0) -> np.ndarray:
+        """Leave-one-out RMSE per month (of the residual interpolation), optionally on a random sample of sites."""
+        n_sites = len(self.elevations)
+        if n_sites < 2:
+            raise ValueError(f"Leave-one-out cross-validation needs at least 2 sites, got {n_sites}")
+        sites = np.arange(n_sites)
+        if sample is not None and sample < n_sites:
+            sites = np.random.default_rng(seed).choice(n_sites, size=sample, replace=False)
+
+        # The nearest neighbour of a stored site is itself, so query k+1 and drop it
+        k = min(self.k + 1, n_sites)
+        distances, indices = self.index.nearest(self.index.latitudes[sites], self.index.longitudes[sites], k=k)
+        distances = distances.reshape(len(sites), -1)[:, 1:]
+        indices = indices.reshape(len(sites), -1)[:, 1:]
+        weights = self._weights(distances)[:, :, None]
+        predicted = (weights * self.residuals[indices]).sum(axis=1)
+        return np.sqrt(np.mean((predicted - self.residuals[sites]) ** 2, axis=0))
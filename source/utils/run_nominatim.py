@@ -1,11 +1,33 @@
-import requests
+# Run from the repository root: python -m source.utils.run_nominatim
+import numpy as np
 from geopy.geocoders import Nominatim
 
+from source.core_modules.dem_elevation import get_dem
+from source.core_modules.geocode_cache import GeocodeCache
+from source.core_modules.http_transport import http_get
 
-def get_city_data(city_name):
+GEOCODE_CACHE_PATH = "C:/dev/pyPVGIS/output/geocode_cache.sqlite"
+CACHE_SOURCE = "nominatim"
+
+
+def get_city_data(city_name, cache=None):
 	"""
     Retreives Latitude, Longitude, and Elevation for a given city.
+
+    With a GeocodeCache, cities geocoded before (with elevation) are answered
+    without any network call.
     """
+	if cache is not None:
+		cached = cache.get(city_name)
+		if cached is not None and cached["elevation"] is not None:
+			return {
+				"city": city_name,
+				"full_address": cached["display_name"] or cached["city"],
+				"latitude": cached["latitude"],
+				"longitude": cached["longitude"],
+				"elevation_meters": cached["elevation"]
+			}
+
 	# 1. Setup the Geolocator (Nominatim requires a unique user_agent)
 	geolocator = Nominatim(user_agent="geo_elevation_script_v1")
 
@@ -20,18 +42,32 @@ def get_city_data(city_name):
 		lat = location.latitude
 		lon = location.longitude
 
-		# 3. Get Elevation using Open-Elevation API
-		# We send a GET request to the public API with the coordinates
-		api_url = f"https://api.open-elevation.com/api/v1/lookup?locations={lat},{lon}"
-		response = requests.get(api_url)
-
-		if response.status_code == 200:
-			data = response.json()
-			# The API returns a list of results, we take the first one
-			elevation = data['results'][0]['elevation']
+		# 3. Get Elevation from local DEM tiles, falling back to the Open-Elevation API
+		dem = get_dem()
+		elevation = dem.elevation(lat, lon)[0] if dem is not None else np.nan
+		if not np.isnan(elevation):
+			elevation = round(float(elevation), 1)
 		else:
-			print("Error: Could not retrieve elevation data from API.")
-			elevation = "N/A"
+			# We send a GET request to the public API with the coordinates
+			api_url = f"https://api.open-elevation.com/api/v1/lookup?locations={lat},{lon}"
+			response = http_get(api_url)
+
+			if response.status_code == 200:
+				data = response.json()
+				# The API returns a list of results, we take the first one
+				elevation = data['results'][0]['elevation']
+			else:
+				print("Error: Could not retrieve elevation data from API.")
+				elevation = "N/A"
+
+		if cache is not None and elevation != "N/A":
+			cache.put(city_name, None, {
+				"city": city_name,
+				"display_name": location.address,
+				"latitude": lat,
+				"longitude": lon,
+				"elevation": elevation
+			}, source=CACHE_SOURCE)
 
 		return {
 			"city": city_name,
@@ -54,8 +90,9 @@ if __name__ == "__main__":
 	print(f"{'City':<15} | {'Lat':<10} | {'Lon':<10} | {'Elev (m)':<10}")
 	print("-" * 55)
 
-	for city in cities_to_check:
-		data = get_city_data(city)
-		if data:
-			print(
-				f"{data['city']:<15} | {data['latitude']:<10.4f} | {data['longitude']:<10.4f} | {data['elevation_meters']:<10}")
\ No newline at end of file
+	with GeocodeCache(GEOCODE_CACHE_PATH) as cache:
+		for city in cities_to_check:
+			data = get_city_data(city, cache=cache)
+			if data:
+				print(
+					f"{data['city']:<15} | {data['latitude']:<10.4f} | {data['longitude']:<10.4f} | {data['elevation_meters']:<10}")
\ No newline at end of file
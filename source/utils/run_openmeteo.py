@@ -1,58 +1,219 @@
+# Run from the repository root: python -m source.utils.run_openmeteo
 import os
 import csv
-import time
-import requests
-import shutil
+from itertools import islice
 
-def get_location_data(city_name):
+import numpy as np
+
+from source.core_modules.dem_elevation import get_dem
+from source.core_modules.enrichment_pipeline import chunked, finish_partial_csv, ordered_map, resume_partial_csv
+from source.core_modules.geocode_cache import GeocodeCache
+from source.core_modules.http_transport import default_transport, http_get
+
+GEOCODE_CACHE_PATH = "C:/dev/pyPVGIS/output/geocode_cache.sqlite"
+GEONAMES_FILE = None  # e.g. "C:/dev/pyPVGIS/input/geonames/cities1000.txt" to geocode offline
+GEONAMES_COUNTRY_FILE = None  # e.g. "C:/dev/pyPVGIS/input/geonames/countryInfo.txt" to match country names
+CACHE_SOURCE = "open-meteo"
+GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
+ELEVATION_URL = "https://api.open-meteo.com/v1/elevation"
+ELEVATION_BATCH_SIZE = 100  # coordinates per request (endpoint limit)
+LOOKUP_WORKERS = 8  # concurrent geocoding lookups
+GEOCODE_REQUESTS_PER_SECOND = 5  # shared across workers; cache and gazetteer hits are not limited
+FLUSH_ROWS = 500  # output rows between flushes to disk
+
+# Applies to every geocoding request the transport makes, retries included
+default_transport.set_rate_limit(GEOCODE_URL, GEOCODE_REQUESTS_PER_SECOND)
+
+def get_elevation(lat, lon):
+	"""
+	Elevation in metres for one coordinate, from local DEM tiles when they cover it,
+	otherwise from the Open-Meteo elevation API.
+	"""
+	dem = get_dem()
+	if dem is not None:
+		elevation = dem.elevation(lat, lon)[0]
+		if not np.isnan(elevation):
+			return round(float(elevation), 1)
+
+	elev_params = {"latitude": lat, "longitude": lon}
+	elev_response = http_get(ELEVATION_URL, params=elev_params)
+	elev_data = elev_response.json()
+	return elev_data["elevation"][0]
+
+def get_elevations(coordinates, batch_size=ELEVATION_BATCH_SIZE):
+	"""
+	Elevations for a list of (lat, lon), None where lookup failed.
+
+	Points covered by local DEM tiles are answered offline; the rest go to
+	Open-Meteo as comma-separated lists of up to `batch_size` coordinates per
+	request. A batch that fails or comes back incomplete is retried one
+	coordinate at a time.
+	"""
+	elevations = [None] * len(coordinates)
+	dem = get_dem()
+	if dem is not None and coordinates:
+		lats, lons = zip(*coordinates)
+		for i, elevation in enumerate(dem.elevation(lats, lons)):
+			if not np.isnan(elevation):
+				elevations[i] = round(float(elevation), 1)
+
+	remaining = [i for i, elevation in enumerate(elevations) if elevation is None]
+	for start in range(0, len(remaining), batch_size):
+		batch = remaining[start:start + batch_size]
+		elev_params = {
+			"latitude": ",".join(f"{coordinates[i][0]:.6f}" for i in batch),
+			"longitude": ",".join(f"{coordinates[i][1]:.6f}" for i in batch)
+		}
+		try:
+			batch_elevations = http_get(ELEVATION_URL, params=elev_params).json()["elevation"]
+			if len(batch_elevations) != len(batch):
+				raise ValueError(f"expected {len(batch)} elevations, got {len(batch_elevations)}")
+		except Exception as e:
+			print(f"Batch elevation request failed ({e}); retrying {len(batch)} points one by one")
+			batch_elevations = []
+			for i in batch:
+				try:
+					batch_elevations.append(get_elevation(*coordinates[i]))
+				except Exception as single_error:
+					print(f"Error fetching elevation for {coordinates[i]}: {single_error}")
+					batch_elevations.append(None)
+		for i, elevation in zip(batch, batch_elevations):
+			elevations[i] = elevation
+	return elevations
+
+def get_location_data(city_name, country=None, cache=None, with_elevation=True):
 	"""
 	Retrieves Latitude, Longitude, and Elevation using Open-Meteo (No API Key required).
+
+	With a GeocodeCache, known names (or gazetteer entries) are answered locally
+	and new network results are stored for the next run. With
+	`with_elevation=False` the elevation is left as None unless already cached,
+	so the caller can batch the elevation requests (and store the completed
+	record in the cache itself).
 	"""
 	try:
-		# 1. Geocoding: Convert City Name -> Lat/Lon
-		geo_url = "https://geocoding-api.open-meteo.com/v1/search"
-		geo_params = {
-			"name": city_name,
-			"count": 1,
-			"language": "en",
-			"format": "json"
-		}
-		geo_response = requests.get(geo_url, params=geo_params)
-		geo_data = geo_response.json()
+		cached = cache.get(city_name, country) if cache is not None else None
+		if cached is not None and cached["elevation"] is not None:
+			location_data = {key: cached[key] for key in ("city", "country", "latitude", "longitude", "elevation")}
+			return {**location_data, "source": "cache"}
 
-		if "results" not in geo_data:
-			print(f"Error: City '{city_name}' not found.")
-			return None
+		if cached is not None:
+			# Gazetteer hit without elevation: only the elevation needs the network
+			name, country_name = cached["city"], cached["country"]
+			lat, lon = cached["latitude"], cached["longitude"]
+		else:
+			# 1. Geocoding: Convert City Name -> Lat/Lon
+			geo_params = {
+				"name": city_name,
+				"count": 1,
+				"language": "en",
+				"format": "json"
+			}
+			geo_response = http_get(GEOCODE_URL, params=geo_params)
+			geo_data = geo_response.json()
 
-		result = geo_data["results"][0]
-		lat = result["latitude"]
-		lon = result["longitude"]
-		country = result.get("country", "Unknown")
-		name = result["name"]
+			if "results" not in geo_data:
+				print(f"Error: City '{city_name}' not found.")
+				return None
+
+			result = geo_data["results"][0]
+			lat = result["latitude"]
+			lon = result["longitude"]
+			country_name = result.get("country", "Unknown")
+			name = result["name"]
 
 		# 2. Elevation: Get Altitude from Lat/Lon
-		elev_url = "https://api.open-meteo.com/v1/elevation"
-		elev_params = {"latitude": lat, "longitude": lon}
-		elev_response = requests.get(elev_url, params=elev_params)
-		elev_data = elev_response.json()
-		elevation = elev_data["elevation"][0]
+		elevation = get_elevation(lat, lon) if with_elevation else None
 
-		return {
+		location_data = {
 			"city": name,
-			"country": country,
+			"country": country_name,
 			"latitude": lat,
 			"longitude": lon,
-			"elevation": elevation
+			"elevation": elevation,
+			# Provenance of the coordinates: the gazetteer for a gazetteer hit, else Open-Meteo
+			"source": cached["source"] if cached is not None else CACHE_SOURCE
 		}
+		if cache is not None and elevation is not None:
+			cache.put(city_name, country, location_data, source=location_data["source"])
+		return location_data
 	except Exception as e:
 		print(f"Error processing {city_name}: {e}")
 		return None
 
+def geocode_row(row, cache):
+	"""
+	Geocode one input row if it has missing data (elevation left for batching).
+
+	Returns (row, location_data), with location_data None when the row needs
+	no update or could not be geocoded.
+	"""
+	if row.get('latitude') and row.get('longitude') and row.get('elevation'):
+		return row, None
+	# DictReader fills the missing fields of a short row with None
+	city = (row.get('city') or '').strip()
+	country = (row.get('country') or '').strip()
+	print(f"Fetching missing data for {city}...")
+	location_data = get_location_data(city, country, cache=cache, with_elevation=False)
+	if location_data and location_data['source'] != 'cache':
+		location_data['cache_key'] = (city, country)
+	return row, location_data
+
+def complete_rows(geocoded, cache):
+	"""
+	Fill in elevations for a chunk of geocoded rows with one batched lookup and apply the results.
+	"""
+	missing = [location_data for _, location_data in geocoded
+			   if location_data is not None and location_data['elevation'] is None]
+	if missing:
+		elevations = get_elevations([(loc['latitude'], loc['longitude']) for loc in missing])
+		for location_data, elevation in zip(missing, elevations):
+			location_data['elevation'] = elevation
+
+	rows = []
+	for row, location_data in geocoded:
+		if location_data is not None and location_data['elevation'] is not None:
+			if 'cache_key' in location_data:
+				cache.put(*location_data['cache_key'], location_data, source=location_data['source'])
+			row.update({
+				'city': location_data['city'],
+				'country': location_data['country'],
+				'latitude': f"{location_data['latitude']:.4f}",
+				'longitude': f"{location_data['longitude']:.4f}",
+				'elevation': location_data['elevation'],
+				'run': 'yes'
+			})
+			if not row.get('azimuth_cw'): row['azimuth_cw'] = 0
+			if not row.get('azimuth_aw'): row['azimuth_aw'] = 180
+		rows.append(row)
+	return rows
+
+def open_geocode_cache():
+	cache = GeocodeCache(GEOCODE_CACHE_PATH)
+	if GEONAMES_COUNTRY_FILE:
+		cache.load_geonames_countries(GEONAMES_COUNTRY_FILE)
+	if GEONAMES_FILE:
+		print(f"Gazetteer rows loaded: {cache.load_geonames(GEONAMES_FILE)}")
+	return cache
+
 # --- Main Execution ---
 if __name__ == "__main__":
 	input_filename = "C:/dev/pyPVGIS/input/test_sites_LL.csv"
 	temp_filename = input_filename + ".tmp"
 
+	# A temp file left by an interrupted run holds the first rows already enriched,
+	# provided the input has not been edited since
+	try:
+		resumed_rows = resume_partial_csv(temp_filename, source=input_filename)
+	except FileNotFoundError:
+		raise SystemExit(f"Error: Input file not found at {input_filename}")
+	except ValueError as e:
+		raise SystemExit(f"Error: cannot resume: {e}")
+	if resumed_rows:
+		print(f"Resuming after {resumed_rows} rows already written to {temp_filename}")
+
+	cache = open_geocode_cache()
+
 	try:
 		with open(input_filename, 'r', newline='', encoding='utf-8') as infile:
 			reader = csv.DictReader(infile)
@@ -62,37 +223,24 @@ if __name__ == "__main__":
 			if 'run' not in output_headers:
 				output_headers.append('run')
 
-			with open(temp_filename, 'w', newline='', encoding='utf-8') as outfile:
+			with open(temp_filename, 'a' if resumed_rows else 'w', newline='', encoding='utf-8') as outfile:
 				writer = csv.DictWriter(outfile, fieldnames=output_headers, extrasaction='ignore')
-				writer.writeheader()
-
-				for row in reader:
-					city = row.get('city', '').strip()
-					if not city:
-						continue
-
-					needs_update = not (row.get('latitude') and row.get('longitude') and row.get('elevation'))
-
-					if needs_update:
-						print(f"Fetching missing data for {city}...")
-						location_data = get_location_data(city)
-						
-						if location_data:
-							row.update({
-								'city': location_data['city'],
-								'country': location_data['country'],
-								'latitude': f"{location_data['latitude']:.4f}",
-								'longitude': f"{location_data['longitude']:.4f}",
-								'elevation': location_data['elevation'],
-								'run': 'yes'
-							})
-							if not row.get('azimuth_cw'): row['azimuth_cw'] = 0
-							if not row.get('azimuth_aw'): row['azimuth_aw'] = 180
-							time.sleep(0.2)
-					
-					writer.writerow(row)
-
-		shutil.move(temp_filename, input_filename)
+				if not resumed_rows:
+					writer.writeheader()
+
+				# Reader -> concurrent geocoding (in input order) -> batched elevation -> writer
+				rows = islice((row for row in reader if (row.get('city') or '').strip()), resumed_rows, None)
+				geocoded = ordered_map(lambda row: geocode_row(row, cache), rows, workers=LOOKUP_WORKERS)
+				unflushed = 0
+				for chunk in chunked(geocoded, ELEVATION_BATCH_SIZE):
+					writer.writerows(complete_rows(chunk, cache))
+					unflushed += len(chunk)
+					if unflushed >= FLUSH_ROWS:
+						outfile.flush()
+						os.fsync(outfile.fileno())
+						unflushed = 0
+
+		finish_partial_csv(temp_filename, input_filename)
 		print(f"Successfully updated {input_filename}")
 
 	except FileNotFoundError:
@@ -100,4 +248,7 @@ if __name__ == "__main__":
 	except Exception as e:
 		print(f"An unexpected error occurred: {e}")
 		if os.path.exists(temp_filename):
-			os.remove(temp_filename)
+			print(f"Rows enriched so far are kept in {temp_filename}; rerun to resume.")
+	finally:
+		print(f"Geocode cache: {cache.hits} hits, {cache.misses} misses")
+		cache.close()
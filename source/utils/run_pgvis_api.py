@@ -1,10 +1,16 @@
+# Run from the repository root: python -m source.utils.run_pgvis_api
 import os
 import json
-import time
-import requests
 import pandas as pd
 import csv
 
+from source.core_modules.checkpoint import CheckpointJournal
+from source.core_modules.http_transport import default_transport
+from source.core_modules.pvgis_cache import ResponseCache, make_cache_key
+from source.core_modules.portfolio_array import build_portfolio_array
+from source.core_modules.pvgis_client import PVGISBatchClient
+from source.core_modules.results_store import ResultsStore, record_from_response
+
 # ==========================================
 # 1. SETUP & CONFIGURATION
 # ==========================================
@@ -31,9 +37,93 @@ PVGIS_PARAMS = {
 	'usehorizon': 1,
 }
 
+# Batch client limits (PVGIS allows at most 30 calls/second per IP)
+MAX_CONCURRENT_REQUESTS = 8
+MAX_REQUESTS_PER_SECOND = 25
+
+# On-disk response cache: re-runs of unchanged sites never touch the network
+cache_folder = os.path.join(output_folder, 'pvgis_cache')
+CACHE_TTL_SECONDS = 30 * 24 * 3600
+CACHE_MAX_ENTRIES = 100_000
+
+# Checkpoint journal: completed sites are skipped when an interrupted run is restarted
+JOURNAL_PATH = os.path.join(output_folder, 'run_pgvis_api_journal.jsonl')
+RETRY_FAILED_ONLY = False  # True: only re-run sites whose last recorded outcome was a failure
+
+# Columnar results store (Parquet, partitioned by country) replacing per-site JSON + CSV pairs
+results_store_folder = os.path.join(output_folder, 'results_store')
+STORE_FLUSH_ROWS = 500
+WRITE_PER_SITE_FILES = False  # True: also write the legacy <city>_<country>.json / _monthly.csv files
+
+# Memory-mapped (n_sites, 12, n_vars) float32 snapshot of the store for fast analytics
+PORTFOLIO_ARRAY_PATH = os.path.join(output_folder, 'portfolio_monthly.npy')
+
 
 # ==========================================
-# 2. MAIN EXECUTION
+# 2. RESULT HANDLING
+# ==========================================
+
+def save_site_results(city, country, data):
+	"""Write the full PVcalc JSON and the monthly time series CSV for one site."""
+	# --- 1. Save Full JSON Output ---
+	json_filename = f"{city.replace(' ', '_')}_{country.replace(' ', '_')}.json"
+	json_path = os.path.join(output_folder, json_filename)
+	with open(json_path, 'w') as f:
+		json.dump(data, f, indent=4)
+	print(f"Saved full JSON results to {json_path}")
+
+	# --- 2. Save Monthly Time Series CSV ---
+	monthly_data = data.get('outputs', {}).get('monthly', {}).get('fixed', [])
+	if monthly_data:
+		csv_filename = f"{city.replace(' ', '_')}_{country.replace(' ', '_')}_monthly.csv"
+		csv_path = os.path.join(output_folder, csv_filename)
+
+		with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
+			writer = csv.writer(csvfile)
+			# Write header from the keys of the first month's dictionary
+			writer.writerow(monthly_data[0].keys())
+			# Write data rows
+			for month in monthly_data:
+				writer.writerow(month.values())
+		print(f"Saved monthly CSV to {csv_path}")
+
+
+def mark_completed(journal, pending):
+	"""Record sites whose rows have reached the results store as completed."""
+	for site_key, city, country in pending:
+		journal.record_ok(site_key, city=city, country=country)
+	pending.clear()
+
+
+def handle_result(result, store, journal, pending):
+	"""Store one completed batch request; its journal entry is written once the row is on disk."""
+	city, country = result['key']
+	site_key = make_cache_key(result['params'])
+	if result['error'] is not None:
+		if result['status'] is None:
+			print(f"Script Error on {city}: {result['error']}")
+		else:
+			print(f"API Error {result['status']} for {city}: {result['error']}")
+		journal.record_failed(site_key, result['error'], city=city, country=country, http_status=result['status'])
+		return
+
+	try:
+		if WRITE_PER_SITE_FILES:
+			save_site_results(city, country, result['data'])
+		record = record_from_response(site_key, city, country, result['data'])
+	except Exception as e:
+		print(f"Script Error on {city}: {e}")
+		journal.record_failed(site_key, str(e), city=city, country=country)
+		return
+
+	print(f"Fetched results for {city}, {country}")
+	pending.append((site_key, city, country))
+	if store.add(record):
+		mark_completed(journal, pending)
+
+
+# ==========================================
+# 3. MAIN EXECUTION
 # ==========================================
 
 # Define the specific input file
@@ -47,7 +137,14 @@ else:
 	# Load the CSV
 	df_csv = pd.read_csv(input_csv_path)
 
-	# --- API Loop ---
+	journal = CheckpointJournal(JOURNAL_PATH)
+	if journal.corrupt_lines:
+		print(f"Warning: skipped unreadable journal lines {journal.corrupt_lines} in {JOURNAL_PATH}")
+	failed_keys = journal.failed
+
+	# --- Build the batch of runnable sites ---
+	jobs = []
+	skipped = 0
 	for idx, row in df_csv.iterrows():
 		run_flag = str(row.get('run', '')).lower()
 		if run_flag not in ['1', 'true', 'yes']:
@@ -59,44 +156,44 @@ else:
 		country = row['country']
 		azimuth_val = 180  # Hardcode to South-facing
 
-		print(f"Processing {city}, {country} for South-facing panels (180 deg)...")
-
 		request_params = PVGIS_PARAMS.copy()
 		request_params.update({'lat': lat, 'lon': lon, 'azimuth': azimuth_val})
 
+		site_key = make_cache_key(request_params)
+		if journal.is_completed(site_key) or (RETRY_FAILED_ONLY and site_key not in failed_keys):
+			skipped += 1
+			continue
+
+		print(f"Queueing {city}, {country} for South-facing panels (180 deg)...")
+		jobs.append(((city, country), request_params))
+
+	if skipped:
+		print(f"Skipping {skipped} site(s) already recorded in {JOURNAL_PATH}")
+
+	# --- Concurrent API calls, rate-limited to the PVGIS quota ---
+	cache = ResponseCache(cache_folder, ttl_seconds=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES)
+	client = PVGISBatchClient(URL_CALC, max_concurrency=MAX_CONCURRENT_REQUESTS,
+	                          rate_per_second=MAX_REQUESTS_PER_SECOND, cache=cache)
+	store = ResultsStore(results_store_folder, flush_rows=STORE_FLUSH_ROWS)
+	pending = []
+	with journal:
 		try:
-			response = requests.get(URL_CALC, params=request_params)
-			if response.status_code == 200:
-				data = response.json()
-				
-				# --- 1. Save Full JSON Output ---
-				json_filename = f"{city.replace(' ', '_')}_{country.replace(' ', '_')}.json"
-				json_path = os.path.join(output_folder, json_filename)
-				with open(json_path, 'w') as f:
-					json.dump(data, f, indent=4)
-				print(f"Saved full JSON results to {json_path}")
-
-				# --- 2. Save Monthly Time Series CSV ---
-				monthly_data = data.get('outputs', {}).get('monthly', {}).get('fixed', [])
-				if monthly_data:
-					csv_filename = f"{city.replace(' ', '_')}_{country.replace(' ', '_')}_monthly.csv"
-					csv_path = os.path.join(output_folder, csv_filename)
-					
-					with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-						writer = csv.writer(csvfile)
-						# Write header from the keys of the first month's dictionary
-						writer.writerow(monthly_data[0].keys())
-						# Write data rows
-						for month in monthly_data:
-							writer.writerow(month.values())
-					print(f"Saved monthly CSV to {csv_path}")
-
-			else:
-				print(f"API Error {response.status_code} for {city}: {response.text}")
-		
-		except Exception as e:
-			print(f"Script Error on {city}: {e}")
-		
-		time.sleep(0.2)
+			client.run_batch(jobs, on_result=lambda result: handle_result(result, store, journal, pending))
+		finally:
+			store.flush()
+			mark_completed(journal, pending)
+	print(f"Results store: {results_store_folder}")
+
+	portfolio = build_portfolio_array(store, PORTFOLIO_ARRAY_PATH)
+	print(f"Portfolio array: {PORTFOLIO_ARRAY_PATH} {portfolio.data.shape}")
+
+	print(f"Cache: {cache.hits} hits, {cache.misses} misses ({len(cache)} entries)")
+	for host, stats in default_transport.metrics().items():
+		print(f"{host}: {stats['requests']} requests, {stats['retries']} retries, "
+		      f"{stats['errors']} errors, mean latency {stats['mean_latency_s']:.2f} s")
+
+	remaining_failures = len(journal.failed)
+	if remaining_failures:
+		print(f"{remaining_failures} site(s) failed; set RETRY_FAILED_ONLY = True to retry just those.")
 
 	print("Finished processing all runnable sites.")
@@ -1,7 +1,20 @@
+# Run from the repository root: python -m source.utils.run_pv_boiler_tradeoff_optimization
 import pandas as pd
 import numpy as np
 import os
-import matplotlib.pyplot as plt
+import json
+
+from source.core_modules.pv_boiler_hourly import (distribute_monthly, find_optimal_pv_size_hourly,
+                                                   hourly_yield_from_seriescalc)
+from source.core_modules.pv_boiler_model import (calculate_capital_recovery_factor, evaluate_size_sweep,
+                                                  find_optimal_pv_size, simulate_energy_balance)
+from source.core_modules.demand_loader import load_demand_directory, load_demand_file
+from source.core_modules.portfolio_array import PortfolioArray
+from source.core_modules.portfolio_optimization import run_portfolio_optimization, site_yields_per_kwp
+from source.core_modules.pv_storage_model import optimize_pv_and_storage
+from source.core_modules.report_figures import render_batch, render_figure
+from source.core_modules.results_store import ResultsStore
+from source.core_modules.sensitivity import latin_hypercube, run_sensitivity, summarize_sensitivity
 
 # ==========================================
 # 1. CONFIGURATION & ASSUMPTIONS (REVISED MODEL)
@@ -19,6 +32,39 @@ HEAT_PUMP_COP = 3.5
 COOLING_EER = 3.5
 GRID_IMPORT_PRICE_KWH = 0.16
 
+# --- PV Size Sweep (kWp) ---
+PV_SIZE_MIN_KWP = 0
+PV_SIZE_MAX_KWP = 25
+PV_SIZE_STEP_KWP = 0.5
+
+# --- Sensitivity Analysis (Latin hypercube over these ranges; set RUN_SENSITIVITY to enable) ---
+RUN_SENSITIVITY = False
+SENSITIVITY_DRAWS = 100_000
+SENSITIVITY_RANGES = {
+    'cost_per_kwp_installed': (1000, 2000),
+    'grid_export_price_kwh': (0.0, 0.06),
+    'biomass_cost_per_kwh': (0.06, 0.12),
+    'loan_interest_rate': (0.02, 0.10),
+    'heat_pump_cop': (2.5, 4.5),
+    'cooling_eer': (2.5, 4.5),
+}
+
+# --- Portfolio Mode (every demand file in DEMAND_FOLDER against every stored site; set RUN_PORTFOLIO to enable) ---
+RUN_PORTFOLIO = False
+PORTFOLIO_BATCH_SIZE = 20_000
+RENDER_PORTFOLIO_FIGURES = False  # monthly balance chart per building at its best site (headless, process pool)
+
+# --- Hourly Mode (8760 balance from a PVGIS seriescalc response; set RUN_HOURLY to enable) ---
+RUN_HOURLY = False
+DAILY_DEMAND_PROFILE = None  # 24 relative hourly weights for spreading monthly demand; None = flat
+
+# --- Storage Sizing (hourly PV x battery x tank grid; set RUN_STORAGE to enable, needs HOURLY_SERIES_FILE) ---
+RUN_STORAGE = False
+COST_PER_KWH_BATTERY = 450
+COST_PER_KWH_TANK = 40
+BATTERY_SIZES_KWH = [0, 2.5, 5, 7.5, 10, 15]
+TANK_SIZES_KWH = [0, 5, 10, 20, 40]
+
 # --- File Paths ---
 project_root = r'C:\dev\pyPVGIS'
 input_folder = os.path.join(project_root, 'input')
@@ -27,123 +73,221 @@ os.makedirs(output_folder, exist_ok=True)
 
 DEMAND_FILE = os.path.join(input_folder, 'ejemploi_2526_option1_config1.csv')
 IRRADIATION_FILE = os.path.join(output_folder, 'Albarracín_Spain_monthly.csv')
+RESULTS_STORE_FOLDER = os.path.join(output_folder, 'results_store')
+IRRADIATION_SITE = ('Albarracín', 'Spain')  # (city, country) looked up in the results store first
+DEMAND_FOLDER = os.path.join(input_folder, 'demand')
+PORTFOLIO_ARRAY_PATH = os.path.join(output_folder, 'portfolio_monthly.npy')
+PORTFOLIO_PAIRS_FILE = os.path.join(input_folder, 'portfolio_pairs.csv')  # optional building_id,site_key pairs
+HOURLY_SERIES_FILE = os.path.join(output_folder, 'Albarracín_Spain_seriescalc.json')  # pvcalculation=1, peakpower=1
+PORTFOLIO_RESULTS_FILE = os.path.join(output_folder, 'portfolio_optimization.parquet')
+PORTFOLIO_FIGURES_FOLDER = os.path.join(output_folder, 'portfolio_figures')
 
 
 # ==========================================
 # 2. FUNCTIONS
 # ==========================================
 
-def calculate_capital_recovery_factor(rate, years):
-    if rate == 0: return 1 / years
-    return (rate * (1 + rate)**years) / ((1 + rate)**years - 1)
+def load_monthly_pv_generation_per_kwp():
+    """Monthly E_m per kWp for IRRADIATION_SITE, from the results store or the legacy monthly CSV."""
+    city, country = IRRADIATION_SITE
+    if os.path.isdir(RESULTS_STORE_FOLDER):
+        site_df = ResultsStore(RESULTS_STORE_FOLDER).read(['city', 'peak_power_kW', 'E_m'], countries=[country])
+        site_df = site_df[site_df['city'] == city]
+        if not site_df.empty:
+            site = site_df.iloc[-1]
+            return pd.Series(site['E_m'], name='E_m') / site['peak_power_kW']
+    return pd.read_csv(IRRADIATION_FILE)['E_m']
+
+def load_inputs():
+    """Monthly DHW, heating and cooling demand (kWh) and PV generation per kWp."""
+    demand_acs, demand_cal, demand_cool = load_demand_file(DEMAND_FILE)
+    monthly_pv_generation_per_kwp = load_monthly_pv_generation_per_kwp()
+    return demand_acs, demand_cal, demand_cool, monthly_pv_generation_per_kwp
+
+def pv_size_grid():
+    return np.arange(PV_SIZE_MIN_KWP, PV_SIZE_MAX_KWP + PV_SIZE_STEP_KWP / 2, PV_SIZE_STEP_KWP)
 
 def run_optimization():
     # --- Load and Clean Data ---
     try:
-        demand_df = pd.read_csv(DEMAND_FILE)
-        pv_generation_df = pd.read_csv(IRRADIATION_FILE)
+        demand_acs, demand_cal, demand_cool, monthly_pv_generation_per_kwp = load_inputs()
     except FileNotFoundError as e:
         print(f"Error: Could not find input file - {e}")
         return
 
-    demand_df.columns = demand_df.columns.str.strip()
-    def clean_and_convert_to_numeric(series):
-        return pd.to_numeric(series.str.replace(',', '').str.strip(), errors='coerce').fillna(0) / 1000
+    # --- Run Simulation (all sizes at once, as (n_sizes, 12) arrays) ---
+    crf = calculate_capital_recovery_factor(LOAN_INTEREST_RATE, LOAN_YEARS)
+    model_params = dict(
+        cost_per_kwp_installed=COST_PER_KWP_INSTALLED, capital_recovery_factor=crf,
+        biomass_cost_per_kwh=BIOMASS_COST_PER_KWH, grid_import_price_kwh=GRID_IMPORT_PRICE_KWH,
+        grid_export_price_kwh=GRID_EXPORT_PRICE_KWH, heat_pump_cop=HEAT_PUMP_COP, cooling_eer=COOLING_EER,
+    )
 
-    demand_acs = clean_and_convert_to_numeric(demand_df['demandaACS (Wh)'])
-    demand_cal = clean_and_convert_to_numeric(demand_df['demandaCAL (Wh)'])
-    demand_cool = clean_and_convert_to_numeric(demand_df['demandaREF (Wh)'])
-    monthly_pv_generation_per_kwp = pv_generation_df['E_m']
+    # --- Find the Optimum (exact, not limited to the sweep grid) ---
+    optimum = find_optimal_pv_size(monthly_pv_generation_per_kwp, demand_acs, demand_cal, demand_cool,
+                                   min_kwp=PV_SIZE_MIN_KWP, max_kwp=PV_SIZE_MAX_KWP, **model_params)
+    optimal_kwp = float(optimum['optimal_kwp'])
 
-    # --- Run Simulation ---
-    crf = calculate_capital_recovery_factor(LOAN_INTEREST_RATE, LOAN_YEARS)
-    results = []
-    
-    for pv_size_kwp in np.arange(0, 25.5, 0.5):
-        initial_investment = pv_size_kwp * COST_PER_KWP_INSTALLED
-        annualized_pv_cost = initial_investment * crf
-        monthly_pv_generation_elec = monthly_pv_generation_per_kwp * pv_size_kwp
-        
-        elec_needed_for_cooling = demand_cool / COOLING_EER
-        elec_from_pv_for_cooling = np.minimum(monthly_pv_generation_elec, elec_needed_for_cooling)
-        unmet_cooling_elec_demand = elec_needed_for_cooling - elec_from_pv_for_cooling
-        
-        elec_remaining_after_cooling = monthly_pv_generation_elec - elec_from_pv_for_cooling
-        heat_from_pv_thermal = elec_remaining_after_cooling * HEAT_PUMP_COP
-        
-        unmet_heating_demand_thermal = np.maximum(0, (demand_acs + demand_cal) - heat_from_pv_thermal)
-        
-        cost_of_grid_imports = unmet_cooling_elec_demand.sum() * GRID_IMPORT_PRICE_KWH
-        cost_of_biomass = unmet_heating_demand_thermal.sum() * BIOMASS_COST_PER_KWH
-        
-        elec_used_for_heating = np.minimum(elec_remaining_after_cooling, (demand_acs + demand_cal) / HEAT_PUMP_COP)
-        surplus_elec = elec_remaining_after_cooling - elec_used_for_heating
-        revenue_from_exports = surplus_elec.sum() * GRID_EXPORT_PRICE_KWH
-        
-        total_annual_cost = (annualized_pv_cost + cost_of_biomass + cost_of_grid_imports - revenue_from_exports)
-        
-        results.append({'pv_size_kwp': pv_size_kwp, 'total_annual_cost': total_annual_cost})
-
-    # --- Find and Print the Optimum ---
-    results_df = pd.DataFrame(results)
-    optimal_result = results_df.loc[results_df['total_annual_cost'].idxmin()]
-    
-    cost_no_pv_heating = (demand_acs.sum() + demand_cal.sum()) * BIOMASS_COST_PER_KWH
-    cost_no_pv_cooling = (demand_cool.sum() / COOLING_EER) * GRID_IMPORT_PRICE_KWH
-    cost_no_pv = cost_no_pv_heating + cost_no_pv_cooling
-    results_df['annual_savings'] = cost_no_pv - results_df['total_annual_cost']
+    # The optimum is added to the plotted sweep so the savings curve peaks where it is marked
+    sweep = evaluate_size_sweep(np.union1d(pv_size_grid(), [optimal_kwp]), monthly_pv_generation_per_kwp,
+                                demand_acs, demand_cal, demand_cool, **model_params)
+    results_df = pd.DataFrame({key: sweep[key] for key in ('pv_size_kwp', 'total_annual_cost', 'annual_savings')})
     
     print("--- PV System Optimization Results (Advanced Model - Corrected) ---")
-    print(f"Optimal PV System Size: {optimal_result['pv_size_kwp']:.1f} kWp")
+    print(f"Optimal PV System Size: {optimal_kwp:.2f} kWp")
+    print(f"Annual Savings at Optimum: {float(optimum['annual_savings']):,.2f} EUR")
     
     # --- Generate Plots ---
-    plot_savings_vs_kwp(results_df)
-    plot_monthly_energy_balance(optimal_result['pv_size_kwp'], demand_acs, demand_cal, demand_cool, monthly_pv_generation_per_kwp)
+    plot_savings_vs_kwp(results_df, optimal_kwp)
+    plot_monthly_energy_balance(optimal_kwp, demand_acs, demand_cal, demand_cool, monthly_pv_generation_per_kwp)
     
     print(f"\nCharts have been saved to the '{output_folder}' directory.")
 
-def plot_savings_vs_kwp(results_df):
-    plt.figure(figsize=(10, 6))
-    optimal_kwp = results_df.loc[results_df['annual_savings'].idxmax()]['pv_size_kwp']
-    plt.plot(results_df['pv_size_kwp'], results_df['annual_savings'], marker='.', linestyle='-')
-    plt.axvline(x=optimal_kwp, color='r', linestyle='--', label=f"Optimal Size: {optimal_kwp:.1f} kWp")
-    plt.title('Estimated Annual Savings vs. PV System Size (Advanced Model)')
-    plt.xlabel('PV System Size (kWp)')
-    plt.ylabel('Annual Savings (EUR)')
-    plt.xlim(0, 3)
-    plt.ylim(bottom=0) # Set Y-axis to start at 0
-    plt.grid(True)
-    plt.legend()
-    plt.savefig(os.path.join(output_folder, 'optimization_savings_vs_kwp_advanced.png'))
-    plt.close()
+def run_sensitivity_analysis():
+    try:
+        demand_acs, demand_cal, demand_cool, monthly_pv_generation_per_kwp = load_inputs()
+    except FileNotFoundError as e:
+        print(f"Error: Could not find input file - {e}")
+        return
 
-def plot_monthly_energy_balance(optimal_kwp, demand_acs, demand_cal, demand_cool, pv_gen_per_kwp):
-    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    
-    monthly_pv_generation_elec = pv_gen_per_kwp * optimal_kwp
-    elec_needed_for_cooling = demand_cool / COOLING_EER
-    elec_from_pv_for_cooling = np.minimum(monthly_pv_generation_elec, elec_needed_for_cooling)
-    elec_remaining_after_cooling = monthly_pv_generation_elec - elec_from_pv_for_cooling
-    heat_from_pv_thermal = elec_remaining_after_cooling * HEAT_PUMP_COP
-    
-    total_pv_supply_equivalent = (elec_from_pv_for_cooling * COOLING_EER) + heat_from_pv_thermal
+    fixed = {
+        'cost_per_kwp_installed': COST_PER_KWP_INSTALLED,
+        'grid_export_price_kwh': GRID_EXPORT_PRICE_KWH,
+        'grid_import_price_kwh': GRID_IMPORT_PRICE_KWH,
+        'biomass_cost_per_kwh': BIOMASS_COST_PER_KWH,
+        'loan_interest_rate': LOAN_INTEREST_RATE,
+        'heat_pump_cop': HEAT_PUMP_COP,
+        'cooling_eer': COOLING_EER,
+    }
+    samples = latin_hypercube(SENSITIVITY_DRAWS, SENSITIVITY_RANGES, seed=0)
+    results_df = run_sensitivity(samples, fixed, monthly_pv_generation_per_kwp, demand_acs, demand_cal, demand_cool,
+                                 LOAN_YEARS, min_kwp=PV_SIZE_MIN_KWP, max_kwp=PV_SIZE_MAX_KWP,
+                                 workers=os.cpu_count())
 
-    plt.figure(figsize=(12, 7))
-    
-    plt.bar(months, demand_acs, label='DHW Demand', color='#1f77b4')
-    plt.bar(months, demand_cal, bottom=demand_acs, label='Heating Demand', color='#ff7f0e')
-    plt.bar(months, demand_cool, bottom=demand_acs + demand_cal, label='Cooling Demand', color='#d62728')
-    
-    plt.plot(months, total_pv_supply_equivalent, marker='o', linestyle='--', color='black', label='Total Supply from PV')
-    
-    plt.title(f'Monthly Energy Demand & PV Supply for Optimal {optimal_kwp:.1f} kWp System')
-    plt.xlabel('Month')
-    plt.ylabel('Energy (kWh)')
-    plt.legend()
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_folder, 'optimal_monthly_energy_balance.png'))
-    plt.close()
+    results_path = os.path.join(output_folder, 'sensitivity_results.csv')
+    results_df.to_csv(results_path, index=False)
+    print(f"--- Sensitivity Analysis ({SENSITIVITY_DRAWS} draws) ---")
+    print(summarize_sensitivity(results_df).to_string(float_format=lambda v: f"{v:,.2f}"))
+    print(f"\nDraw-level results saved to '{results_path}'.")
+
+def run_portfolio_analysis():
+    building_ids, demand = load_demand_directory(DEMAND_FOLDER, workers=os.cpu_count())
+
+    if os.path.exists(PORTFOLIO_ARRAY_PATH):
+        site_keys, yields = site_yields_per_kwp(PortfolioArray(PORTFOLIO_ARRAY_PATH))
+    else:
+        site_keys, yields = site_yields_per_kwp(ResultsStore(RESULTS_STORE_FOLDER))
+    pairs = pd.read_csv(PORTFOLIO_PAIRS_FILE, dtype=str) if os.path.exists(PORTFOLIO_PAIRS_FILE) else None
+
+    n_pairs = run_portfolio_optimization(
+        building_ids, demand, site_keys, yields, PORTFOLIO_RESULTS_FILE, pairs=pairs,
+        batch_size=PORTFOLIO_BATCH_SIZE, workers=os.cpu_count(),
+        cost_per_kwp_installed=COST_PER_KWP_INSTALLED,
+        capital_recovery_factor=calculate_capital_recovery_factor(LOAN_INTEREST_RATE, LOAN_YEARS),
+        biomass_cost_per_kwh=BIOMASS_COST_PER_KWH, grid_import_price_kwh=GRID_IMPORT_PRICE_KWH,
+        grid_export_price_kwh=GRID_EXPORT_PRICE_KWH, heat_pump_cop=HEAT_PUMP_COP, cooling_eer=COOLING_EER,
+        min_kwp=PV_SIZE_MIN_KWP, max_kwp=PV_SIZE_MAX_KWP,
+    )
+    print(f"--- Portfolio Optimization ({len(building_ids)} buildings x {len(site_keys)} sites) ---")
+    print(f"{n_pairs} building/site pairs saved to '{PORTFOLIO_RESULTS_FILE}'.")
+
+    if RENDER_PORTFOLIO_FIGURES:
+        paths = render_portfolio_figures(building_ids, demand, site_keys, yields)
+        print(f"{len(paths)} charts saved to '{PORTFOLIO_FIGURES_FOLDER}'.")
+
+def render_portfolio_figures(building_ids, demand, site_keys, yields):
+    """Monthly energy balance chart for every building at its highest-savings site."""
+    os.makedirs(PORTFOLIO_FIGURES_FOLDER, exist_ok=True)
+    results_df = pd.read_parquet(PORTFOLIO_RESULTS_FILE)
+    best_df = results_df.loc[results_df.groupby('building_id')['annual_savings'].idxmax()]
+
+    building_row = {key: i for i, key in enumerate(building_ids)}
+    site_row = {key: i for i, key in enumerate(site_keys)}
+    buildings = best_df['building_id'].map(building_row).to_numpy()
+    sites = best_df['site_key'].map(site_row).to_numpy()
+    optimal_kwp = best_df['optimal_kwp'].to_numpy()
+
+    balance = simulate_energy_balance(optimal_kwp, yields[sites], demand[buildings, 0], demand[buildings, 1],
+                                      demand[buildings, 2], HEAT_PUMP_COP, COOLING_EER)
+    total_pv_supply = (balance['elec_from_pv_for_cooling'] * COOLING_EER) + balance['heat_from_pv_thermal']
+    jobs = [
+        ('monthly_energy_balance', os.path.join(PORTFOLIO_FIGURES_FOLDER, f"{building_id}_monthly_energy_balance.png"),
+         dict(optimal_kwp=kwp, demand_acs=demand[b, 0], demand_cal=demand[b, 1], demand_cool=demand[b, 2],
+              total_pv_supply=supply))
+        for building_id, b, kwp, supply in zip(best_df['building_id'], buildings, optimal_kwp, total_pv_supply)
+    ]
+    return render_batch(jobs, workers=os.cpu_count())
+
+def load_hourly_pv_generation_per_kwp():
+    with open(HOURLY_SERIES_FILE, 'r', encoding='utf-8') as f:
+        return hourly_yield_from_seriescalc(json.load(f))
+
+def run_hourly_analysis():
+    try:
+        demand_acs, demand_cal, demand_cool, monthly_pv_generation_per_kwp = load_inputs()
+        hourly_pv_generation_per_kwp = load_hourly_pv_generation_per_kwp()
+    except FileNotFoundError as e:
+        print(f"Error: Could not find input file - {e}")
+        return
+
+    model_params = dict(
+        cost_per_kwp_installed=COST_PER_KWP_INSTALLED,
+        capital_recovery_factor=calculate_capital_recovery_factor(LOAN_INTEREST_RATE, LOAN_YEARS),
+        biomass_cost_per_kwh=BIOMASS_COST_PER_KWH, grid_import_price_kwh=GRID_IMPORT_PRICE_KWH,
+        grid_export_price_kwh=GRID_EXPORT_PRICE_KWH, heat_pump_cop=HEAT_PUMP_COP, cooling_eer=COOLING_EER,
+        min_kwp=PV_SIZE_MIN_KWP, max_kwp=PV_SIZE_MAX_KWP,
+    )
+    monthly = find_optimal_pv_size(monthly_pv_generation_per_kwp, demand_acs, demand_cal, demand_cool, **model_params)
+    hourly = find_optimal_pv_size_hourly(
+        hourly_pv_generation_per_kwp,
+        *(distribute_monthly(d, DAILY_DEMAND_PROFILE) for d in (demand_acs, demand_cal, demand_cool)),
+        **model_params,
+    )
+    print("--- Hourly vs. Monthly Energy Balance ---")
+    for label, result in (('Monthly', monthly), ('Hourly', hourly)):
+        print(f"{label:>8}: optimal {float(result['optimal_kwp']):.2f} kWp, "
+              f"savings {float(result['annual_savings']):,.2f} EUR")
+
+def run_storage_analysis():
+    try:
+        demand_acs, demand_cal, demand_cool, _ = load_inputs()
+        hourly_pv_generation_per_kwp = load_hourly_pv_generation_per_kwp()
+    except FileNotFoundError as e:
+        print(f"Error: Could not find input file - {e}")
+        return
+
+    results_df = optimize_pv_and_storage(
+        hourly_pv_generation_per_kwp,
+        *(distribute_monthly(d, DAILY_DEMAND_PROFILE) for d in (demand_acs, demand_cal, demand_cool)),
+        pv_size_grid(), BATTERY_SIZES_KWH, TANK_SIZES_KWH,
+        cost_per_kwp_installed=COST_PER_KWP_INSTALLED, cost_per_kwh_battery=COST_PER_KWH_BATTERY,
+        cost_per_kwh_tank=COST_PER_KWH_TANK,
+        capital_recovery_factor=calculate_capital_recovery_factor(LOAN_INTEREST_RATE, LOAN_YEARS),
+        biomass_cost_per_kwh=BIOMASS_COST_PER_KWH, grid_import_price_kwh=GRID_IMPORT_PRICE_KWH,
+        grid_export_price_kwh=GRID_EXPORT_PRICE_KWH, heat_pump_cop=HEAT_PUMP_COP, cooling_eer=COOLING_EER,
+    )
+    results_path = os.path.join(output_folder, 'storage_sizing_results.csv')
+    results_df.to_csv(results_path, index=False)
+
+    optimal_result = results_df.loc[results_df['total_annual_cost'].idxmin()]
+    print("--- PV + Storage Sizing (hourly) ---")
+    print(f"Optimal System: {optimal_result['pv_size_kwp']:.1f} kWp PV, "
+          f"{optimal_result['battery_kwh']:.1f} kWh battery, {optimal_result['tank_kwh']:.1f} kWh tank")
+    print(f"Annual Savings at Optimum: {optimal_result['annual_savings']:,.2f} EUR")
+    print(f"\nAll combinations saved to '{results_path}'.")
+
+def plot_savings_vs_kwp(results_df, optimal_kwp):
+    render_figure('savings_vs_kwp', os.path.join(output_folder, 'optimization_savings_vs_kwp_advanced.png'),
+                  pv_size_kwp=results_df['pv_size_kwp'].to_numpy(),
+                  annual_savings=results_df['annual_savings'].to_numpy(), optimal_kwp=optimal_kwp)
+
+def plot_monthly_energy_balance(optimal_kwp, demand_acs, demand_cal, demand_cool, pv_gen_per_kwp):
+    balance = simulate_energy_balance(optimal_kwp, pv_gen_per_kwp, demand_acs, demand_cal, demand_cool,
+                                      HEAT_PUMP_COP, COOLING_EER)
+    total_pv_supply_equivalent = (balance['elec_from_pv_for_cooling'] * COOLING_EER) + balance['heat_from_pv_thermal']
+    render_figure('monthly_energy_balance', os.path.join(output_folder, 'optimal_monthly_energy_balance.png'),
+                  optimal_kwp=optimal_kwp, demand_acs=demand_acs, demand_cal=demand_cal, demand_cool=demand_cool,
+                  total_pv_supply=total_pv_supply_equivalent)
 
 # ==========================================
 # 3. EXECUTION
@@ -151,3 +295,11 @@ def plot_monthly_energy_balance(optimal_kwp, demand_acs, demand_cal, demand_cool
 
 if __name__ == "__main__":
     run_optimization()
+    if RUN_SENSITIVITY:
+        run_sensitivity_analysis()
+    if RUN_HOURLY:
+        run_hourly_analysis()
+    if RUN_STORAGE:
+        run_storage_analysis()
+    if RUN_PORTFOLIO:
+        run_portfolio_analysis()
@@ -1,4 +1,5 @@
 # %% setup
+# Run from the repository root: python -m source.utils.run_pvlib
 import numpy as np
 import matplotlib.pyplot as plt
 import os
@@ -11,6 +12,8 @@ from pvlib.location import Location
 from pvlib.modelchain import ModelChain
 from pvlib.temperature import TEMPERATURE_MODEL_PARAMETERS
 
+from source.core_modules.sam_catalog import SAMCatalog
+
 # ==========================================
 # 1. SETUP: Define Location & Module
 # ==========================================
@@ -18,15 +21,20 @@ lat, lon = 48.137, 11.576  # Example: Munich
 module_name = 'Canadian_Solar_Inc__CS5P_220M'  # Exact name from CEC database
 inverter_name = 'ABB__MICRO_0_25_I_OUTD_US_208__208V_' # Example Microinverter
 
+# Parsed SAM catalogs are cached here on first use (delete or pass refresh=True to rebuild)
+project_root = r'C:\dev\pyPVGIS'
+sam_cache_folder = os.path.join(project_root, 'output', 'sam_cache')
+
 # ==========================================
 # 2. FETCH DATABASES (The "Catalog" Plugin)
 # ==========================================
-print("Fetching NREL/CEC Module & Inverter Databases...")
-# This pulls the latest catalogs from the NREL system
-modules = pvlib.pvsystem.retrieve_sam('CECMod')
-inverters = pvlib.pvsystem.retrieve_sam('CECInverter')
+print("Loading NREL/CEC Module & Inverter Databases...")
+# Cached, name-indexed catalogs: only the selected components are read from disk
+modules = SAMCatalog('CECMod', sam_cache_folder)
+inverters = SAMCatalog('CECInverter', sam_cache_folder)
 
-# Pick your specific hardware
+# Pick your specific hardware (unknown names raise KeyError listing the closest matches;
+# modules.search('Canadian Solar 220') lists candidates)
 module = modules[module_name]
 inverter = inverters[inverter_name]
 
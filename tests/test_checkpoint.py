@@ -0,0 +1,56 @@
+"""CheckpointJournal replay, including recovery from a truncated tail."""
+import json
+
+from source.core_modules.checkpoint import CheckpointJournal
+
+
+def test_replay_restores_latest_outcome(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    with CheckpointJournal(path) as journal:
+        journal.record_ok('Madrid_Spain')
+        journal.record_failed('Lyon_France', error='HTTP 529')
+        journal.record_failed('Porto_Portugal', error='timeout')
+        journal.record_ok('Porto_Portugal')
+
+    with CheckpointJournal(path) as journal:
+        assert journal.completed == {'Madrid_Spain', 'Porto_Portugal'}
+        assert journal.failed == {'Lyon_France': 'HTTP 529'}
+        assert journal.is_completed('Porto_Portugal')
+        assert not journal.is_completed('Lyon_France')
+
+
+def test_truncated_tail_is_dropped_on_replay(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    with CheckpointJournal(str(path)) as journal:
+        journal.record_ok('Madrid_Spain')
+        journal.record_ok('Lyon_France')
+    complete = path.read_bytes()
+    # A crash mid-write leaves half a JSON line without a newline
+    path.write_bytes(complete + b'{"key": "Porto_Portugal", "sta')
+
+    with CheckpointJournal(str(path)) as journal:
+        assert journal.completed == {'Madrid_Spain', 'Lyon_France'}
+        assert path.read_bytes() == complete
+        journal.record_ok('Porto_Portugal')
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['key'] for line in lines] == ['Madrid_Spain', 'Lyon_France', 'Porto_Portugal']
+    with CheckpointJournal(str(path)) as journal:
+        assert journal.completed == {'Madrid_Spain', 'Lyon_France', 'Porto_Portugal'}
+
+
+def test_corrupt_middle_line_is_skipped_not_truncated(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    with CheckpointJournal(str(path)) as journal:
+        journal.record_ok('Madrid_Spain')
+    with open(path, 'ab') as f:
+        f.write(b'{"key": "Lyon_Fr\x00\xff garbage\n')
+        f.write(b'{"no_key": true}\n')
+    with CheckpointJournal(str(path)) as journal:
+        journal.record_ok('Porto_Portugal')
+    size_before = path.stat().st_size
+
+    with CheckpointJournal(str(path)) as journal:
+        assert journal.completed == {'Madrid_Spain', 'Porto_Portugal'}
+        assert journal.corrupt_lines == [2, 3]
+    assert path.stat().st_size == size_before
@@ -0,0 +1,125 @@
+"""Offline DEM lookups on synthetic SRTM tiles."""
+import numpy as np
+import pytest
+
+from source.core_modules.dem_elevation import HGT_VOID, DEMElevation, DEMTile
+
+SAMPLES = 121  # 30 arc-second spacing keeps the synthetic tiles small
+
+
+def write_hgt(directory, name, south, west):
+    """Tile whose elevation is 1000 + 100 * lat + 10 * lon at every sample (exactly bilinear)."""
+    lats = south + 1 - np.arange(SAMPLES) / (SAMPLES - 1)
+    lons = west + np.arange(SAMPLES) / (SAMPLES - 1)
+    data = np.round(1000 + 100 * lats[:, None] + 10 * lons[None, :]).astype('>i2')
+    path = directory / f"{name}.hgt"
+    data.tofile(path)
+    return path, data
+
+
+def expected(lat, lon):
+    return 1000 + 100 * lat + 10 * lon
+
+
+def test_interior_points_are_interpolated(tmp_path):
+    write_hgt(tmp_path, 'N40W002', 40, -2)
+    dem = DEMElevation(str(tmp_path))
+    lats = np.array([40.25, 40.5, 40.123])
+    lons = np.array([-1.75, -1.5, -1.987])
+    np.testing.assert_allclose(dem.elevation(lats, lons), expected(lats, lons), atol=0.5)
+
+
+def test_points_outside_tiles_are_nan(tmp_path):
+    write_hgt(tmp_path, 'N40W002', 40, -2)
+    dem = DEMElevation(str(tmp_path))
+    result = dem.elevation([42.5, np.nan, 40.5], [-1.5, -1.5, 3.0])
+    assert np.all(np.isnan(result))
+
+
+@pytest.mark.parametrize('lat, lon', [(41.0, -1.5), (40.5, -1.0), (41.0, -1.0), (40.0, -2.0)])
+def test_north_and_east_edges_use_the_covering_tile(tmp_path, lat, lon):
+    # Only N40W002 exists, so the edge points cannot fall back to a tile to the north or east
+    write_hgt(tmp_path, 'N40W002', 40, -2)
+    dem = DEMElevation(str(tmp_path))
+    assert dem.elevation(lat, lon)[0] == pytest.approx(expected(lat, lon), abs=0.5)
+
+
+def test_shared_edge_prefers_the_cell_tile(tmp_path):
+    write_hgt(tmp_path, 'N40W002', 40, -2)
+    _, north = write_hgt(tmp_path, 'N41W002', 41, -2)
+    north[-1, :] += 7  # make the shared row distinguishable
+    north.tofile(tmp_path / 'N41W002.hgt')
+    dem = DEMElevation(str(tmp_path))
+    assert dem.elevation(41.0, -1.5)[0] == pytest.approx(expected(41.0, -1.5) + 7, abs=0.5)
+
+
+def test_points_beyond_half_a_pixel_are_nan():
+    tile = DEMTile(np.arange(25).reshape(5, 5) + 100, 40.45, -1.95, 0.1, 0.1)
+    result = tile.interpolate(np.array([40.9, 40.2, 40.48, 40.56]), np.array([-1.1, -1.9, -1.98, -1.9]))
+    assert np.isnan(result[0]) and np.isnan(result[3])
+    # Inside, and within half a pixel of the outer sample centres
+    assert result[1] == pytest.approx(113) and result[2] == pytest.approx(100)
+    clamped = tile.interpolate(np.array([40.9]), np.array([-1.1]), clamp=True)
+    assert clamped[0] == pytest.approx(104)
+
+
+def test_void_samples_are_skipped(tmp_path):
+    path, data = write_hgt(tmp_path, 'N40W002', 40, -2)
+    data[60, 60] = HGT_VOID
+    data.tofile(path)
+    tile = DEMTile.from_hgt(str(path))
+    lat, lon = np.array([40.502]), np.array([-1.502])
+    assert tile.interpolate(lat, lon)[0] == pytest.approx(expected(lat, lon)[0], abs=1.0)
+    data[59:62, 59:62] = HGT_VOID
+    data.tofile(path)
+    tile = DEMTile.from_hgt(str(path))
+    assert np.isnan(tile.interpolate(lat, lon)[0])
+
+
+def write_geotiff(path, data, west, north, step, crs='EPSG:4326', rotation=0.0):
+    rasterio = pytest.importorskip('rasterio')
+    from rasterio.transform import Affine
+
+    transform = Affine(step, rotation, west, rotation, -step, north)
+    with rasterio.open(path, 'w', driver='GTiff', height=data.shape[0], width=data.shape[1], count=1,
+                       dtype=data.dtype, crs=crs, transform=transform, nodata=-9999) as dst:
+        dst.write(data, 1)
+    return path
+
+
+def plane_raster(west, north, step, shape):
+    """Pixel-centred samples of the same plane as the .hgt tiles."""
+    lats = north - step / 2 - np.arange(shape[0]) * step
+    lons = west + step / 2 + np.arange(shape[1]) * step
+    return (1000 + 100 * lats[:, None] + 10 * lons[None, :]).astype('float32')
+
+
+def test_geotiff_tiles_are_read_by_window(tmp_path):
+    write_geotiff(tmp_path / 'part.tif', plane_raster(-2.0, 41.0, 0.01, (50, 100)), -2.0, 41.0, 0.01)
+    dem = DEMElevation(str(tmp_path))
+    tile = dem._tile(str(tmp_path / 'part.tif'))
+    assert not isinstance(tile.data, np.ndarray)  # nothing is loaded until queried
+
+    lats = np.array([40.8, 40.62, 40.2])
+    lons = np.array([-1.5, -1.03, -1.5])
+    result = dem.elevation(lats, lons)
+    np.testing.assert_allclose(result[:2], expected(lats[:2], lons[:2]), atol=0.01)
+    assert np.isnan(result[2])  # same cell, but south of the raster
+
+
+def test_cell_covered_by_several_rasters_uses_each(tmp_path):
+    write_geotiff(tmp_path / 'a_north.tif', plane_raster(-2.0, 41.0, 0.01, (50, 100)), -2.0, 41.0, 0.01)
+    write_geotiff(tmp_path / 'b_south.tif', plane_raster(-2.0, 40.5, 0.01, (50, 100)), -2.0, 40.5, 0.01)
+    dem = DEMElevation(str(tmp_path))
+    lats = np.array([40.8, 40.2])
+    lons = np.array([-1.5, -1.5])
+    np.testing.assert_allclose(dem.elevation(lats, lons), expected(lats, lons), atol=0.01)
+
+
+@pytest.mark.parametrize('kwargs', [{'crs': 'EPSG:25830'}, {'rotation': 0.001}])
+def test_non_geographic_or_rotated_geotiff_is_rejected(tmp_path, kwargs):
+    write_geotiff(tmp_path / 'bad.tif', plane_raster(-2.0, 41.0, 0.01, (10, 10)), -2.0, 41.0, 0.01, **kwargs)
+    with pytest.raises(ValueError):
+        DEMElevation(str(tmp_path))
+    with pytest.raises(ValueError):
+        DEMTile.from_geotiff(str(tmp_path / 'bad.tif'))
@@ -0,0 +1,53 @@
+"""Monthly demand CSV loader on the sample spreadsheet export."""
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from source.core_modules.demand_loader import load_demand_directory, load_demand_file, parse_demand_text
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'input',
+                      'ejemploi_2526_option1_config1.csv')
+DHW_KWH = [100.491, 89.458, 99.932, 90.536, 91.077, 81.263, 83.668, 83.281, 83.396, 90.779, 95.113, 103.036]
+HEATING_KWH = [646.983, 486.963, 368.458, 202.264, 85.967, 0, 0, 0, 0, 85.972, 398.250, 658.911]
+COOLING_KWH = [0, 0, 0, 0, 0, 16.356, 108.224, 99.330, 46.563, 0, 0, 0]
+
+
+def test_sample_file():
+    demand = load_demand_file(SAMPLE)
+    assert demand.shape == (3, 12)
+    np.testing.assert_allclose(demand, [DHW_KWH, HEATING_KWH, COOLING_KWH])
+
+
+def test_month_rows_are_put_in_calendar_order():
+    with open(SAMPLE, 'r', encoding='utf-8-sig') as f:
+        header, *rows = f.read().splitlines()
+    shuffled = '\n'.join([header, *rows[6:], *rows[:6]])
+    np.testing.assert_allclose(parse_demand_text(shuffled), load_demand_file(SAMPLE))
+
+    numbered = '\n'.join([header, *(f"{12 - i},1,2,3" for i in range(12))])
+    np.testing.assert_allclose(parse_demand_text(numbered, scale=1.0), np.ones((3, 12)) * [[1], [2], [3]])
+
+
+def test_malformed_files_are_rejected():
+    with pytest.raises(ValueError, match='12 monthly rows'):
+        parse_demand_text("Month,demandaACS (Wh),demandaCAL (Wh),demandaREF (Wh)\nJan,1,2,3\n")
+    with pytest.raises(ValueError, match='demandaREF'):
+        parse_demand_text('\n'.join(["Month,demandaACS (Wh),demandaCAL (Wh)"] + ["Jan,1,2"] * 12))
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_directory_pattern_is_case_insensitive(tmp_path, workers):
+    shutil.copy(SAMPLE, tmp_path / 'Building_A.CSV')
+    shutil.copy(SAMPLE, tmp_path / 'building_b.csv')
+    shutil.copy(SAMPLE, tmp_path / '.hidden.csv')
+    (tmp_path / 'notes.txt').write_text('not demand data')
+
+    ids, demand = load_demand_directory(str(tmp_path), pattern='BUILDING_*.csv', workers=workers)
+    assert ids == ['Building_A', 'building_b']
+    assert demand.shape == (2, 3, 12)
+    np.testing.assert_allclose(demand[1], load_demand_file(SAMPLE))
+
+    ids, demand = load_demand_directory(str(tmp_path), pattern='*.txt.csv')
+    assert ids == [] and demand.shape == (0, 3, 12)
@@ -0,0 +1,110 @@
+"""Streaming enrichment helpers and the resumable run_openmeteo row handling."""
+import random
+import threading
+import time
+
+import pytest
+
+from source.core_modules.enrichment_pipeline import chunked, finish_partial_csv, ordered_map, resume_partial_csv
+from source.utils import run_openmeteo
+
+
+def test_ordered_map_keeps_input_order():
+    def slow_square(x):
+        time.sleep(random.uniform(0, 0.01))
+        return x * x
+
+    assert list(ordered_map(slow_square, range(50), workers=8)) == [x * x for x in range(50)]
+
+
+def test_ordered_map_bounds_read_ahead():
+    consumed = []
+    lock = threading.Lock()
+
+    def items():
+        for i in range(1000):
+            with lock:
+                consumed.append(i)
+            yield i
+
+    results = ordered_map(lambda x: x, items(), workers=2, max_pending=5)
+    assert next(results) == 0
+    assert len(consumed) <= 6  # the initial window plus the one refill
+    assert [next(results) for _ in range(10)] == list(range(1, 11))
+    assert len(consumed) <= 16
+
+
+def test_ordered_map_propagates_errors_in_order():
+    def fail_on_three(x):
+        if x == 3:
+            raise RuntimeError('three')
+        return x
+
+    results = ordered_map(fail_on_three, range(6), workers=3)
+    assert [next(results) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(RuntimeError, match='three'):
+        next(results)
+
+
+def test_chunked():
+    assert list(chunked(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(chunked([], 3)) == []
+
+
+def test_resume_cuts_truncated_tail(tmp_path):
+    path = tmp_path / 'out.csv.tmp'
+    path.write_bytes(b'city,country\nTeruel,Spain\nLyon,France\nCuen')
+    assert resume_partial_csv(str(path)) == 2
+    assert path.read_bytes() == b'city,country\nTeruel,Spain\nLyon,France\n'
+
+    path.write_bytes(b'city,cou')
+    assert resume_partial_csv(str(path)) == 0
+    assert path.read_bytes() == b''
+    assert resume_partial_csv(str(tmp_path / 'missing.csv')) == 0
+
+
+def test_resume_refuses_a_changed_input(tmp_path):
+    source = tmp_path / 'sites.csv'
+    source.write_text('city,country\nTeruel,Spain\nLyon,France\n')
+    partial = tmp_path / 'sites.csv.tmp'
+
+    assert resume_partial_csv(str(partial), source=str(source)) == 0
+    partial.write_text('city,country,run\nTeruel,Spain,yes\n')
+    assert resume_partial_csv(str(partial), source=str(source)) == 1
+
+    source.write_text('city,country\nCuenca,Spain\nTeruel,Spain\nLyon,France\n')
+    with pytest.raises(ValueError, match='start over'):
+        resume_partial_csv(str(partial), source=str(source))
+
+    finish_partial_csv(str(partial), str(source))
+    assert source.read_text() == 'city,country,run\nTeruel,Spain,yes\n'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['sites.csv']
+
+
+def test_resume_without_fingerprint_is_refused(tmp_path):
+    source = tmp_path / 'sites.csv'
+    source.write_text('city,country\nTeruel,Spain\n')
+    partial = tmp_path / 'sites.csv.tmp'
+    partial.write_text('city,country,run\nTeruel,Spain,yes\n')
+    with pytest.raises(ValueError):
+        resume_partial_csv(str(partial), source=str(source))
+
+
+def test_geocode_row_tolerates_short_rows(monkeypatch):
+    calls = []
+
+    def fake_location(city, country, cache=None, with_elevation=True):
+        calls.append((city, country, with_elevation))
+        return {'city': city, 'country': 'Spain', 'latitude': 40.0, 'longitude': -1.0, 'elevation': None,
+                'source': 'open-meteo'}
+    monkeypatch.setattr(run_openmeteo, 'get_location_data', fake_location)
+
+    # csv.DictReader fills the fields missing from a short row with None
+    row = {'city': ' Teruel ', 'country': None, 'latitude': None, 'longitude': None, 'elevation': None}
+    _, location_data = run_openmeteo.geocode_row(row, cache=None)
+    assert calls == [('Teruel', '', False)]
+    assert location_data['cache_key'] == ('Teruel', '')
+
+    complete = {'city': 'Lyon', 'latitude': '45.7', 'longitude': '4.8', 'elevation': '170'}
+    assert run_openmeteo.geocode_row(complete, cache=None) == (complete, None)
+    assert len(calls) == 1
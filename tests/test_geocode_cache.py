@@ -0,0 +1,127 @@
+"""GeocodeCache: cached places, the GeoNames gazetteer and provenance of completed rows."""
+import os
+
+import pytest
+
+from source.core_modules.geocode_cache import GeocodeCache, normalize_place
+from source.utils import run_openmeteo
+
+# geonameid, name, asciiname, alternatenames, lat, lon, class, code, country, cc2,
+# admin1-4, population, elevation, dem, timezone, modified
+GEONAMES_ROWS = [
+    ['1', 'Teruel', 'Teruel', 'Terol', '40.3456', '-1.1065', 'P', 'PPLA2', 'ES', '', '', '', '', '', '35000', '915',
+     '918', 'Europe/Madrid', '2024-01-01'],
+    ['2', 'Valencia', 'Valencia', 'València', '39.4697', '-0.3774', 'P', 'PPLA', 'ES', '', '', '', '', '', '800000',
+     '', '15', 'Europe/Madrid', '2024-01-01'],
+    ['3', 'Valencia', 'Valencia', '', '10.1620', '-68.0077', 'P', 'PPLA', 'VE', '', '', '', '', '', '1400000',
+     '', '-9999', 'America/Caracas', '2024-01-01'],
+    ['4', 'Moncayo', 'Moncayo', '', '41.7870', '-1.8390', 'T', 'MT', 'ES', '', '', '', '', '', '0', '2314', '2300',
+     'Europe/Madrid', '2024-01-01'],
+    ['5', 'Albarracín', 'Albarracin', '', '40.4082', '-1.4438', 'P', 'PPL', 'ES', '', '', '', '', '', '1000', '',
+     '1156', 'Europe/Madrid', '2024-01-01'],
+]
+COUNTRY_INFO = ("#ISO\tISO3\tISO-Numeric\tfips\tCountry\tCapital\n"
+                "ES\tESP\t724\tSP\tSpain\tMadrid\n"
+                "VE\tVEN\t862\tVE\tVenezuela\tCaracas\n")
+
+
+@pytest.fixture
+def geonames_file(tmp_path):
+    path = tmp_path / 'cities.txt'
+    path.write_text(''.join('\t'.join(row) + '\n' for row in GEONAMES_ROWS), encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def countries_file(tmp_path):
+    path = tmp_path / 'countryInfo.txt'
+    path.write_text(COUNTRY_INFO, encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with GeocodeCache(str(tmp_path / 'cache' / 'geocode.sqlite')) as cache:
+        yield cache
+
+
+def test_normalize_place_folds_case_accents_and_spacing():
+    assert normalize_place('  Albarracín   de  la SIERRA ') == 'albarracin de la sierra'
+    assert normalize_place('Straße') == normalize_place('STRASSE')
+    assert normalize_place(None) == ''
+
+
+def test_put_then_get_with_normalized_keys(cache):
+    assert cache.get('Teruel', 'Spain') is None
+    record = {'city': 'Teruel', 'country': 'Spain', 'display_name': 'Teruel, Aragon',
+              'latitude': 40.34, 'longitude': -1.10, 'elevation': 915.0}
+    cache.put('Teruel', 'Spain', record, source='open-meteo')
+
+    cached = cache.get(' TERUEL', 'spain ')
+    assert cached == {**record, 'source': 'open-meteo'}
+    assert cache.get('Teruel', 'France') is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_load_geonames_keeps_populated_places_and_skips_reloads(cache, geonames_file):
+    assert cache.load_geonames(geonames_file) == 4  # the populated places; name and ASCII name fold together
+    assert cache.load_geonames(geonames_file) == 0  # same size and mtime
+    assert cache.get('Moncayo') is None  # a mountain, not a populated place
+
+    place = cache.get('albarracin', 'ES')
+    assert place['city'] == 'Albarracín' and place['source'] == 'gazetteer'
+    assert place['elevation'] == 1156.0  # from the DEM column when elevation is empty
+    assert cache.get('Valencia', 'VE')['elevation'] is None  # -9999 DEM void
+
+    stat = os.stat(geonames_file)
+    os.utime(geonames_file, (stat.st_atime, stat.st_mtime + 10))
+    assert cache.load_geonames(geonames_file, min_population=100_000) == 2
+
+
+def test_alternate_names_are_optional(cache, geonames_file):
+    cache.load_geonames(geonames_file)
+    assert cache.get('Terol') is None
+    with GeocodeCache(cache.path + '.alt') as with_alternates:
+        with_alternates.load_geonames(geonames_file, include_alternate_names=True)
+        assert with_alternates.get('Terol', 'ES')['city'] == 'Teruel'
+
+
+def test_country_names_match_once_country_info_is_loaded(cache, geonames_file, countries_file):
+    cache.load_geonames(geonames_file)
+    assert cache.get('Valencia', 'ES')['latitude'] == pytest.approx(39.4697)
+    assert cache.get('Valencia')['latitude'] == pytest.approx(10.1620)  # most populous
+
+    assert cache.load_geonames_countries(countries_file) == 2
+    assert cache.load_geonames_countries(countries_file) == 0
+    place = cache.get('Valencia', 'spain')
+    assert place['country'] == 'Spain' and place['latitude'] == pytest.approx(39.4697)
+    assert cache.get('Teruel', 'Venezuela') is None
+
+
+def test_unresolved_country_name_falls_back_to_the_place_name(cache, geonames_file):
+    # Only the GeoNames dump is loaded, so "Spain" cannot be turned into an ISO code
+    cache.load_geonames(geonames_file)
+    place = cache.get('Teruel', 'Spain')
+    assert place is not None and place['country'] == 'ES'
+    assert cache.get('Teruel', 'VE') is None  # a code is still enforced
+
+
+def test_completed_gazetteer_rows_keep_their_provenance(cache, geonames_file, monkeypatch):
+    cache.load_geonames(geonames_file)
+    monkeypatch.setattr(run_openmeteo, 'get_elevations', lambda coordinates: [1000.0] * len(coordinates))
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("gazetteer rows must not be geocoded online")
+    monkeypatch.setattr(run_openmeteo, 'http_get', no_network)
+
+    row = {'city': 'Valencia', 'country': 'Spain', 'latitude': '', 'longitude': '', 'elevation': ''}
+    geocoded = [run_openmeteo.geocode_row(row, cache)]
+    assert geocoded[0][1]['source'] == 'gazetteer'
+    (completed,) = run_openmeteo.complete_rows(geocoded, cache)
+    assert completed['elevation'] == 1000.0 and completed['run'] == 'yes'
+
+    cached = cache.get('Valencia', 'Spain')
+    assert cached['source'] == 'gazetteer' and cached['elevation'] == 1000.0
+    row = {'city': 'Valencia', 'country': 'Spain', 'latitude': '', 'longitude': '', 'elevation': ''}
+    _, location_data = run_openmeteo.geocode_row(row, cache)
+    assert location_data['source'] == 'cache' and 'cache_key' not in location_data
@@ -0,0 +1,177 @@
+"""HTTPTransport retries, backoff, per-host rate limits and metrics."""
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from source.core_modules import http_transport
+from source.core_modules.http_transport import HTTPTransport, RateLimiter
+
+
+class ScriptedServer:
+    """Answers GETs with the next `(status, headers)` of `script`, then 200 forever."""
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.request_times = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.request_times.append(time.monotonic())
+                    status, headers = server.script.pop(0) if server.script else (200, {})
+                body = b'{"ok": true}' if status == 200 else b'{"message": "busy"}'
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_transport(url, **kwargs):
+    transport = HTTPTransport(**kwargs)
+    transport.session_for(url).trust_env = False  # never route localhost through a proxy
+    return transport
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting."""
+    recorded = []
+    monkeypatch.setattr(http_transport.time, 'sleep', recorded.append)
+    return recorded
+
+
+def test_retryable_status_is_retried_until_success(sleeps):
+    with ScriptedServer([(503, {}), (529, {})]) as server:
+        transport = make_transport(server.url, max_retries=3)
+        response = transport.get(server.url)
+    assert response.status_code == 200
+    assert len(server.request_times) == 3
+    assert len(sleeps) == 2
+
+    metrics = transport.metrics()['127.0.0.1:%d' % server.server.server_port]
+    assert metrics['requests'] == 3
+    assert metrics['retries'] == 2
+    assert metrics['errors'] == 2
+    assert metrics['status_counts'] == {503: 1, 529: 1, 200: 1}
+
+
+def test_non_retryable_status_is_returned_immediately(sleeps):
+    with ScriptedServer([(400, {})]) as server:
+        transport = make_transport(server.url, max_retries=3)
+        response = transport.get(server.url)
+    assert response.status_code == 400
+    assert len(server.request_times) == 1
+    assert sleeps == []
+
+
+def test_exhausted_retries_return_last_response(sleeps):
+    with ScriptedServer([(429, {})] * 5) as server:
+        transport = make_transport(server.url, max_retries=2)
+        response = transport.get(server.url)
+    assert response.status_code == 429
+    assert len(server.request_times) == 3
+
+
+def test_retry_after_is_honoured_and_capped(sleeps):
+    with ScriptedServer([(429, {'Retry-After': '7'}), (529, {'Retry-After': '120'})]) as server:
+        transport = make_transport(server.url, max_retries=3, backoff_max=30)
+        assert transport.get(server.url).status_code == 200
+    assert sleeps == [7.0, 30.0]
+
+
+def test_backoff_is_jittered_exponential():
+    transport = HTTPTransport(backoff_base=0.5, backoff_max=4)
+    for attempt, bound in ((0, 0.5), (1, 1.0), (2, 2.0), (5, 4.0)):
+        delays = [transport._backoff_delay(attempt, None) for _ in range(200)]
+        assert 0 <= min(delays) and max(delays) <= bound
+
+
+def test_connection_errors_are_retried_then_raised(sleeps):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        url = f"http://127.0.0.1:{s.getsockname()[1]}/api"  # bound but not listening
+    transport = make_transport(url, max_retries=2, timeout=2)
+    with pytest.raises(requests.ConnectionError):
+        transport.get(url)
+    metrics = transport.metrics()[url.split('/')[2]]
+    assert metrics['requests'] == 3 and metrics['errors'] == 3 and metrics['retries'] == 2
+    assert metrics['status_counts'] == {None: 3}
+
+
+def test_rate_limit_paces_retries():
+    with ScriptedServer([(429, {}), (429, {}), (429, {})]) as server:
+        transport = make_transport(server.url, max_retries=5, backoff_base=0)
+        transport.set_rate_limit(server.url, 20)
+        assert transport.get(server.url).status_code == 200
+    gaps = [b - a for a, b in zip(server.request_times, server.request_times[1:])]
+    assert len(gaps) == 3
+    assert min(gaps) >= 0.05 * 0.8
+
+
+def test_metrics_survive_close():
+    with ScriptedServer() as server:
+        transport = make_transport(server.url)
+        transport.get(server.url)
+        transport.close()
+        transport.session_for(server.url).trust_env = False
+        transport.get(server.url)
+    (metrics,) = transport.metrics().values()
+    assert metrics['requests'] == 2
+
+
+def test_rate_limiter_spacing_and_burst():
+    limiter = RateLimiter(50)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+    bursty = RateLimiter(50, burst=4)
+    time.sleep(0.1)
+    start = time.monotonic()
+    for _ in range(4):
+        bursty.acquire()
+    assert time.monotonic() - start < 0.05
+
+
+def test_rate_limiter_is_shared_between_threads():
+    limiter = RateLimiter(100)
+    times = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(5):
+            limiter.acquire()
+            with lock:
+                times.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    times.sort()
+    assert times[-1] - times[0] >= 19 / 100 * 0.9
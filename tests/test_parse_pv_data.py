@@ -0,0 +1,129 @@
+"""PVGIS CSV/JSON parsing and the incremental directory index."""
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import parse_pv_data
+from parse_pv_data import (
+    INDEX_FILENAME,
+    extract_summary,
+    index_directory,
+    iter_summaries,
+    parse_pv_csv,
+    parse_pv_file,
+    pv_csv_to_json_layout,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+TWINS = ['PVdata_40.407_-1.444_SA3_crystSi_500kWp_14_35deg_0deg',
+         'PVdata_40.407_-1.444_SA3_crystSi2025_500kWp_14_35deg_0deg']
+
+
+@pytest.mark.parametrize('stem', TWINS)
+def test_csv_export_matches_json_twin(stem):
+    from_csv = parse_pv_file(os.path.join(DATA_DIR, stem + '.csv'))
+    from_json = parse_pv_file(os.path.join(DATA_DIR, stem + '.json'))
+
+    assert from_csv['outputs']['monthly']['fixed'] == from_json['outputs']['monthly']['fixed']
+    csv_totals, json_totals = from_csv['outputs']['totals']['fixed'], from_json['outputs']['totals']['fixed']
+    for key in ('E_d', 'E_m', 'H(i)_d', 'H(i)_m', 'SD_m', 'l_aoi', 'l_tg', 'l_total', 'LCOE_pv'):
+        assert csv_totals[key] == json_totals[key]
+    # Yearly totals are summed from the rounded monthly values of the CSV
+    for key in ('E_y', 'H(i)_y', 'SD_y'):
+        assert csv_totals[key] == pytest.approx(json_totals[key], abs=0.1)
+
+    csv_summary, json_summary = extract_summary(from_csv), extract_summary(from_json)
+    assert csv_summary.pop('elevation') is None  # not part of the CSV export
+    json_summary.pop('elevation')
+    assert csv_summary.keys() == json_summary.keys()
+    for key, value in json_summary.items():
+        if isinstance(value, float):
+            assert csv_summary[key] == pytest.approx(value, abs=0.1)
+        else:
+            assert csv_summary[key] == value
+
+
+def test_parse_pv_csv_sections():
+    parsed = parse_pv_csv(os.path.join(DATA_DIR, TWINS[0] + '.csv'))
+    assert parsed['metadata']['Latitude (decimal degrees)'] == 40.407
+    assert parsed['monthly'].dtype == parse_pv_data.PV_CSV_MONTHLY_DTYPE
+    np.testing.assert_array_equal(parsed['monthly']['month'], np.arange(1, 13))
+    assert set(parse_pv_data.PV_CSV_LOSS_KEYS) <= set(parsed['totals'])
+    assert pv_csv_to_json_layout(parsed)['inputs']['location']['elevation'] is None
+
+
+def test_iter_summaries_pool_keeps_file_order():
+    serial = list(iter_summaries(DATA_DIR, patterns=('*.json', '*.csv')))
+    pooled = list(iter_summaries(DATA_DIR, workers=2, chunksize=1, patterns=('*.json', '*.csv')))
+    assert serial == pooled
+    assert [r['file'] for r in serial] == sorted(r['file'] for r in serial)
+    assert all(r['error'] is None for r in serial)
+
+
+@pytest.fixture
+def data_copy(tmp_path):
+    for stem in TWINS:
+        shutil.copy(os.path.join(DATA_DIR, stem + '.json'), tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def parsed_files(monkeypatch):
+    parsed = []
+    summarize = parse_pv_data.summarize_file
+
+    def counting_summarize(file_path):
+        parsed.append(os.path.basename(file_path))
+        return summarize(file_path)
+    monkeypatch.setattr(parse_pv_data, 'summarize_file', counting_summarize)
+    return parsed
+
+
+def test_index_skips_unchanged_files(data_copy, parsed_files):
+    first = index_directory(str(data_copy))
+    assert sorted(parsed_files) == sorted(stem + '.json' for stem in TWINS)
+    assert os.path.exists(data_copy / INDEX_FILENAME)
+
+    parsed_files.clear()
+    assert index_directory(str(data_copy)) == first
+    assert parsed_files == []
+
+
+def test_index_rehashes_touched_but_identical_file(data_copy, parsed_files):
+    first = index_directory(str(data_copy))
+    name = TWINS[0] + '.json'
+    stat = os.stat(data_copy / name)
+    os.utime(data_copy / name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    parsed_files.clear()
+    second = index_directory(str(data_copy))
+    assert parsed_files == []  # same hash, so the summary is reused
+    assert second[name]['mtime_ns'] == stat.st_mtime_ns + 10**9
+    assert second[name]['summary'] == first[name]['summary']
+    with open(data_copy / INDEX_FILENAME, encoding='utf-8') as f:
+        assert json.load(f)[name]['mtime_ns'] == stat.st_mtime_ns + 10**9
+
+
+def test_index_reparses_changed_and_broken_files(data_copy, parsed_files):
+    first = index_directory(str(data_copy))
+    name = TWINS[0] + '.json'
+    with open(data_copy / name, encoding='utf-8') as f:
+        data = json.load(f)
+    data['outputs']['totals']['fixed']['E_y'] = 1.0
+    with open(data_copy / name, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    (data_copy / 'broken.json').write_text('{"inputs": ')
+
+    parsed_files.clear()
+    second = index_directory(str(data_copy))
+    assert sorted(parsed_files) == sorted(['broken.json', name])
+    assert second[name]['summary']['yearly_energy_kWh'] == 1.0
+    assert second[name]['sha256'] != first[name]['sha256']
+    assert 'broken.json' not in second
+
+    parsed_files.clear()
+    index_directory(str(data_copy))
+    assert parsed_files == ['broken.json']  # failures are retried on the next run
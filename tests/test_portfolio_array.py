@@ -0,0 +1,63 @@
+"""Memory-mapped portfolio array round trips."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from source.core_modules.portfolio_array import PortfolioArray, build_portfolio_array
+from source.core_modules.results_store import MONTHLY_VARIABLES, ResultsStore
+
+
+def site_frame(n_sites=4):
+    rng = np.random.default_rng(3)
+    rows = []
+    for i in range(n_sites):
+        row = {'site_key': f"site{i}_Spain", 'city': f"site{i}", 'country': 'Spain',
+               'latitude': 40.0 + i, 'longitude': -1.0 - i, 'elevation': 100.0 * i, 'peak_power_kW': 1.0 + i}
+        row.update({name: list(rng.uniform(1, 200, 12)) for name in MONTHLY_VARIABLES})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def test_round_trip_from_frame(tmp_path):
+    df = site_frame()
+    path = str(tmp_path / 'portfolio.npy')
+    built = build_portfolio_array(df, path)
+    reopened = PortfolioArray(path)
+
+    assert isinstance(reopened.data, np.memmap) and reopened.data.dtype == np.float32
+    assert reopened.data.shape == (4, 12, len(MONTHLY_VARIABLES)) and len(reopened) == 4
+    assert reopened.variables == list(MONTHLY_VARIABLES)
+    assert reopened.site_keys == built.site_keys == list(df['site_key'])
+    for j, name in enumerate(MONTHLY_VARIABLES):
+        expected = np.stack(df[name].to_numpy()).astype(np.float32)
+        np.testing.assert_array_equal(reopened.variable(name), expected)
+        np.testing.assert_array_equal(reopened.data[:, :, j], expected)
+
+    np.testing.assert_array_equal(reopened.site('site2_Spain', 'E_m'), np.float32(df['E_m'][2]))
+    np.testing.assert_array_equal(reopened.select(['site3_Spain', 'site0_Spain']), reopened.data[[3, 0]])
+    assert reopened.metadata('site1_Spain')['elevation'] == 100.0
+    pd.testing.assert_frame_equal(reopened.index_frame(), df[['site_key', 'city', 'country', 'latitude',
+                                                              'longitude', 'elevation', 'peak_power_kW']])
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['portfolio.index.json', 'portfolio.npy']
+    with pytest.raises(ValueError):
+        reopened.data[0, 0, 0] = 1.0  # read-only mapping
+
+
+def test_incomplete_sites_and_variable_subset(tmp_path):
+    df = site_frame()
+    df.loc[1, 'E_m'] = None
+    arr = build_portfolio_array(df, str(tmp_path / 'subset.npy'), variables=('E_m',))
+    assert arr.site_keys == ['site0_Spain', 'site2_Spain', 'site3_Spain']
+    assert arr.data.shape == (3, 12, 1)
+    assert arr.site('site3_Spain').shape == (12, 1)
+
+
+def test_round_trip_from_results_store(tmp_path):
+    store = ResultsStore(str(tmp_path / 'store'))
+    df = site_frame(3)
+    store.extend(df.to_dict('records'))
+    store.flush()
+    arr = build_portfolio_array(store, str(tmp_path / 'from_store.npy'))
+    assert sorted(arr.site_keys) == sorted(df['site_key'])
+    for key in arr.site_keys:
+        np.testing.assert_allclose(arr.site(key, 'E_d'), df.set_index('site_key').loc[key, 'E_d'], rtol=1e-6)
@@ -0,0 +1,78 @@
+"""Portfolio batch mode against the single-household solver."""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from source.core_modules import portfolio_optimization
+from source.core_modules.portfolio_optimization import iter_portfolio_results, run_portfolio_optimization
+from source.core_modules.pv_boiler_model import find_optimal_pv_size
+
+from .test_pv_boiler_model import DEMAND_ACS, DEMAND_CAL, DEMAND_COOL, PARAMS, PV_PER_KWP
+
+BUILDING_IDS = ['b0', 'b1', 'b2']
+SITE_KEYS = ['Teruel_Spain', 'Lyon_France', 'Oslo_Norway', 'Seville_Spain']
+DEMAND = np.stack([np.stack([DEMAND_ACS * scale, DEMAND_CAL * scale, DEMAND_COOL * scale])
+                   for scale in (0.5, 1.0, 2.0)])
+YIELDS = np.stack([PV_PER_KWP * scale for scale in (1.0, 0.8, 0.5, 1.2)])
+BOUNDED = dict(PARAMS, max_kwp=30.0)
+
+
+def per_pair(building, site):
+    return find_optimal_pv_size(YIELDS[site], *DEMAND[building], **BOUNDED)
+
+
+def test_pool_results_match_per_pair_solver(tmp_path):
+    output = tmp_path / 'portfolio.parquet'
+    written = run_portfolio_optimization(BUILDING_IDS, DEMAND, SITE_KEYS, YIELDS, str(output),
+                                         batch_size=5, workers=2, **BOUNDED)
+    assert written == len(BUILDING_IDS) * len(SITE_KEYS)
+
+    df = pd.read_parquet(output)
+    assert list(zip(df['building_id'], df['site_key'])) == [(b, s) for b in BUILDING_IDS for s in SITE_KEYS]
+    for row in df.itertuples():
+        expected = per_pair(BUILDING_IDS.index(row.building_id), SITE_KEYS.index(row.site_key))
+        for name in ('optimal_kwp', 'total_annual_cost', 'annual_savings', 'cost_no_pv'):
+            assert getattr(row, name) == pytest.approx(float(expected[name]))
+    assert [p.name for p in tmp_path.iterdir()] == ['portfolio.parquet']
+
+
+def test_explicit_pairs(tmp_path):
+    pairs = pd.DataFrame({'building_id': ['b2', 'b0'], 'site_key': ['Oslo_Norway', 'Oslo_Norway']})
+    output = tmp_path / 'pairs.parquet'
+    assert run_portfolio_optimization(BUILDING_IDS, DEMAND, SITE_KEYS, YIELDS, str(output), pairs=pairs,
+                                      **BOUNDED) == 2
+    df = pd.read_parquet(output)
+    assert list(df['building_id']) == ['b2', 'b0']
+    assert df['optimal_kwp'].iloc[0] == pytest.approx(float(per_pair(2, 2)['optimal_kwp']))
+
+
+@pytest.mark.parametrize('pairs', [
+    pd.DataFrame({'building_id': ['b0', 'b9'], 'site_key': ['Lyon_France', 'Lyon_France']}),
+    pd.DataFrame({'building_id': ['b0'], 'site_key': ['Paris_France']}),
+])
+def test_unknown_pair_keys_raise(tmp_path, pairs):
+    with pytest.raises(KeyError):
+        run_portfolio_optimization(BUILDING_IDS, DEMAND, SITE_KEYS, YIELDS, str(tmp_path / 'out.parquet'),
+                                   pairs=pairs, **BOUNDED)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_pool_submissions_are_bounded(monkeypatch):
+    submitted = []
+
+    class CountingExecutor(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            submitted.append(args[0])
+            return super().submit(fn, *args, **kwargs)
+    monkeypatch.setattr(portfolio_optimization, 'ProcessPoolExecutor', CountingExecutor)
+
+    buildings, sites = portfolio_optimization.cross_pairs(len(BUILDING_IDS), len(SITE_KEYS))
+    results = iter_portfolio_results(DEMAND, YIELDS, buildings, sites, batch_size=1, workers=2,
+                                     max_pending=3, **BOUNDED)
+    first_rows, first = next(results)
+    assert first_rows == slice(0, 1) and len(submitted) == 3
+    rest = list(results)
+    assert len(submitted) == len(rest) + 1 == 12
+    assert [rows.start for rows, _ in rest] == list(range(1, 12))
@@ -0,0 +1,81 @@
+"""Hourly engine: monthly roll-ups and the sorted-breakpoint optimum finder."""
+import numpy as np
+import pytest
+
+from source.core_modules.pv_boiler_hourly import (
+    HOURS_PER_YEAR,
+    distribute_monthly,
+    find_optimal_pv_size_hourly,
+    monthly_totals,
+)
+from source.core_modules.pv_boiler_model import evaluate_size_sweep, find_optimal_pv_size
+
+from .test_pv_boiler_model import DEMAND_ACS, DEMAND_CAL, DEMAND_COOL, PARAMS, PV_PER_KWP
+
+
+def random_household(rng, n_periods):
+    pv_per_kwp = rng.uniform(0, 200, n_periods) * (rng.random(n_periods) > 0.2)
+    return (pv_per_kwp, rng.uniform(0, 300, n_periods), rng.uniform(0, 900, n_periods),
+            rng.uniform(0, 500, n_periods) * (rng.random(n_periods) > 0.5))
+
+
+def test_distribute_monthly_keeps_month_totals():
+    daily_profile = np.r_[np.zeros(7), np.hanning(12), np.zeros(5)]
+    hourly = distribute_monthly(np.stack([PV_PER_KWP, DEMAND_CAL]), daily_profile)
+    assert hourly.shape == (2, HOURS_PER_YEAR)
+    np.testing.assert_allclose(monthly_totals(hourly), np.stack([PV_PER_KWP, DEMAND_CAL]))
+    assert np.all(hourly[:, :7] == 0)
+
+
+def test_matches_monthly_solver_on_monthly_profiles():
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        inputs = random_household(rng, 12)
+        params = {**PARAMS, 'grid_export_price_kwh': rng.uniform(0, 0.1),
+                  'cost_per_kwp_installed': rng.uniform(300, 2500)}
+        for max_kwp in (25.0, None):
+            hourly = find_optimal_pv_size_hourly(*inputs, max_kwp=max_kwp, **params)
+            monthly = find_optimal_pv_size(*inputs, max_kwp=max_kwp, **params)
+            for key in ('total_annual_cost', 'annual_savings', 'cost_no_pv'):
+                np.testing.assert_allclose(hourly[key], monthly[key], rtol=1e-9, atol=1e-6)
+            # Flat cost segments can tie; the cost must match at whichever size is returned
+            if np.isfinite(hourly['optimal_kwp']):
+                check = evaluate_size_sweep([float(hourly['optimal_kwp'])], *inputs, **params)
+                assert check['total_annual_cost'][0] == pytest.approx(float(monthly['total_annual_cost']))
+
+
+def test_matches_monthly_solver_with_scenario_parameters():
+    rng = np.random.default_rng(11)
+    pv, acs, cal, cool = random_household(rng, 12)
+    scenarios = {
+        'cost_per_kwp_installed': rng.uniform(500, 2000, 8),
+        'heat_pump_cop': rng.uniform(2.5, 4.5, 8),
+        'grid_export_price_kwh': rng.uniform(0, 0.08, 8),
+    }
+    hourly = find_optimal_pv_size_hourly(pv, acs, cal, cool, max_kwp=25, **{**PARAMS, **scenarios})
+    monthly = find_optimal_pv_size(pv, acs, cal, cool, max_kwp=25, **{**PARAMS, **scenarios})
+    assert hourly['optimal_kwp'].shape == (8,)
+    np.testing.assert_allclose(hourly['total_annual_cost'], monthly['total_annual_cost'], rtol=1e-9)
+
+    # Only the PV price varies between households
+    costs = np.array([800.0, 1500.0])
+    hourly = find_optimal_pv_size_hourly(pv, acs, cal, cool, max_kwp=25,
+                                         **{**PARAMS, 'cost_per_kwp_installed': costs})
+    monthly = find_optimal_pv_size(pv, acs, cal, cool, max_kwp=25, **{**PARAMS, 'cost_per_kwp_installed': costs})
+    np.testing.assert_allclose(hourly['total_annual_cost'], monthly['total_annual_cost'], rtol=1e-9)
+
+
+def test_hourly_optimum_beats_dense_scan():
+    rng = np.random.default_rng(3)
+    daily_profile = np.r_[np.zeros(6), np.sin(np.linspace(0, np.pi, 14)), np.zeros(4)]
+    pv = distribute_monthly(PV_PER_KWP, daily_profile) * rng.uniform(0.5, 1.5, HOURS_PER_YEAR)
+    demand = [distribute_monthly(d) for d in (DEMAND_ACS, DEMAND_CAL, DEMAND_COOL)]
+
+    optimum = find_optimal_pv_size_hourly(pv, *demand, max_kwp=10, **PARAMS)
+    sizes = np.linspace(0, 10, 2001)
+    scan = np.concatenate([evaluate_size_sweep(chunk, pv, *demand, **PARAMS)['total_annual_cost']
+                           for chunk in np.array_split(sizes, 20)])
+    assert optimum['total_annual_cost'] <= scan.min() + 1e-9
+    assert optimum['total_annual_cost'] == pytest.approx(scan.min(), abs=0.05)
+    check = evaluate_size_sweep([float(optimum['optimal_kwp'])], pv, *demand, **PARAMS)
+    assert check['total_annual_cost'][0] == pytest.approx(float(optimum['total_annual_cost']))
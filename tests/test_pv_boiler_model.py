@@ -0,0 +1,133 @@
+"""Regression tests for the monthly PV / heat-pump / biomass cost model."""
+import numpy as np
+import pytest
+
+from source.core_modules.pv_boiler_model import (
+    calculate_capital_recovery_factor,
+    evaluate_size_sweep,
+    find_optimal_pv_size,
+)
+
+PV_PER_KWP = np.array([78.0, 95.0, 132.0, 150.0, 168.0, 175.0, 182.0, 170.0, 140.0, 112.0, 84.0, 72.0])
+DEMAND_ACS = np.array([220.0, 200.0, 210.0, 190.0, 180.0, 160.0, 150.0, 150.0, 160.0, 180.0, 200.0, 215.0])
+DEMAND_CAL = np.array([900.0, 760.0, 540.0, 310.0, 90.0, 0.0, 0.0, 0.0, 40.0, 260.0, 600.0, 850.0])
+DEMAND_COOL = np.array([0.0, 0.0, 0.0, 0.0, 60.0, 280.0, 520.0, 480.0, 150.0, 0.0, 0.0, 0.0])
+
+PARAMS = dict(
+    cost_per_kwp_installed=1500.0,
+    capital_recovery_factor=calculate_capital_recovery_factor(0.06, 15),
+    biomass_cost_per_kwh=0.09,
+    grid_import_price_kwh=0.16,
+    grid_export_price_kwh=0.02,
+    heat_pump_cop=3.5,
+    cooling_eer=3.5,
+)
+
+
+def loop_annual_cost(pv_size_kwp, pv_per_kwp=PV_PER_KWP, demand_acs=DEMAND_ACS, demand_cal=DEMAND_CAL,
+                     demand_cool=DEMAND_COOL, **params):
+    """The original one-size-at-a-time cost calculation of the tradeoff script."""
+    p = {**PARAMS, **params}
+    annualized_pv_cost = pv_size_kwp * p['cost_per_kwp_installed'] * p['capital_recovery_factor']
+    monthly_pv_generation_elec = pv_per_kwp * pv_size_kwp
+
+    elec_needed_for_cooling = demand_cool / p['cooling_eer']
+    elec_from_pv_for_cooling = np.minimum(monthly_pv_generation_elec, elec_needed_for_cooling)
+    unmet_cooling_elec_demand = elec_needed_for_cooling - elec_from_pv_for_cooling
+
+    elec_remaining_after_cooling = monthly_pv_generation_elec - elec_from_pv_for_cooling
+    heat_from_pv_thermal = elec_remaining_after_cooling * p['heat_pump_cop']
+    unmet_heating_demand_thermal = np.maximum(0, (demand_acs + demand_cal) - heat_from_pv_thermal)
+
+    cost_of_grid_imports = unmet_cooling_elec_demand.sum() * p['grid_import_price_kwh']
+    cost_of_biomass = unmet_heating_demand_thermal.sum() * p['biomass_cost_per_kwh']
+
+    elec_used_for_heating = np.minimum(elec_remaining_after_cooling, (demand_acs + demand_cal) / p['heat_pump_cop'])
+    surplus_elec = elec_remaining_after_cooling - elec_used_for_heating
+    revenue_from_exports = surplus_elec.sum() * p['grid_export_price_kwh']
+    return annualized_pv_cost + cost_of_biomass + cost_of_grid_imports - revenue_from_exports
+
+
+def test_capital_recovery_factor():
+    assert calculate_capital_recovery_factor(0, 15) == pytest.approx(1 / 15)
+    assert calculate_capital_recovery_factor(0.06, 15) == pytest.approx(0.10296276)
+    np.testing.assert_allclose(calculate_capital_recovery_factor(np.array([0.0, 0.06]), 15),
+                               [1 / 15, 0.10296276])
+
+
+def test_sweep_matches_per_size_loop():
+    sizes = np.arange(0, 25.5, 0.5)
+    sweep = evaluate_size_sweep(sizes, PV_PER_KWP, DEMAND_ACS, DEMAND_CAL, DEMAND_COOL, **PARAMS)
+
+    expected = np.array([loop_annual_cost(size) for size in sizes])
+    np.testing.assert_allclose(sweep['total_annual_cost'], expected, rtol=1e-12)
+    np.testing.assert_allclose(sweep['annual_savings'], sweep['cost_no_pv'] - expected, rtol=1e-12)
+    assert sweep['cost_no_pv'] == pytest.approx(loop_annual_cost(0.0))
+
+
+def test_sweep_broadcasts_scenario_parameters():
+    sizes = np.arange(0, 10.5, 0.5)
+    cops = np.array([2.5, 3.5, 4.5])
+    prices = np.array([0.06, 0.09, 0.12])
+    sweep = evaluate_size_sweep(sizes, PV_PER_KWP, DEMAND_ACS, DEMAND_CAL, DEMAND_COOL,
+                                **{**PARAMS, 'heat_pump_cop': cops, 'biomass_cost_per_kwh': prices})
+
+    assert sweep['total_annual_cost'].shape == (3, len(sizes))
+    for d in range(3):
+        expected = [loop_annual_cost(size, heat_pump_cop=cops[d], biomass_cost_per_kwh=prices[d])
+                    for size in sizes]
+        np.testing.assert_allclose(sweep['total_annual_cost'][d], expected, rtol=1e-12)
+
+
+def dense_scan(max_kwp, **kwargs):
+    sizes = np.linspace(0, max_kwp, 200_001)
+    sweep = evaluate_size_sweep(sizes, PV_PER_KWP, DEMAND_ACS, DEMAND_CAL, DEMAND_COOL, **{**PARAMS, **kwargs})
+    best = np.argmin(sweep['total_annual_cost'], axis=-1)
+    return sizes[best], np.min(sweep['total_annual_cost'], axis=-1)
+
+
+def test_breakpoint_optimum_matches_dense_scan():
+    optimum = find_optimal_pv_size(PV_PER_KWP, DEMAND_ACS, DEMAND_CAL, DEMAND_COOL, max_kwp=25, **PARAMS)
+    scan_kwp, scan_cost = dense_scan(25)
+
+    # The exact optimum is never worse than any grid point and lies within one grid step of the best
+    assert optimum['total_annual_cost'] <= scan_cost + 1e-9
+    assert optimum['total_annual_cost'] == pytest.approx(scan_cost, abs=1e-2)
+    assert optimum['optimal_kwp'] == pytest.approx(scan_kwp, abs=25 / 200_000)
+    assert optimum['total_annual_cost'] == pytest.approx(loop_annual_cost(float(optimum['optimal_kwp'])))
+
+
+def test_breakpoint_optimum_per_scenario_parameters():
+    rng = np.random.default_rng(1)
+    scenarios = dict(
+        cost_per_kwp_installed=rng.uniform(600, 2000, 16),
+        grid_export_price_kwh=rng.uniform(0.0, 0.12, 16),
+        biomass_cost_per_kwh=rng.uniform(0.05, 0.15, 16),
+        heat_pump_cop=rng.uniform(2.5, 4.5, 16),
+    )
+    optimum = find_optimal_pv_size(PV_PER_KWP, DEMAND_ACS, DEMAND_CAL, DEMAND_COOL, max_kwp=25,
+                                   **{**PARAMS, **scenarios})
+    assert optimum['optimal_kwp'].shape == (16,)
+
+    scan_kwp, scan_cost = dense_scan(25, **scenarios)
+    assert np.all(optimum['total_annual_cost'] <= scan_cost + 1e-9)
+    np.testing.assert_allclose(optimum['total_annual_cost'], scan_cost, atol=1e-2)
+
+
+def test_breakpoint_optimum_with_only_cost_varying():
+    costs = np.array([500.0, 1500.0, 4000.0])
+    optimum = find_optimal_pv_size(PV_PER_KWP, DEMAND_ACS, DEMAND_CAL, DEMAND_COOL, max_kwp=25,
+                                   **{**PARAMS, 'cost_per_kwp_installed': costs})
+    for d, cost in enumerate(costs):
+        single = find_optimal_pv_size(PV_PER_KWP, DEMAND_ACS, DEMAND_CAL, DEMAND_COOL, max_kwp=25,
+                                      **{**PARAMS, 'cost_per_kwp_installed': cost})
+        assert optimum['optimal_kwp'][d] == pytest.approx(float(single['optimal_kwp']))
+    # Cheaper PV never leads to a smaller system
+    assert np.all(np.diff(optimum['optimal_kwp']) <= 0)
+
+
+def test_unbounded_optimum_when_exports_pay_for_pv():
+    optimum = find_optimal_pv_size(PV_PER_KWP, DEMAND_ACS, DEMAND_CAL, DEMAND_COOL,
+                                   **{**PARAMS, 'cost_per_kwp_installed': 100.0, 'grid_export_price_kwh': 0.2})
+    assert np.isinf(optimum['optimal_kwp'])
+    assert optimum['total_annual_cost'] == -np.inf
@@ -0,0 +1,52 @@
+"""Storage dispatch against the storage-free model."""
+import numpy as np
+import pytest
+
+from source.core_modules.pv_boiler_hourly import distribute_monthly
+from source.core_modules.pv_boiler_model import evaluate_size_sweep
+from source.core_modules.pv_storage_model import dispatch_storage, optimize_pv_and_storage
+
+from .test_pv_boiler_model import DEMAND_ACS, DEMAND_CAL, DEMAND_COOL, PARAMS, PV_PER_KWP
+
+DAILY_PV = np.r_[np.zeros(6), np.sin(np.linspace(0, np.pi, 14)), np.zeros(4)]
+PV_HOURLY = distribute_monthly(PV_PER_KWP, DAILY_PV)
+ACS_HOURLY, CAL_HOURLY, COOL_HOURLY = (distribute_monthly(d) for d in (DEMAND_ACS, DEMAND_CAL, DEMAND_COOL))
+SIZES = np.arange(0, 6.5, 0.5)
+
+STORAGE_PARAMS = dict(PARAMS, cost_per_kwh_battery=500.0, cost_per_kwh_tank=40.0)
+
+
+def test_zero_capacity_matches_size_sweep():
+    grid = optimize_pv_and_storage(PV_HOURLY, ACS_HOURLY, CAL_HOURLY, COOL_HOURLY, SIZES, [0.0], [0.0],
+                                   **STORAGE_PARAMS)
+    sweep = evaluate_size_sweep(SIZES, PV_HOURLY, ACS_HOURLY, CAL_HOURLY, COOL_HOURLY, **PARAMS)
+    np.testing.assert_allclose(grid['total_annual_cost'], sweep['total_annual_cost'], rtol=1e-9)
+    np.testing.assert_allclose(grid['annual_savings'], sweep['annual_savings'], rtol=1e-9, atol=1e-9)
+
+
+def test_lossless_battery_keeps_energy_balance():
+    generation = SIZES[:, None] * PV_HOURLY
+    cooling_elec = COOL_HOURLY / PARAMS['cooling_eer']
+    heating = ACS_HOURLY + CAL_HOURLY
+    no_storage = dispatch_storage(generation, cooling_elec, heating, 0.0, 0.0, heat_pump_cop=3.5)
+    stored = dispatch_storage(generation, cooling_elec, heating, 10.0, 0.0, heat_pump_cop=3.5,
+                              battery_efficiency=1.0, battery_self_discharge=0.0)
+
+    # Lossless: every delivered kWh displaces one kWh of import or heat-pump electricity, and exports
+    # fall by what was charged (delivered plus the year-end state of charge, at most the capacity)
+    displaced = (no_storage['imported_elec'] - stored['imported_elec']
+                 + (no_storage['biomass_heat'] - stored['biomass_heat']) / 3.5)
+    np.testing.assert_allclose(displaced, stored['battery_throughput'], rtol=1e-9, atol=1e-9)
+    charged = no_storage['exported_elec'] - stored['exported_elec']
+    assert np.all(charged >= stored['battery_throughput'] - 1e-9)
+    assert np.all(charged <= stored['battery_throughput'] + 10.0 + 1e-9)
+
+
+def test_storage_never_increases_grid_and_biomass_use():
+    generation = SIZES[:, None] * PV_HOURLY
+    cooling_elec = COOL_HOURLY / PARAMS['cooling_eer']
+    heating = ACS_HOURLY + CAL_HOURLY
+    base = dispatch_storage(generation, cooling_elec, heating, 0.0, 0.0, heat_pump_cop=3.5)
+    with_tank = dispatch_storage(generation, cooling_elec, heating, 0.0, 50.0, heat_pump_cop=3.5)
+    assert np.all(with_tank['biomass_heat'] <= base['biomass_heat'] + 1e-9)
+    assert np.all(with_tank['imported_elec'] == pytest.approx(base['imported_elec']))
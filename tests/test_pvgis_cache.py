@@ -0,0 +1,81 @@
+"""ResponseCache TTL expiry and LRU eviction."""
+import os
+import time
+
+from source.core_modules.pvgis_cache import ResponseCache, make_cache_key
+
+
+def params(lat):
+    return {'lat': lat, 'lon': -3.7, 'peakpower': 1, 'loss': 14, 'outputformat': 'json'}
+
+
+def test_key_ignores_order_and_number_spelling():
+    assert make_cache_key({'lat': 40, 'lon': -3.7}) == make_cache_key({'lon': -3.70, 'lat': 40.0})
+    assert make_cache_key(params(40)) != make_cache_key(params(41))
+
+
+def test_round_trip_and_persistence(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put(params(40), {'outputs': {'E_y': 1500.0}})
+    assert cache.get(params(40)) == {'outputs': {'E_y': 1500.0}}
+    assert cache.get(params(41)) is None
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+
+    reopened = ResponseCache(str(tmp_path))
+    assert params(40) in reopened
+    assert reopened.get(params(40)) == {'outputs': {'E_y': 1500.0}}
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_entries=2)
+    cache.put(params(1), {'v': 1})
+    cache.put(params(2), {'v': 2})
+    cache.get(params(1))  # 2 is now the least recently used
+    cache.put(params(3), {'v': 3})
+
+    assert len(cache) == 2
+    assert params(2) not in cache
+    assert cache.get(params(1)) == {'v': 1}
+    assert cache.get(params(3)) == {'v': 3}
+
+
+def test_lru_order_survives_reopening(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    for lat in (1, 2, 3):
+        cache.put(params(lat), {'v': lat})
+    # Last use is recorded in the file mtime; make params(1) the most recent
+    for age, lat in ((30, 2), (20, 3), (10, 1)):
+        key = make_cache_key(params(lat))
+        path = os.path.join(str(tmp_path), key[:2], f"{key}.json")
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+
+    reopened = ResponseCache(str(tmp_path), max_entries=2)
+    reopened.put(params(4), {'v': 4})
+    assert params(2) not in reopened
+    assert params(3) not in reopened
+    assert params(1) in reopened and params(4) in reopened
+
+
+def test_byte_budget_evicts_oldest(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put(params(1), {'v': 'x' * 100})
+    entry_bytes = cache.stats['bytes']
+
+    bounded = ResponseCache(str(tmp_path), max_bytes=int(entry_bytes * 1.5))
+    bounded.put(params(2), {'v': 'y' * 100})
+    assert params(1) not in bounded
+    assert bounded.get(params(2)) == {'v': 'y' * 100}
+    assert bounded.stats['bytes'] <= int(entry_bytes * 1.5)
+
+
+def test_expired_entry_is_a_miss_and_removed(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path), ttl_seconds=60)
+    cache.put(params(40), {'v': 1})
+    assert cache.get(params(40)) == {'v': 1}
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    assert cache.get(params(40)) is None
+    assert params(40) not in cache
+    assert cache.stats['misses'] == 1
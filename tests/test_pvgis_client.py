@@ -0,0 +1,235 @@
+"""PVGISBatchClient against a local stand-in for the PVcalc endpoint."""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pytest
+
+from source.core_modules.http_transport import HTTPTransport
+from source.core_modules.pvgis_client import (
+    REFERENCE_PEAKPOWER,
+    PVGISBatchClient,
+    reference_params,
+    scale_pvcalc_response,
+)
+
+
+OTHER_LOSSES = 0.9  # AOI, spectral and thermal loss factor of the stand-in site
+
+
+def pvcalc_body(peakpower, loss, lat=40.0):
+    """PVcalc-shaped JSON body for a fixed-mounted system, with PVGIS's 0.01 rounding."""
+    factor = peakpower * (1 - loss / 100)
+    monthly = [{'month': m, 'E_d': round((2.5 + m / 10 + lat / 100) * factor, 2),
+                'E_m': round((75.0 + 3 * m + lat / 10) * factor, 2), 'H(i)_d': 4.0, 'H(i)_m': 120.0,
+                'SD_m': round(5.0 * factor, 2)} for m in range(1, 13)]
+    return {
+        'inputs': {'pv_module': {'technology': 'c-Si', 'peak_power': peakpower, 'system_loss': loss}},
+        'outputs': {
+            'monthly': {'fixed': monthly},
+            'totals': {'fixed': {'E_d': round(3.0 * factor, 2), 'E_m': round(90.0 * factor, 2),
+                                 'E_y': round(1080.0 * factor, 2), 'H(i)_y': 1440.0,
+                                 'SD_y': round(20.0 * factor, 2),
+                                 'l_total': round((OTHER_LOSSES * (1 - loss / 100) - 1) * 100, 2)}},
+        },
+    }
+
+
+class StandInPVcalc:
+    """Threaded HTTP server answering PVcalc queries after `delay` seconds; `lat=-1` gives a 400."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.request_times = []
+        self.queries = []
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+                with stand_in._lock:
+                    stand_in.active += 1
+                    stand_in.max_active = max(stand_in.max_active, stand_in.active)
+                    stand_in.request_times.append(time.monotonic())
+                    stand_in.queries.append(query)
+                time.sleep(stand_in.delay)
+                with stand_in._lock:
+                    stand_in.active -= 1
+
+                if float(query['lat']) < 0:
+                    status, body = 400, {'message': 'Location out of range', 'status': 400}
+                else:
+                    status, body = 200, pvcalc_body(float(query['peakpower']), float(query['loss']),
+                                                    float(query['lat']))
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/v5_2/PVcalc"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_client(server, **kwargs):
+    transport = HTTPTransport(max_retries=0)
+    transport.session_for(server.url).trust_env = False  # never route localhost through a proxy
+    return PVGISBatchClient(url=server.url, transport=transport, **kwargs)
+
+
+def site_jobs(n, lat=40.0):
+    return [(i, {'lat': lat, 'lon': -3.0 + i, 'peakpower': 1, 'loss': 14, 'outputformat': 'json'})
+            for i in range(n)]
+
+
+def collect(client, jobs):
+    async def run():
+        return [result async for result in client.iter_batch(jobs)]
+    return asyncio.run(run())
+
+
+def test_results_match_pvcalc_schema():
+    with StandInPVcalc() as server:
+        results = collect(make_client(server), site_jobs(3))
+
+    assert sorted(r['key'] for r in results) == [0, 1, 2]
+    for result in results:
+        assert result['status'] == 200 and result['error'] is None
+        totals = result['data']['outputs']['totals']['fixed']
+        assert totals['E_y'] == pytest.approx(1080.0 * 0.86)
+        assert len(result['data']['outputs']['monthly']['fixed']) == 12
+
+
+def test_results_are_yielded_as_they_complete():
+    with StandInPVcalc(delay=0.3) as server:
+        client = make_client(server, max_concurrency=4)
+
+        async def first_result_time():
+            start = time.monotonic()
+            async for _ in client.iter_batch(site_jobs(8)):
+                return time.monotonic() - start
+
+        elapsed = asyncio.run(first_result_time())
+    # Two waves of 0.3 s are needed for the whole batch; the first result must not wait for both
+    assert elapsed < 0.55
+
+
+def test_in_flight_requests_are_bounded():
+    with StandInPVcalc(delay=0.1) as server:
+        results = collect(make_client(server, max_concurrency=3), site_jobs(12))
+    assert len(results) == 12
+    assert server.max_active <= 3
+    assert server.max_active == 3
+
+
+def test_calls_are_paced_at_rate():
+    with StandInPVcalc(delay=0.0) as server:
+        collect(make_client(server, max_concurrency=8, rate_per_second=20), site_jobs(10))
+    # One token up front, then one every 1/20 s
+    times = sorted(server.request_times)
+    assert times[-1] - times[0] >= 9 / 20 * 0.9
+
+
+def test_non_200_becomes_error_record():
+    with StandInPVcalc() as server:
+        results = collect(make_client(server), site_jobs(1, lat=-1.0))
+
+    (result,) = results
+    assert result['status'] == 400
+    assert result['data'] is None
+    assert 'Location out of range' in result['error']
+
+
+def test_scaled_response_matches_direct_fetch():
+    params = {'lat': 40.0, 'lon': -3.0, 'peakpower': 250, 'loss': 14, 'outputformat': 'json'}
+    with StandInPVcalc(delay=0.0) as server:
+        (scaled,) = collect(make_client(server), [('scaled', params)])
+        (direct,) = collect(make_client(server, linear_scaling=False), [('direct', params)])
+        assert float(server.queries[0]['peakpower']) == REFERENCE_PEAKPOWER
+        assert float(server.queries[1]['peakpower']) == 250
+
+    scaled_data, direct_data = scaled['data'], direct['data']
+    assert scaled_data['inputs']['pv_module'] == direct_data['inputs']['pv_module']
+    for got, want in zip(scaled_data['outputs']['monthly']['fixed'], direct_data['outputs']['monthly']['fixed']):
+        for key in ('E_d', 'E_m', 'SD_m'):
+            assert got[key] == pytest.approx(want[key], rel=1e-4, abs=0.01)
+        assert got['H(i)_m'] == want['H(i)_m']  # irradiation does not scale
+    got, want = scaled_data['outputs']['totals']['fixed'], direct_data['outputs']['totals']['fixed']
+    for key in ('E_d', 'E_m', 'E_y', 'SD_y', 'l_total'):
+        assert got[key] == pytest.approx(want[key], rel=1e-4, abs=0.01)
+    assert got['H(i)_y'] == want['H(i)_y']
+
+
+def test_large_reference_keeps_rounding_error_small():
+    # PVGIS rounds E_d to 0.01; from a 1 kWp reference that rounding is multiplied by the system size
+    lat = 41.234
+    exact = [(2.5 + m / 10 + lat / 100) * 400 * 0.86 for m in range(1, 13)]
+
+    def scaled_e_d(reference_kwp):
+        scaled = scale_pvcalc_response(pvcalc_body(reference_kwp, 0, lat), 400, 14)
+        return [month['E_d'] for month in scaled['outputs']['monthly']['fixed']]
+
+    small_error = np.max(np.abs(np.array(scaled_e_d(1)) / exact - 1))
+    large_error = np.max(np.abs(np.array(scaled_e_d(REFERENCE_PEAKPOWER)) / exact - 1))
+    assert small_error > 1e-4
+    assert large_error < 2e-6
+
+
+def test_l_total_compounds_system_loss():
+    reference = pvcalc_body(REFERENCE_PEAKPOWER, 0)
+    assert reference['outputs']['totals']['fixed']['l_total'] == pytest.approx(-10.0)
+    for loss in (0, 14, 30):
+        scaled = scale_pvcalc_response(reference, 5, loss)
+        expected = (OTHER_LOSSES * (1 - loss / 100) - 1) * 100
+        assert scaled['outputs']['totals']['fixed']['l_total'] == pytest.approx(expected)
+        assert scaled['inputs']['pv_module']['system_loss'] == loss
+    # The reference response itself is left untouched
+    assert reference['inputs']['pv_module']['peak_power'] == REFERENCE_PEAKPOWER
+
+
+def test_pvprice_requests_are_passed_through():
+    priced = {'lat': 40.0, 'lon': -3.0, 'peakpower': 3, 'loss': 14, 'pvprice': 1, 'systemcost': 4500}
+    assert reference_params(priced) is None
+    assert reference_params({'lat': 40.0, 'lon': -3.0}) is None
+
+    with StandInPVcalc(delay=0.0) as server:
+        (result,) = collect(make_client(server), [('priced', priced)])
+    (query,) = server.queries
+    assert float(query['peakpower']) == 3 and float(query['loss']) == 14 and query['pvprice'] == '1'
+    assert result['data']['inputs']['pv_module']['peak_power'] == 3
+
+
+def test_variants_share_one_in_flight_reference_request():
+    variants = [(f"{size}_{loss}", {'lat': 40.0, 'lon': -3.0, 'peakpower': size, 'loss': loss,
+                                    'outputformat': 'json'})
+                for size in (1, 2.5, 10) for loss in (0, 14)]
+    other_site = ('other', {**variants[0][1], 'lon': 2.0})
+    with StandInPVcalc(delay=0.2) as server:
+        results = collect(make_client(server, max_concurrency=4), variants + [other_site])
+    assert len(server.queries) == 2
+    assert len(results) == len(variants) + 1
+
+    by_key = {r['key']: r for r in results}
+    for key, params in variants:
+        totals = by_key[key]['data']['outputs']['totals']['fixed']
+        assert totals['E_y'] == pytest.approx(1080.0 * params['peakpower'] * (1 - params['loss'] / 100))
@@ -0,0 +1,63 @@
+"""Headless report figure rendering."""
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+
+from source.core_modules import report_figures
+from source.core_modules.report_figures import draw_savings_vs_kwp, render_batch, render_figure
+
+from .test_pv_boiler_model import DEMAND_ACS, DEMAND_CAL, DEMAND_COOL, PV_PER_KWP
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+SIZES = np.linspace(0, 3, 31)
+SAVINGS = 200 - 80 * (SIZES - 1.37) ** 2
+
+
+def savings_job(path, optimal_kwp=1.37):
+    return ('savings_vs_kwp', str(path), {'pv_size_kwp': SIZES, 'annual_savings': SAVINGS,
+                                          'optimal_kwp': optimal_kwp})
+
+
+def balance_job(path, optimal_kwp=1.37):
+    return ('monthly_energy_balance', str(path), {'optimal_kwp': optimal_kwp, 'demand_acs': DEMAND_ACS,
+                                                  'demand_cal': DEMAND_CAL, 'demand_cool': DEMAND_COOL,
+                                                  'total_pv_supply': PV_PER_KWP * optimal_kwp})
+
+
+def test_render_figures_to_png(tmp_path):
+    for kind, path, kwargs in (savings_job(tmp_path / 'savings.png'), balance_job(tmp_path / 'balance.png')):
+        assert render_figure(kind, path, **kwargs) == path
+        with open(path, 'rb') as f:
+            assert f.read(8) == PNG_SIGNATURE
+
+    width, height = report_figures._templates['savings_vs_kwp'].get_size_inches()
+    assert (width, height) == (10, 6)
+
+
+def test_template_is_redrawn_not_rebuilt(tmp_path):
+    kind, path, kwargs = savings_job(tmp_path / 'first.png')
+    render_figure(kind, path, **kwargs)
+    template = report_figures._templates['savings_vs_kwp']
+    kind, path, kwargs = savings_job(tmp_path / 'second.png', optimal_kwp=2.5)
+    render_figure(kind, path, **kwargs)
+    assert report_figures._templates['savings_vs_kwp'] is template
+    ax = template.axes[0]
+    assert len(template.axes) == 1 and len(ax.lines) == 2  # the previous job's lines were cleared
+    assert [t.get_text() for t in ax.get_legend().get_texts()][-1] == 'Optimal Size: 2.50 kWp'
+
+
+def test_default_optimum_is_best_grid_size():
+    ax = Figure().add_subplot()
+    draw_savings_vs_kwp(ax, SIZES, SAVINGS)
+    assert ax.lines[1].get_xdata()[0] == pytest.approx(1.4)
+    assert ax.get_xlim() == (0, 3)
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_render_batch_keeps_job_order(tmp_path, workers):
+    jobs = [savings_job(tmp_path / f"s{i}.png", 0.5 + i / 4) for i in range(3)]
+    jobs.insert(1, balance_job(tmp_path / 'balance.png'))
+    written = render_batch(jobs, workers=workers, chunksize=1)
+    assert written == [path for _, path, _ in jobs]
+    assert all((tmp_path / name).read_bytes()[:8] == PNG_SIGNATURE
+               for name in ('s0.png', 's1.png', 's2.png', 'balance.png'))
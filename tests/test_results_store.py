@@ -0,0 +1,102 @@
+"""Country-partitioned Parquet results store."""
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from source.core_modules.results_store import ResultsStore, record_from_response
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_RESPONSE = os.path.join(REPO_ROOT, 'output', 'Albarracín_Spain.json')
+
+
+@pytest.fixture(scope='module')
+def response():
+    with open(SAMPLE_RESPONSE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def record(response, site_key, country, fetched_at, e_y=None):
+    row = record_from_response(site_key, site_key.split('_')[0], country, response)
+    row['fetched_at'] = fetched_at
+    if e_y is not None:
+        row['E_y'] = e_y
+    return row
+
+
+def test_record_from_response(response):
+    row = record_from_response('Albarracín_Spain', 'Albarracín', 'Spain', response)
+    assert row['latitude'] == 40.4082 and row['longitude'] == -1.4438 and row['elevation'] == 1156.0
+    assert row['radiation_db'] == 'PVGIS-SARAH2'
+    assert row['technology'] == 'c-Si'
+    assert row['peak_power_kW'] == 1.0 and row['system_loss_pct'] == 14.0
+    assert row['slope'] == 45.0 and row['azimuth'] == 0.0
+    assert row['E_y'] == 1542.16 and row['l_total'] == -19.98
+    monthly = response['outputs']['monthly']['fixed']
+    assert row['E_m'] == [m['E_m'] for m in sorted(monthly, key=lambda m: m['month'])]
+    assert len(row['H(i)_d']) == 12
+
+
+def test_incomplete_monthly_data_is_null():
+    row = record_from_response('x', 'x', 'Spain', {'outputs': {'monthly': {'fixed': [{'month': 1, 'E_m': 5}]}}})
+    assert row['E_m'] is None
+    assert row['latitude'] is None and row['E_y'] is None
+
+
+def test_flush_and_read_latest_only(tmp_path, response):
+    store = ResultsStore(str(tmp_path), flush_rows=2)
+    assert not store.add(record(response, 'Teruel_Spain', 'Spain', 1.0, e_y=100.0))
+    assert store.add(record(response, 'Lyon_France', 'France', 1.0, e_y=200.0))
+    store.add(record(response, 'Teruel_Spain', 'Spain', 2.0, e_y=150.0))
+    assert store.buffered_rows == 1
+    assert len(store.read()) == 2  # buffered rows are not visible until flushed
+    store.flush()
+
+    latest = store.read(['site_key', 'E_y']).set_index('site_key')['E_y'].to_dict()
+    assert latest == {'Teruel_Spain': 150.0, 'Lyon_France': 200.0}
+    assert len(store.read(['site_key'], latest_only=False)) == 3
+    assert list(store.read(['site_key', 'E_y']).columns) == ['site_key', 'E_y']
+
+
+def test_country_filter_with_quoted_partition_names(tmp_path, response):
+    store = ResultsStore(str(tmp_path))
+    countries = ["Côte d'Ivoire", 'United Kingdom', 'Bosnia/Herzegovina', 'Spain']
+    store.extend(record(response, f"site{i}_x", country, 1.0) for i, country in enumerate(countries))
+    store.flush()
+
+    partitions = sorted(name for name in os.listdir(tmp_path))
+    assert all('/' not in name and ' ' not in name for name in partitions)
+    for i, country in enumerate(countries):
+        df = store.read(['site_key', 'country'], countries=[country])
+        assert df.to_dict('records') == [{'site_key': f"site{i}_x", 'country': country}]
+    assert set(store.read(['country'])['country']) == set(countries)
+
+
+def test_stray_files_in_root_are_ignored(tmp_path, response):
+    store = ResultsStore(str(tmp_path))
+    store.add(record(response, 'Teruel_Spain', 'Spain', 1.0))
+    store.flush()
+    pd.DataFrame({'a': [1]}).to_parquet(tmp_path / 'stray.parquet')
+    (tmp_path / 'notes.txt').write_text('not data')
+    os.makedirs(tmp_path / 'backup')
+    pd.DataFrame({'b': [2]}).to_parquet(tmp_path / 'backup' / 'old.parquet')
+    (tmp_path / 'country=Spain' / '.part-crashed.parquet.tmp').write_bytes(b'partial')
+
+    df = store.read()
+    assert list(df['site_key']) == ['Teruel_Spain']
+
+
+def test_compact_keeps_latest_row_per_site(tmp_path, response):
+    store = ResultsStore(str(tmp_path))
+    for fetched_at, e_y in ((1.0, 100.0), (3.0, 300.0), (2.0, 200.0)):
+        store.add(record(response, 'Teruel_Spain', 'Spain', fetched_at, e_y=e_y))
+        store.flush()
+    store.add(record(response, 'Cuenca_Spain', 'Spain', 1.0, e_y=50.0))
+    store.add(record(response, 'Lyon_France', 'France', 1.0, e_y=10.0))
+    store.compact()
+
+    assert len(os.listdir(tmp_path / 'country=Spain')) == 1
+    assert len(os.listdir(tmp_path / 'country=France')) == 1
+    df = store.read(['site_key', 'E_y'], latest_only=False).set_index('site_key')['E_y'].to_dict()
+    assert df == {'Teruel_Spain': 300.0, 'Cuenca_Spain': 50.0, 'Lyon_France': 10.0}
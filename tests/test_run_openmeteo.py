@@ -0,0 +1,84 @@
+"""Batched Open-Meteo elevation lookups against a stubbed endpoint."""
+import numpy as np
+import pytest
+
+from source.utils import run_openmeteo
+
+
+class StubElevationAPI:
+    """Answers like the elevation endpoint; batches containing a `bad_lat` fail, single lookups of it too."""
+
+    def __init__(self, bad_lats=(), short_batches=False):
+        self.bad_lats = set(bad_lats)
+        self.short_batches = short_batches
+        self.calls = []
+
+    def __call__(self, url, params=None, **kwargs):
+        assert url == run_openmeteo.ELEVATION_URL
+        lats = [float(v) for v in str(params['latitude']).split(',')]
+        lons = [float(v) for v in str(params['longitude']).split(',')]
+        self.calls.append(len(lats))
+        if self.bad_lats & set(lats):
+            raise ConnectionError('stub failure')
+        elevations = [round(1000 * lat + lon, 1) for lat, lon in zip(lats, lons)]
+        if self.short_batches and len(lats) > 1:
+            elevations = elevations[:-1]
+        return StubResponse({'elevation': elevations})
+
+
+class StubResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(run_openmeteo, 'get_dem', lambda: None)
+
+    def install(**kwargs):
+        stub = StubElevationAPI(**kwargs)
+        monkeypatch.setattr(run_openmeteo, 'http_get', stub)
+        return stub
+    return install
+
+
+COORDINATES = [(0.5 + i / 100, -1.0 - i / 100) for i in range(7)]
+EXPECTED = [round(1000 * lat + lon, 1) for lat, lon in COORDINATES]
+
+
+def test_elevations_are_batched(api):
+    stub = api()
+    assert run_openmeteo.get_elevations(COORDINATES, batch_size=3) == pytest.approx(EXPECTED, abs=0.1)
+    assert stub.calls == [3, 3, 1]
+    assert run_openmeteo.get_elevations([]) == []
+
+
+def test_failed_batch_falls_back_to_single_requests(api):
+    stub = api(bad_lats={COORDINATES[4][0]})
+    elevations = run_openmeteo.get_elevations(COORDINATES, batch_size=3)
+    assert stub.calls == [3, 3, 1, 1, 1, 1]  # the middle batch is retried point by point
+    assert elevations[4] is None
+    assert [e for i, e in enumerate(elevations) if i != 4] == pytest.approx(EXPECTED[:4] + EXPECTED[5:], abs=0.1)
+
+
+def test_incomplete_batch_falls_back_to_single_requests(api):
+    stub = api(short_batches=True)
+    assert run_openmeteo.get_elevations(COORDINATES[:4], batch_size=4) == pytest.approx(EXPECTED[:4], abs=0.1)
+    assert stub.calls == [4, 1, 1, 1, 1]
+
+
+def test_dem_answers_covered_points_offline(api, monkeypatch):
+    stub = api()
+
+    class HalfCoveredDEM:
+        def elevation(self, lats, lons):
+            return np.array([123.45 if i % 2 == 0 else np.nan for i in range(len(lats))])
+    monkeypatch.setattr(run_openmeteo, 'get_dem', lambda: HalfCoveredDEM())
+
+    elevations = run_openmeteo.get_elevations(COORDINATES, batch_size=100)
+    assert stub.calls == [3]  # only the odd points went to the network
+    assert elevations[::2] == [123.5] * 4
+    assert elevations[1::2] == pytest.approx(EXPECTED[1::2], abs=0.1)
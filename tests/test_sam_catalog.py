@@ -0,0 +1,80 @@
+"""SAMCatalog lookups on a small synthetic inverter catalog."""
+import os
+
+import numpy as np
+import pytest
+
+pvlib = pytest.importorskip('pvlib')
+
+from source.core_modules import sam_catalog  # noqa: E402
+from source.core_modules.sam_catalog import ROW_GROUP_SIZE, SAMCatalog  # noqa: E402
+
+N_INVERTERS = ROW_GROUP_SIZE + 44  # spans two row groups
+
+
+@pytest.fixture(scope='module')
+def source_csv(tmp_path_factory):
+    """A SAM-format CSV: header, two unit/description rows, then one row per component."""
+    lines = ['Name,Vac,Paco,Pdco,CEC_Type', 'Units,V,W,W,', '[0],[1],[2],[3],[4]']
+    for i in range(N_INVERTERS):
+        cec_type = '' if i % 3 == 0 else 'Utility Interactive'
+        lines.append(f"Acme Power: AP-{i:03d} (240V),240,{1000 + i},{1030.5 + i},{cec_type}")
+    lines.append('Zenith Inverters: ZX 5000 [208V],208,5000,5150.25,Grid Support')
+    path = tmp_path_factory.mktemp('sam') / 'inverters.csv'
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def catalog(source_csv, tmp_path_factory):
+    return SAMCatalog('CECInverter', str(tmp_path_factory.mktemp('cache')), source_path=source_csv)
+
+
+def test_components_match_retrieve_sam(catalog, source_csv):
+    reference = pvlib.pvsystem.retrieve_sam(path=source_csv)
+    assert len(catalog) == N_INVERTERS + 1
+    assert catalog.names == list(reference.columns)
+    for name in (reference.columns[0], reference.columns[ROW_GROUP_SIZE + 7], reference.columns[-1]):
+        component = catalog[name]
+        assert component.name == name
+        for key, expected in reference[name].items():
+            if isinstance(expected, float) and np.isnan(expected):
+                assert np.isnan(component[key])
+            elif key == 'CEC_Type':
+                assert component[key] == expected
+            else:
+                assert component[key] == pytest.approx(float(expected))
+
+
+def test_loose_names_and_unknown_names(catalog):
+    exact = 'Zenith_Inverters__ZX_5000__208V_'
+    assert exact in catalog and 'Zenith Inverters: ZX 5000 [208V]' not in catalog
+    assert catalog.get('zenith inverters: zx 5000 [208v]') is catalog.get(exact)
+    assert catalog.get('Acme Power AP-299 240V')['Paco'] == 1299
+    with pytest.raises(KeyError, match='closest matches: Zenith'):
+        catalog.get('Zenith ZX 5001 208V')
+
+
+def test_search(catalog):
+    assert catalog.search('ap-123') == ['Acme_Power__AP_123__240V_']
+    assert catalog.search('AP 01', limit=3) == [f"Acme_Power__AP_{i:03d}__240V_" for i in (1, 10, 11)]
+    assert len(catalog.search('acme 240v', limit=300)) == N_INVERTERS
+    assert catalog.search('zenith invertrs zx5000')[0] == 'Zenith_Inverters__ZX_5000__208V_'
+    assert catalog.search('no such thing at all') == []
+
+
+def test_frame_and_reopen_without_rebuilding(catalog, monkeypatch):
+    frame = catalog.frame(['Paco'])
+    assert list(frame.columns) == ['Paco'] and frame.index[-1] == 'Zenith_Inverters__ZX_5000__208V_'
+    assert frame['Paco'].dtype.kind in 'if'
+
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError('the cached Parquet file should be reused')
+    monkeypatch.setattr(sam_catalog, 'build_catalog_cache', no_rebuild)
+    reopened = SAMCatalog('CECInverter', os.path.dirname(catalog.path))
+    assert reopened.names == catalog.names
+
+
+def test_unknown_catalog_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match='Unknown SAM catalog'):
+        SAMCatalog('CECModules', str(tmp_path))
@@ -0,0 +1,62 @@
+"""Sensitivity engine: exact per-draw optima."""
+import numpy as np
+import pytest
+
+from source.core_modules.pv_boiler_model import calculate_capital_recovery_factor, evaluate_size_sweep
+from source.core_modules.sensitivity import latin_hypercube, run_sensitivity, summarize_sensitivity
+
+from .test_pv_boiler_model import DEMAND_ACS, DEMAND_CAL, DEMAND_COOL, PV_PER_KWP
+
+FIXED = {
+    'cost_per_kwp_installed': 1500.0,
+    'grid_export_price_kwh': 0.02,
+    'grid_import_price_kwh': 0.16,
+    'biomass_cost_per_kwh': 0.09,
+    'loan_interest_rate': 0.06,
+    'heat_pump_cop': 3.5,
+    'cooling_eer': 3.5,
+}
+RANGES = {
+    'cost_per_kwp_installed': (1000, 2000),
+    'biomass_cost_per_kwh': (0.06, 0.12),
+    'loan_interest_rate': (0.02, 0.10),
+    'heat_pump_cop': (2.5, 4.5),
+}
+
+
+def test_latin_hypercube_fills_every_stratum():
+    samples = latin_hypercube(50, RANGES, seed=0)
+    for name, (low, high) in RANGES.items():
+        strata = np.floor((samples[name] - low) / (high - low) * 50).astype(int)
+        assert sorted(strata) == list(range(50))
+
+
+def test_optima_are_exact_and_beat_the_size_grid():
+    samples = latin_hypercube(40, RANGES, seed=3)
+    results = run_sensitivity(samples, FIXED, PV_PER_KWP, DEMAND_ACS, DEMAND_CAL, DEMAND_COOL,
+                              loan_years=15, min_kwp=0, max_kwp=25, batch_size=16)
+    assert len(results) == 40
+
+    grid = np.arange(0, 25.5, 0.5)
+    for row in results.itertuples():
+        sweep = evaluate_size_sweep(
+            grid, PV_PER_KWP, DEMAND_ACS, DEMAND_CAL, DEMAND_COOL,
+            cost_per_kwp_installed=row.cost_per_kwp_installed,
+            capital_recovery_factor=calculate_capital_recovery_factor(row.loan_interest_rate, 15),
+            biomass_cost_per_kwh=row.biomass_cost_per_kwh, grid_import_price_kwh=FIXED['grid_import_price_kwh'],
+            grid_export_price_kwh=FIXED['grid_export_price_kwh'], heat_pump_cop=row.heat_pump_cop,
+            cooling_eer=FIXED['cooling_eer'],
+        )
+        assert row.total_annual_cost <= sweep['total_annual_cost'].min() + 1e-9
+        assert row.annual_savings == pytest.approx(sweep['cost_no_pv'] - row.total_annual_cost)
+    # Optima are continuous, not snapped to the 0.5 kWp grid
+    assert not np.all(np.isin(results['optimal_kwp'], grid))
+
+
+def test_summary_rows():
+    samples = latin_hypercube(20, RANGES, seed=1)
+    results = run_sensitivity(samples, FIXED, PV_PER_KWP, DEMAND_ACS, DEMAND_CAL, DEMAND_COOL,
+                              loan_years=15, max_kwp=25)
+    summary = summarize_sensitivity(results)
+    assert list(summary.index) == ['mean', 'std', 'p5', 'p25', 'p50', 'p75', 'p95']
+    assert list(summary.columns) == ['optimal_kwp', 'annual_savings']
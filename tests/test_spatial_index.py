@@ -0,0 +1,61 @@
+"""Great-circle site index against brute-force haversine."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from source.core_modules.spatial_index import SiteIndex, haversine_km
+
+RNG = np.random.default_rng(11)
+# Includes sites across the antimeridian and near the pole, where planar lat/lon distances go wrong
+LATS = np.r_[RNG.uniform(-60, 60, 300), [0.0, 0.0, 89.5, 89.5]]
+LONS = np.r_[RNG.uniform(-180, 180, 300), [179.9, -179.9, 0.0, 180.0]]
+QUERY_LATS = np.r_[RNG.uniform(-60, 60, 50), [0.0, 89.9]]
+QUERY_LONS = np.r_[RNG.uniform(-180, 180, 50), [-179.95, 90.0]]
+
+
+def brute_force(lat, lon):
+    return haversine_km(lat, lon, LATS, LONS)
+
+
+def test_haversine_known_distance():
+    # Madrid - Paris, about 1053 km
+    assert haversine_km(40.4168, -3.7038, 48.8566, 2.3522) == pytest.approx(1053, abs=2)
+    assert haversine_km(0, 179.9, 0, -179.9) == pytest.approx(22.24, abs=0.01)
+
+
+def test_k_nearest_matches_brute_force():
+    index = SiteIndex(LATS, LONS)
+    distances, indices = index.nearest(QUERY_LATS, QUERY_LONS, k=5)
+    assert distances.shape == indices.shape == (len(QUERY_LATS), 5)
+    for q, (lat, lon) in enumerate(zip(QUERY_LATS, QUERY_LONS)):
+        exact = brute_force(lat, lon)
+        order = np.argsort(exact)[:5]
+        np.testing.assert_allclose(distances[q], exact[order], rtol=1e-9, atol=1e-6)
+        np.testing.assert_allclose(exact[indices[q]], exact[order], rtol=1e-9, atol=1e-6)
+
+    distance, nearest = index.nearest(0.0, -179.95)
+    assert np.ndim(distance) == 0 and {int(nearest)} <= {300, 301}
+
+
+@pytest.mark.parametrize('radius_km', [50.0, 500.0, 2500.0])
+def test_radius_query_matches_brute_force(radius_km):
+    index = SiteIndex(LATS, LONS)
+    found = index.within_radius(QUERY_LATS, QUERY_LONS, radius_km)
+    for q, (lat, lon) in enumerate(zip(QUERY_LATS, QUERY_LONS)):
+        exact = brute_force(lat, lon)
+        # Sites within floating-point noise of the radius may fall on either side
+        assert set(np.flatnonzero(exact < radius_km - 1e-6)) <= set(found[q])
+        assert set(found[q]) <= set(np.flatnonzero(exact <= radius_km + 1e-6))
+
+
+def test_missing_neighbours_and_site_metadata():
+    sites = pd.DataFrame({'latitude': [40.0, 41.0, None], 'longitude': [-1.0, -1.0, 2.0],
+                          'site_key': ['a', 'b', 'no coordinates']})
+    index = SiteIndex.from_frame(sites)
+    assert len(index) == 2
+    distances, indices = index.nearest(40.1, -1.0, k=3)
+    assert np.isinf(distances[2]) and indices[2] == len(index)
+
+    nearest = index.nearest_sites(40.9, -1.0, k=5)
+    assert list(nearest['site_key']) == ['b', 'a']
+    np.testing.assert_allclose(nearest['distance_km'], haversine_km(40.9, -1.0, [41.0, 40.0], [-1.0, -1.0]))
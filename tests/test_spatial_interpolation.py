@@ -0,0 +1,78 @@
+"""Elevation-detrended IDW interpolation of monthly yield."""
+import numpy as np
+import pytest
+
+from source.core_modules.spatial_interpolation import YieldInterpolator
+
+RNG = np.random.default_rng(7)
+LATS = RNG.uniform(38.0, 42.0, 40)
+LONS = RNG.uniform(-4.0, 0.0, 40)
+ELEVATIONS = RNG.uniform(0.0, 2000.0, 40)
+INTERCEPT = np.linspace(60.0, 180.0, 12)
+SLOPE = np.linspace(0.002, 0.01, 12)  # kWh per kWp per metre
+
+
+def trend_only_yield(elevations):
+    return INTERCEPT + np.asarray(elevations)[:, None] * SLOPE
+
+
+def test_exact_hit_reproduces_stored_site():
+    yields = trend_only_yield(ELEVATIONS) + RNG.normal(0, 5, (40, 12))
+    model = YieldInterpolator(LATS, LONS, ELEVATIONS, yields, k=6)
+    estimate, error = model.predict(LATS[[3, 17]], LONS[[3, 17]], ELEVATIONS[[3, 17]])
+    np.testing.assert_allclose(estimate, yields[[3, 17]])
+    np.testing.assert_allclose(error, 0.0, atol=1e-12)
+
+
+def test_elevation_trend_is_recovered():
+    model = YieldInterpolator(LATS, LONS, ELEVATIONS, trend_only_yield(ELEVATIONS), k=6)
+    np.testing.assert_allclose(model.trend_coefficients, np.stack([INTERCEPT, SLOPE]), atol=1e-9)
+
+    # A mountain point among low neighbours follows the trend, not the neighbours' values
+    estimate, error = model.predict([40.0], [-2.0], [2500.0])
+    np.testing.assert_allclose(estimate, trend_only_yield([2500.0]), rtol=1e-9)
+    np.testing.assert_allclose(error, 0.0, atol=1e-9)
+    np.testing.assert_allclose(model.cross_validate(), 0.0, atol=1e-9)
+
+    flat = YieldInterpolator(LATS, LONS, ELEVATIONS, trend_only_yield(ELEVATIONS), k=6, use_elevation=False)
+    assert not np.allclose(flat.predict([40.0], [-2.0], [2500.0])[0], trend_only_yield([2500.0]))
+
+
+def test_error_is_weighted_spread_of_neighbour_residuals():
+    # Two sites equidistant from the query, with residuals +d and -d around a flat trend
+    lats, lons = np.array([40.0, 40.0]), np.array([-1.0, 1.0])
+    yields = np.array([np.full(12, 110.0), np.full(12, 90.0)])
+    model = YieldInterpolator(lats, lons, [500.0, 500.0], yields, k=2, use_elevation=False)
+    estimate, error = model.predict([40.0], [0.0], [500.0])
+    np.testing.assert_allclose(estimate, 100.0)
+    np.testing.assert_allclose(error, 10.0)
+
+    # Closer to the first site: the estimate and spread follow the inverse-square weights
+    estimate, error = model.predict([40.0], [-0.5], [500.0])
+    w = np.array([1 / 0.5 ** 2, 1 / 1.5 ** 2])
+    w /= w.sum()
+    np.testing.assert_allclose(estimate, 90.0 + 20.0 * w[0], rtol=1e-3)
+    np.testing.assert_allclose(error, 20.0 * np.sqrt(w[0] * w[1]), rtol=1e-3)
+
+
+def test_chunked_prediction_matches_single_pass():
+    yields = trend_only_yield(ELEVATIONS) + RNG.normal(0, 5, (40, 12))
+    model = YieldInterpolator(LATS, LONS, ELEVATIONS, yields, k=5)
+    query_lat, query_lon = RNG.uniform(38, 42, 25), RNG.uniform(-4, 0, 25)
+    whole = model.predict(query_lat, query_lon)
+    chunked = model.predict(query_lat, query_lon, chunk_size=7)
+    np.testing.assert_allclose(whole[0], chunked[0])
+    np.testing.assert_allclose(whole[1], chunked[1])
+
+
+def test_guards_for_too_few_sites():
+    single = YieldInterpolator([40.0], [-1.0], [500.0], np.full((1, 12), 100.0))
+    with pytest.raises(ValueError, match='at least 2 sites'):
+        single.cross_validate()
+    np.testing.assert_allclose(single.predict([41.0], [0.0])[0], 100.0)
+
+    empty = YieldInterpolator([], [], [], np.empty((0, 12)))
+    with pytest.raises(ValueError, match='No stored sites'):
+        empty.predict([40.0], [-1.0])
+    with pytest.raises(ValueError, match='n_sites, n_months'):
+        YieldInterpolator([40.0], [-1.0], [500.0], np.full(12, 100.0))